@@ -0,0 +1,59 @@
+"""The articles of news_scraper/news.json, as the benchmarks use them.
+
+NEWS_JSON and STAGES, the stateless pipeline stages the pipeline benchmarks
+run articles through, and synthetic article stores for the search and read
+API benchmarks: articles recombined from the headlines and sentences of
+news.json, each with its own URL, so a store of any size has realistic text
+and vocabulary.
+"""
+
+import json
+import os
+import random
+import re
+import time
+
+from news_scraper.pipelines import (
+    NewsArticleCleaningPipeline, NewsArticleEnrichmentPipeline, NewsArticleExportPipeline,
+    NewsArticleQualityPipeline, NewsArticleValidationPipeline,
+)
+from news_scraper.storage import ArticleStore, article_row
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+NEWS_JSON = os.path.join(os.path.dirname(HERE), 'news_scraper', 'news.json')
+
+STAGES = (
+    NewsArticleValidationPipeline, NewsArticleCleaningPipeline, NewsArticleEnrichmentPipeline,
+    NewsArticleQualityPipeline, NewsArticleExportPipeline,
+)
+
+BATCH_SIZE = 500
+
+
+def synthetic_articles(path, count, seed=1):
+    with open(path, encoding='utf-8') as f:
+        articles = json.load(f)
+    sentences = [sentence for article in articles
+                 for sentence in re.split(r'(?<=\.) ', article.get('content') or '') if sentence]
+    rng = random.Random(seed)
+    for number in range(count):
+        base = articles[number % len(articles)]
+        item = dict(base)
+        item['url'] = f"https://news.example.com/{item.get('category') or 'news'}/article-{number}"
+        item['headline'] = f"{base['headline']} ({number})"
+        item['content'] = ' '.join(rng.sample(sentences, rng.randint(8, 20)))
+        item['tags'] = tuple(base.get('tags') or ())
+        yield item
+
+
+def build_store(path, items, search=True):
+    """Seconds per article to store (and index) ``items``"""
+    store = ArticleStore(path, search=search)
+    store.open()
+    start = time.perf_counter()
+    rows = [article_row(item) for item in items]
+    for offset in range(0, len(rows), BATCH_SIZE):
+        store.write(rows[offset:offset + BATCH_SIZE])
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed / len(items)
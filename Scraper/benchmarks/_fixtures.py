@@ -0,0 +1,85 @@
+"""Saved HTML pages the parse benchmark runs the spiders on.
+
+A corpus directory holds one sub-directory per spider:
+
+    fixtures/<spider name>/<page>.html
+    fixtures/<spider name>/index.jsonl   {"file": ..., "url": ..., "callback": ...}
+
+``callback`` is the spider method the page was parsed with when it was
+collected (``parse`` for listing pages, ``parse_article_page`` for
+articles). collect_fixtures.py builds such a corpus from a live crawl.
+"""
+
+import hashlib
+import json
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SPIDERS_DIR = os.path.join(os.path.dirname(HERE), 'news_scraper', 'spiders')
+
+FIXTURES_DIR = os.path.join(HERE, 'fixtures')
+INDEX_NAME = 'index.jsonl'
+
+# Pages committed next to the spiders, used when there is no corpus
+BUILTIN_FIXTURES = [
+    {
+        'spider': 'telegraph-spider',
+        'path': os.path.join(SPIDERS_DIR, 'articlesCatalogue.html'),
+        'url': 'https://www.telegraphindia.com/west-bengal/kolkata',
+        'callback': 'parse',
+    },
+    {
+        'spider': 'telegraph-spider',
+        'path': os.path.join(SPIDERS_DIR, 'articlePage.html'),
+        'url': 'https://www.telegraphindia.com/video/deadly-deluge-how-kolkata-drowned-after-worst-rain-in-40-years/cid/2124826',
+        'callback': 'parse_article_page',
+    },
+]
+
+
+def fixture_name(url, callback):
+    """Stable file name for a page"""
+    digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()
+    return f"{callback}-{digest}.html"
+
+
+def load_corpus(directory=FIXTURES_DIR, spiders=None):
+    """Fixture entries of ``directory`` (plus the built-in pages), optionally
+    only those of the given spider names"""
+    fixtures = list(BUILTIN_FIXTURES)
+    if os.path.isdir(directory):
+        for spider in sorted(os.listdir(directory)):
+            index = os.path.join(directory, spider, INDEX_NAME)
+            if not os.path.exists(index):
+                continue
+            with open(index, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    entry['spider'] = spider
+                    entry['path'] = os.path.join(directory, spider, entry.pop('file'))
+                    fixtures.append(entry)
+    if spiders:
+        fixtures = [fixture for fixture in fixtures if fixture['spider'] in spiders]
+    return fixtures
+
+
+def add_fixture(directory, spider, url, callback, body):
+    """Save a page into the corpus, replacing an earlier copy of the same URL"""
+    spider_dir = os.path.join(directory, spider)
+    os.makedirs(spider_dir, exist_ok=True)
+    name = fixture_name(url, callback)
+    with open(os.path.join(spider_dir, name), 'wb') as f:
+        f.write(body)
+
+    index = os.path.join(spider_dir, INDEX_NAME)
+    entries = []
+    if os.path.exists(index):
+        with open(index, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    entries = [entry for entry in entries if entry['file'] != name]
+    entries.append({'file': name, 'url': url, 'callback': callback})
+    with open(index, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
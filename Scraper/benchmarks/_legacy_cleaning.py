@@ -0,0 +1,163 @@
+# Reference copy of the cleaning rules as they were before the
+# precompiled engine in news_scraper/cleaning.py. Only used by the
+# benchmarks to check the output is unchanged and to measure the speedup.
+
+import re
+
+from w3lib.html import remove_tags
+
+
+class LegacyCleaner:
+    """Per-call re.sub implementation of the cleaning rules"""
+    
+    def _clean_headline(self, headline, source):
+        """Clean headlines by removing source names and standardizing format"""
+        if not headline:
+            return ""
+            
+        # Convert to string if not already
+        headline = str(headline).strip()
+        
+        # Remove HTML tags if any
+        headline = remove_tags(headline)
+        
+        # Remove source name from headline
+        source_patterns = {
+            'NDTV': [r'\s*[-|]\s*NDTV\s*$', r'\s*[-|]\s*NDTV\.com\s*$'],
+            'Telegraph India': [r'\s*[-|]\s*Telegraph India\s*$', r'\s*[-|]\s*The Telegraph\s*$'],
+            'Indian Express': [r'\s*[-|]\s*The Indian Express\s*$', r'\s*\|\s*Express\s*$', r'\s*[-|]\s*Indian Express\s*$'],
+            'Times of India': [r'\s*[-|]\s*Times of India\s*$', r'\s*[-|]\s*TOI\s*$', r'\s*[-|]\s*The Times of India\s*$']
+        }
+        
+        if source in source_patterns:
+            for pattern in source_patterns[source]:
+                headline = re.sub(pattern, '', headline, flags=re.IGNORECASE)
+        
+        # Remove extra whitespace and normalize
+        headline = re.sub(r'\s+', ' ', headline).strip()
+        
+        # Fix capitalization if headline is ALL CAPS
+        if headline.isupper() and len(headline) > 10:
+            headline = headline.title()
+        
+        # Remove quotes if they wrap the entire headline
+        if headline.startswith('"') and headline.endswith('"'):
+            headline = headline[1:-1]
+        if headline.startswith("'") and headline.endswith("'"):
+            headline = headline[1:-1]
+        
+        return headline.strip()
+    
+    def _clean_content(self, content):
+        """Clean article content"""
+        if not content:
+            return ""
+            
+        # Convert to string if not already
+        content = str(content)
+        
+        # Remove any HTML tags that might be present
+        content = remove_tags(content)
+        
+        # Normalize whitespace
+        content = re.sub(r'\s+', ' ', content).strip()
+        
+        # Remove common footer phrases (case insensitive)
+        footer_patterns = [
+            r'(?i)follow us on.*$',
+            r'(?i)for all the latest.*news.*$',
+            r'(?i)download the.*app.*$',
+            r'(?i)click here to.*$',
+            r'(?i)subscribe to our newsletter.*$',
+            r'(?i)follow our.*channel.*$',
+            r'(?i)for more news.*visit.*$',
+            r'(?i)copyright ©.*$',
+            r'(?i)share this article.*$',
+            r'(?i)tags:.*$',
+            r'(?i)also read:.*$',
+            r'(?i)read more:.*$',
+            r'(?i)get the latest.*updates.*$',
+            r'(?i)stay updated.*$'
+        ]
+        
+        for pattern in footer_patterns:
+            content = re.sub(pattern, '', content)
+        
+        # Remove URLs
+        content = re.sub(r'https?://\S+', '', content)
+        
+        # Remove email addresses
+        content = re.sub(r'\S+@\S+\.\S+', '', content)
+        
+        # Remove excessive punctuation
+        content = re.sub(r'[.]{3,}', '...', content)
+        content = re.sub(r'[!]{2,}', '!', content)
+        content = re.sub(r'[?]{2,}', '?', content)
+        
+        # Final whitespace cleanup
+        content = re.sub(r'\s+', ' ', content).strip()
+        
+        return content
+    
+    def _clean_summary(self, summary):
+        """Clean article summary"""
+        if not summary:
+            return ""
+            
+        # Convert to string
+        summary = str(summary).strip()
+        
+        # Remove any HTML tags
+        summary = remove_tags(summary)
+        
+        # Normalize whitespace
+        summary = re.sub(r'\s+', ' ', summary).strip()
+        
+        # Remove phrases like "Read full article here" or "Click to read more"
+        summary = re.sub(r'(?i)read (full|more|article).*$', '', summary)
+        summary = re.sub(r'(?i)click (here|to).*$', '', summary)
+        summary = re.sub(r'(?i)continue reading.*$', '', summary)
+        
+        return summary.strip()
+    
+    def _clean_author(self, author):
+        """Clean author field"""
+        if not author:
+            return ""
+        
+        # Convert to string
+        author = str(author).strip()
+        
+        # Remove HTML tags
+        author = remove_tags(author)
+        
+        # Remove prefixes like "By" or "Written by" - fix regex patterns
+        author = re.sub(r'(?i)^by\s+', '', author)
+        author = re.sub(r'(?i)^written by\s+', '', author)
+        author = re.sub(r'(?i)^reported by\s+', '', author)
+        author = re.sub(r'(?i)^with inputs from\s+', '', author)
+        
+        # Remove suffixes like "| Staff Reporter" or similar
+        author = re.sub(r'(?i)\|\s*staff.*$', '', author)
+        author = re.sub(r'(?i)\|\s*correspondent.*$', '', author)
+        
+        # Clean up multiple authors separated by commas or 'and'
+        author = re.sub(r'\s+and\s+', ', ', author)
+        
+        return author.strip()
+    
+    def _clean_keywords(self, keywords):
+        """Clean keywords field"""
+        if not keywords:
+            return ""
+        
+        # Convert to string
+        keywords = str(keywords).strip()
+        
+        # Remove HTML tags
+        keywords = remove_tags(keywords)
+        
+        # Normalize whitespace
+        keywords = re.sub(r'\s+', ' ', keywords).strip()
+        
+        return keywords
@@ -0,0 +1,101 @@
+"""Measure read API page latency against page depth.
+
+Builds a store of --articles synthetic articles (see _articles.py), labels
+them with departments and sentiments as the classification and sentiment
+jobs would, then times ArticleReader pages (cursor / keyset pagination) at
+increasing depths, with and without filters, next to the same page fetched
+with LIMIT/OFFSET.
+
+    cd Scraper
+    python benchmarks/bench_api.py [--articles N] [--repeat N]
+"""
+
+import argparse
+import os
+import statistics
+import sqlite3
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from news_scraper.api import ITEM_QUERY, ArticleReader  # noqa: E402
+
+from _articles import NEWS_JSON, build_store, synthetic_articles  # noqa: E402
+
+
+FILTERS = (
+    {},
+    {'department': 'politics'},
+    {'department': 'politics', 'sentiment': 'negative'},
+)
+
+LIMIT = 20
+
+
+def label(path):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            "UPDATE articles SET"
+            " department = CASE id % 4 WHEN 0 THEN 'politics' WHEN 1 THEN 'sports' ELSE 'economy' END,"
+            " sentiment = CASE id % 3 WHEN 0 THEN 'positive' WHEN 1 THEN 'negative' ELSE 'neutral' END"
+        )
+    conn.close()
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def offset_page(conn, filters, offset):
+    where = ''.join(f' AND a.{column} = ?' for column in filters)
+    return conn.execute(
+        f'{ITEM_QUERY}{where} ORDER BY a.published_at DESC, a.id DESC LIMIT ? OFFSET ?',
+        [*filters.values(), LIMIT + 1, offset],
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--input', default=NEWS_JSON)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'articles.sqlite3')
+        build_store(path, list(synthetic_articles(args.input, args.articles)), search=False)
+        label(path)
+        reader = ArticleReader(path)
+        conn = sqlite3.connect(path)
+
+        print(f"articles:      {args.articles}, {LIMIT} per page")
+        print(f"{'filters':40} {'page':>6} {'cursor ms':>10} {'offset ms':>10}")
+        for filters in FILTERS:
+            # Walk the cursors once, timing the pages at these depths
+            depths = {1, 10, 100, 1000}
+            cursor, page = None, 0
+            while True:
+                page += 1
+                if page in depths:
+                    keyset = timed(lambda: reader.page(limit=LIMIT, cursor=cursor, **filters), args.repeat)
+                    offset = timed(lambda: offset_page(conn, filters, (page - 1) * LIMIT), args.repeat)
+                    name = ', '.join(f'{key}={value}' for key, value in filters.items()) or '-'
+                    print(f"{name:40} {page:6} {keyset * 1e3:10.2f} {offset * 1e3:10.2f}")
+                items, cursor = reader.page(limit=LIMIT, cursor=cursor, **filters)
+                if cursor is None:
+                    break
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Measure the memory an in-flight article takes, per item.
+
+Builds copies of the articles in news_scraper/news.json as NewsArticle
+records and as the dict-backed scrapy.Item it replaced, measuring with
+tracemalloc what they take while all of them are alive at once:
+
+  record     the item itself, its field values shared with the other copies
+  processed  after the stateless pipeline stages (validation, cleaning,
+             enrichment, quality, export), every string the stages kept
+             or created included
+
+Before measuring, checks that a partially filled NewsArticle still reads
+through ItemAdapter and exports to CSV with its missing fields empty.
+
+    cd Scraper
+    python benchmarks/bench_item_memory.py [--copies N]
+"""
+
+import argparse
+import csv
+import gc
+import io
+import json
+import os
+import sys
+import tracemalloc
+import warnings
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import scrapy  # noqa: E402
+from itemadapter import ItemAdapter  # noqa: E402
+from scrapy.exceptions import DropItem  # noqa: E402
+from scrapy.exporters import CsvItemExporter  # noqa: E402
+
+from news_scraper.items import ARTICLE_FIELDS, NewsArticle  # noqa: E402
+
+from _articles import NEWS_JSON, STAGES  # noqa: E402
+
+
+# NewsArticle as it was before, a dict-backed scrapy.Item
+DictArticle = type('DictArticle', (scrapy.Item,), {field: scrapy.Field() for field in ARTICLE_FIELDS})
+
+
+def load_articles(path):
+    with open(path, encoding='utf-8') as f:
+        articles = json.load(f)
+    # As the spider yields them: extracted strings, no derived fields yet
+    derived = ('tags', 'scraped_at', 'word_count', 'read_time')
+    return [{field: value for field, value in article.items()
+             if field in ARTICLE_FIELDS and field not in derived} for article in articles]
+
+
+def build(item_cls, articles, copies):
+    items = []
+    for _ in range(copies):
+        for article in articles:
+            item = item_cls()
+            for field, value in article.items():
+                item[field] = value
+            items.append(item)
+    return items
+
+
+def process(items, stages):
+    kept = []
+    for item in items:
+        try:
+            for stage in stages:
+                item = stage.process_item(item, None)
+        except DropItem:
+            continue
+        kept.append(item)
+    return kept
+
+
+def check_adapter(article):
+    """Fail unless ItemAdapter and CsvItemExporter skip the unset fields"""
+    item = NewsArticle(url=article['url'], headline=article['headline'])
+    adapter = ItemAdapter(item)
+    assert adapter.get('content') is None and 'content' not in adapter
+    assert adapter.asdict() == {'url': article['url'], 'headline': article['headline']}
+    try:
+        adapter['content']
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('unset field read through ItemAdapter')
+
+    output = io.BytesIO()
+    exporter = CsvItemExporter(output)
+    exporter.start_exporting()
+    exporter.export_item(item)
+    exporter.finish_exporting()
+    header, row = csv.reader(io.StringIO(output.getvalue().decode('utf-8')))
+    assert header == list(ARTICLE_FIELDS)
+    assert row == [item.get(field, '') for field in ARTICLE_FIELDS]
+
+
+def measure(make):
+    """(bytes allocated and still alive, items) of make()"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = make()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size, len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--copies', type=int, default=100, help='copies of every article')
+    parser.add_argument('--input', default=NEWS_JSON)
+    args = parser.parse_args()
+
+    # The stages still take the deprecated spider argument
+    warnings.simplefilter('ignore')
+    stages = [stage() for stage in STAGES]
+    for stage in stages:
+        stage.logger.disabled = True
+    articles = load_articles(args.input)
+    check_adapter(articles[0])
+
+    results = {}
+    for name, item_cls in (('scrapy.Item', DictArticle), ('NewsArticle', NewsArticle)):
+        record, count = measure(lambda: build(item_cls, articles, args.copies))
+        processed, kept = measure(
+            lambda: process(build(item_cls, articles, args.copies), stages))
+        results[name] = (record / count, processed / kept)
+
+    print(f"items:         {count} ({len(articles)} articles x {args.copies}), {kept} kept by the stages")
+    print(f"{'':14} {'record':>10} {'processed':>10}  bytes/item")
+    for name, (record, processed) in results.items():
+        print(f"{name + ':':14} {record:10.0f} {processed:10.0f}")
+    (old_record, old_processed), (new_record, new_processed) = results.values()
+    print(f"{'saved:':14} {old_record - new_record:10.0f} {old_processed - new_processed:10.0f}"
+          f"  ({(old_record - new_record) / old_record:.0%}, "
+          f"{(old_processed - new_processed) / old_processed:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
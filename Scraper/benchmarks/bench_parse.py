@@ -0,0 +1,206 @@
+"""Benchmark how fast the spiders parse saved HTML pages.
+
+Builds offline HtmlResponse objects from the fixture corpus (see
+_fixtures.py and collect_fixtures.py; the pages committed next to the
+spiders are always included) and runs each page through the spider callback
+it was collected with. For every spider and callback it prints pages per
+second, XPath evaluations per page (CSS selectors are translated to XPath,
+so this counts every Selector query and every compiled Query), the peak
+memory allocated while parsing one page and the average body size.
+
+With --prune the bodies go through the response pruning first (as the
+ResponsePruningMiddleware does in a crawl; its cost is included in the
+timing), so comparing with an unpruned run shows the parse time and memory
+it saves per source.
+
+    cd Scraper
+    python benchmarks/bench_parse.py [--repeat N] [--spider NAME]
+    python benchmarks/bench_parse.py --json before.json
+    python benchmarks/bench_parse.py --compare before.json
+    python benchmarks/bench_parse.py --prune --compare before.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import parsel.selector  # noqa: E402
+from scrapy import Request  # noqa: E402
+from scrapy.http import HtmlResponse  # noqa: E402
+from scrapy.spiderloader import SpiderLoader  # noqa: E402
+from scrapy.utils.project import get_project_settings  # noqa: E402
+from scrapy.utils.test import get_crawler  # noqa: E402
+
+from news_scraper.cascade import Query  # noqa: E402
+from news_scraper.pruning import prune_html  # noqa: E402
+
+from _fixtures import FIXTURES_DIR, load_corpus  # noqa: E402
+
+
+class XPathCounter:
+    """Count Selector.xpath() and Query.getall() calls while installed"""
+
+    def __init__(self):
+        self.count = 0
+        self._original = parsel.selector.Selector.xpath
+        self._original_getall = Query.getall
+
+    def __enter__(self):
+        original = self._original
+        original_getall = self._original_getall
+        counter = self
+
+        def xpath(selector, *args, **kwargs):
+            counter.count += 1
+            return original(selector, *args, **kwargs)
+
+        def getall(query, response):
+            counter.count += 1
+            return original_getall(query, response)
+
+        parsel.selector.Selector.xpath = xpath
+        Query.getall = getall
+        return self
+
+    def __exit__(self, *exc):
+        parsel.selector.Selector.xpath = self._original
+        Query.getall = self._original_getall
+
+
+def load_pages(fixtures):
+    pages = []
+    for fixture in fixtures:
+        with open(fixture['path'], 'rb') as f:
+            pages.append((fixture['spider'], fixture['callback'], fixture['url'], f.read()))
+    return pages
+
+
+def make_spiders(names):
+    settings = get_project_settings()
+    loader = SpiderLoader.from_settings(settings)
+    spiders = {}
+    for name in names:
+        spidercls = loader.load(name)
+        spiders[name] = spidercls.from_crawler(get_crawler(spidercls))
+    return spiders
+
+
+def parse_page(spider, callback, url, body, prune=False):
+    if prune:
+        body = prune_html(body)
+    # A fresh response every time, so no parsed tree is reused between runs
+    response = HtmlResponse(url, body=body, request=Request(url))
+    for _ in getattr(spider, callback)(response) or ():
+        pass
+
+
+def run(pages, spiders, repeat, prune=False):
+    groups = defaultdict(lambda: {'pages': 0, 'seconds': [], 'xpath': 0, 'peak_kib': 0.0, 'bytes': 0})
+
+    # Selector evaluations and memory, one pass
+    tracemalloc.start()
+    for spider_name, callback, url, body in pages:
+        group = groups[f'{spider_name}/{callback}']
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        with XPathCounter() as counter:
+            parse_page(spiders[spider_name], callback, url, body, prune)
+        peak = (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+        group['pages'] += 1
+        group['bytes'] += len(prune_html(body) if prune else body)
+        group['xpath'] += counter.count
+        group['peak_kib'] = max(group['peak_kib'], peak)
+    tracemalloc.stop()
+
+    # Throughput, from the median pass so one slow pass does not skew it
+    for _ in range(repeat):
+        elapsed = defaultdict(float)
+        for spider_name, callback, url, body in pages:
+            start = time.perf_counter()
+            parse_page(spiders[spider_name], callback, url, body, prune)
+            elapsed[f'{spider_name}/{callback}'] += time.perf_counter() - start
+        for key, seconds in elapsed.items():
+            groups[key]['seconds'].append(seconds)
+
+    results = {}
+    for key, group in sorted(groups.items()):
+        results[key] = {
+            'pages': group['pages'],
+            'pages_per_second': group['pages'] / statistics.median(group['seconds']),
+            'xpath_per_page': group['xpath'] / group['pages'],
+            'peak_kib': group['peak_kib'],
+            'body_kib': group['bytes'] / group['pages'] / 1024,
+        }
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'spider/callback':42} {'pages':>5} {'pages/s':>9} {'xpath/page':>10} {'peak KiB':>9} {'body KiB':>9}")
+    for key, result in results.items():
+        line = (f"{key:42} {result['pages']:5d} {result['pages_per_second']:9.1f} "
+                f"{result['xpath_per_page']:10.1f} {result['peak_kib']:9.0f} {result.get('body_kib', 0):9.1f}")
+        previous = (baseline or {}).get(key)
+        if previous:
+            change = result['pages_per_second'] / previous['pages_per_second'] - 1
+            memory = result['peak_kib'] / previous['peak_kib'] - 1
+            line += f"   {change:+.1%} pages/s, {memory:+.1%} peak memory vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--corpus', default=FIXTURES_DIR)
+    parser.add_argument('--spider', action='append', help='only this spider (repeatable)')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--compare', help='results file of an earlier run to compare with')
+    parser.add_argument('--prune', action='store_true', help='prune the bodies before parsing them')
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(HERE))
+    fixtures = load_corpus(args.corpus, args.spider)
+    if not fixtures:
+        print("ERROR: no fixtures")
+        return 1
+    pages = load_pages(fixtures)
+    spiders = make_spiders({spider for spider, _, _, _ in pages})
+
+    results = run(pages, spiders, args.repeat, args.prune)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        print(f"baseline: {args.compare}")
+    print(f"pages: {len(pages)} (x{args.repeat})")
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'revision': git_revision(), 'repeat': args.repeat, 'prune': args.prune,
+                       'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
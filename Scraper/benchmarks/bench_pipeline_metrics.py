@@ -0,0 +1,112 @@
+"""Measure what the instrumented item pipeline manager costs per item.
+
+Runs copies of the articles in news_scraper/news.json through the stateless
+pipeline stages (validation, cleaning, enrichment, quality, export), or
+through seven stages that do nothing (--noop), with Scrapy's
+ItemPipelineManager and with InstrumentedItemPipelineManager, interleaved,
+and prints the time per item of each.
+
+    cd Scraper
+    python benchmarks/bench_pipeline_metrics.py [--repeat N] [--noop]
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import sys
+import time
+import warnings
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scrapy import Spider  # noqa: E402
+from scrapy.pipelines import ItemPipelineManager  # noqa: E402
+from scrapy.utils.test import get_crawler  # noqa: E402
+
+from news_scraper.items import ARTICLE_FIELDS, NewsArticle  # noqa: E402
+from news_scraper.metrics import InstrumentedItemPipelineManager  # noqa: E402
+
+from _articles import NEWS_JSON, STAGES  # noqa: E402
+
+
+class NoopPipeline:
+    def process_item(self, item):
+        return item
+
+
+def load_items(path):
+    with open(path, encoding='utf-8') as f:
+        articles = json.load(f)
+    items = []
+    for article in articles:
+        item = NewsArticle()
+        for field, value in article.items():
+            if field in ARTICLE_FIELDS:
+                item[field] = value
+        items.append(item)
+    return items
+
+
+def build(manager_cls, crawler, noop):
+    if noop:
+        pipelines = [NoopPipeline() for _ in range(7)]
+    else:
+        pipelines = [stage.create(crawler) for stage in STAGES]
+    return manager_cls(*pipelines, crawler=crawler)
+
+
+async def timed(manager, items):
+    """Seconds per item, dropped items included"""
+    start = time.perf_counter()
+    for item in items:
+        try:
+            await manager.process_item_async(item)
+        except Exception:
+            pass
+    return (time.perf_counter() - start) / len(items)
+
+
+async def run(args):
+    crawler = get_crawler(Spider, {'PIPELINE_METRICS_FILE': None, 'LOG_LEVEL': 'ERROR'})
+    crawler.spider = Spider('bench')
+    crawler.spider.crawler = crawler
+    managers = {
+        'scrapy': build(ItemPipelineManager, crawler, args.noop),
+        'instrumented': build(InstrumentedItemPipelineManager, crawler, args.noop),
+    }
+    items = load_items(args.input)
+    results = {name: [] for name in managers}
+    for _ in range(args.repeat):
+        # Interleaved, so both see the same machine state
+        for name, manager in managers.items():
+            results[name].append(await timed(manager, copy.deepcopy(items)))
+    return {name: min(times) for name, times in results.items()}, managers['instrumented']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--noop', action='store_true', help='seven stages that do nothing')
+    parser.add_argument('--input', default=NEWS_JSON)
+    args = parser.parse_args()
+
+    # The stages still take the deprecated spider argument
+    warnings.simplefilter('ignore')
+    times, instrumented = asyncio.run(run(args))
+    instrumented.metrics.publish()
+    stages = len(instrumented.stages)
+
+    print(f"stages:        {stages} ({'no-op' if args.noop else 'stateless pipeline stages'})")
+    print(f"scrapy:        {times['scrapy'] * 1e6:8.2f} us/item")
+    print(f"instrumented:  {times['instrumented'] * 1e6:8.2f} us/item")
+    print(f"difference:    {(times['instrumented'] - times['scrapy']) * 1e6:+8.2f} us/item "
+          f"({(times['instrumented'] - times['scrapy']) * 1e6 / stages:+.2f} us/stage)")
+    print(f"p50/p99 (us):  {instrumented.metrics.summary()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
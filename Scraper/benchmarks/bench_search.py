@@ -0,0 +1,92 @@
+"""Measure full-text indexing and query times on a large article store.
+
+Builds a store of --articles synthetic articles (headlines and sentences of
+the articles in news_scraper/news.json, recombined) with ArticleStore, with
+and without the search index, then times ranked, paginated queries with
+snippets (ArticleSearch) and incremental re-indexing of re-crawled articles.
+
+    cd Scraper
+    python benchmarks/bench_search.py [--articles N] [--repeat N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from news_scraper.search import ArticleSearch  # noqa: E402
+from news_scraper.storage import ArticleStore, article_row  # noqa: E402
+
+from _articles import NEWS_JSON, build_store, synthetic_articles  # noqa: E402
+
+
+QUERIES = (
+    # (text, options)
+    ('india', {}),
+    ('bank holiday', {}),
+    ('"state bank"', {}),
+    ('elect*', {}),
+    ('government policy india', {}),
+    ('india', {'page': 50}),
+    ('india', {'category': 'business'}),
+    ('nothingmatchesthis', {}),
+)
+
+
+def rewrite(path, items):
+    """Seconds per article to upsert ``items`` again"""
+    store = ArticleStore(path)
+    store.open()
+    start = time.perf_counter()
+    store.write([article_row(item) for item in items])
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--input', default=NEWS_JSON)
+    args = parser.parse_args()
+
+    items = list(synthetic_articles(args.input, args.articles))
+    with tempfile.TemporaryDirectory() as directory:
+        plain = build_store(os.path.join(directory, 'plain.sqlite3'), items, search=False)
+        path = os.path.join(directory, 'articles.sqlite3')
+        indexed = build_store(path, items, search=True)
+        size = os.path.getsize(path) / 1024 / 1024
+        print(f"articles:      {len(items)}, store {size:.0f} MB with the index")
+        print(f"store:         {plain * 1e6:8.1f} us/article without the index")
+        print(f"store+index:   {indexed * 1e6:8.1f} us/article ({(indexed - plain) * 1e6:+.1f})")
+
+        recrawled = items[:1000]
+        unchanged = rewrite(path, recrawled)
+        changed = rewrite(path, [dict(item, content=item['content'] + ' Updated.') for item in recrawled])
+        print(f"re-crawl:      {unchanged * 1e6:8.1f} us/article unchanged, "
+              f"{changed * 1e6:.1f} us/article with new content")
+
+        search = ArticleSearch(path)
+        search.open()
+        print(f"{'query':40} {'hits':>7} {'p50 ms':>8} {'max ms':>8}")
+        for text, options in QUERIES:
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = search.search(text, **options)
+                times.append(time.perf_counter() - start)
+            label = text + ''.join(f' {key}={value}' for key, value in options.items())
+            print(f"{label:40} {results['total']:7} {statistics.median(times) * 1e3:8.2f} "
+                  f"{max(times) * 1e3:8.2f}")
+        search.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Collect HTML fixtures for the parse benchmark from a live crawl.
+
+Runs a spider with the item pipelines, known-URL stores, resumable frontier
+and response pruning switched off and saves every listing and article page it downloads into the
+corpus (benchmarks/fixtures/<spider>/ by default).
+
+    cd Scraper
+    python benchmarks/collect_fixtures.py ndtv-spider [--pages 50]
+"""
+
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from scrapy import signals  # noqa: E402
+from scrapy.crawler import CrawlerProcess  # noqa: E402
+from scrapy.http import HtmlResponse  # noqa: E402
+from scrapy.utils.project import get_project_settings  # noqa: E402
+
+from _fixtures import FIXTURES_DIR, add_fixture  # noqa: E402
+
+
+CALLBACKS = ('parse', 'parse_article_page')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('spider')
+    parser.add_argument('--pages', type=int, default=50, help='stop after this many responses')
+    parser.add_argument('--output', default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(HERE))
+    settings = get_project_settings()
+    settings.set('ITEM_PIPELINES', {})
+    settings.set('DEDUP_STORE_PATH', None)
+    settings.set('CONDITIONAL_STORE_PATH', None)
+    settings.set('FRONTIER_DIR', None)
+    # The corpus is listing and article pages, not sitemaps
+    settings.set('DISCOVERY_MODE', 'listing')
+    # Fixtures keep the page as served; bench_parse.py --prune prunes it
+    settings.set('PRUNE_RESPONSES_ENABLED', False)
+    settings.set('CLOSESPIDER_PAGECOUNT', args.pages)
+
+    saved = []
+
+    def response_received(response, request, spider):
+        callback = getattr(request.callback, '__name__', 'parse')
+        if response.status != 200 or not isinstance(response, HtmlResponse) or callback not in CALLBACKS:
+            return
+        add_fixture(args.output, spider.name, response.url, callback, response.body)
+        saved.append(response.url)
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(args.spider)
+    crawler.signals.connect(response_received, signal=signals.response_received)
+    process.crawl(crawler)
+    process.start()
+
+    print(f"saved {len(saved)} pages to {os.path.join(args.output, args.spider)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,322 @@
+# Read API serving the article store (news_scraper.storage) to the frontend.
+#
+#     cd Scraper
+#     python -m news_scraper.api [--host 127.0.0.1] [--port 8000] [--store PATH]
+#
+#     GET /api/news?department=economy&sentiment=negative&source=...&limit=20&cursor=...
+#         {"items": [NewsItem, ...], "nextCursor": "..." or null}
+#     GET /api/news/<id>
+#         NewsItem
+#     GET /api/search?q=...&page=1&perPage=20&source=...&category=...
+#         {"query", "total", "page", "perPage", "items": [NewsItem + snippet, score]}
+#
+# Items have the shape of the frontend's NewsItem (src/data/newsData.ts),
+# without the content in search results, and publishedAt is the UTC
+# published_at of the store. Articles without a department (a category that
+# names none, not classified yet) are left out until they have one. Lists
+# are newest first and are paged with a cursor, the (published_at, id) of
+# the last item sent, rather than an offset: every page is a range scan of
+# the (filter, published_at, id) index starting at the cursor, so page 1000
+# costs what page 1 costs.
+#
+# Responses are gzip-compressed for clients that accept it and carry an ETag
+# (If-None-Match gets a 304) and a Cache-Control max-age. SQLite is queried
+# from worker threads, each with its own read-only connection, so the event
+# loop never waits on the database and readers never wait on the spiders.
+#
+# aiohttp is an optional dependency, needed only to serve; ArticleReader
+# works without it.
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import sys
+import threading
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from news_scraper import sqlite
+from news_scraper.search import ArticleSearch
+
+
+# Department and Sentiment of src/data/newsData.ts
+DEPARTMENT_NAMES = frozenset((
+    'judiciary', 'crime', 'politics', 'science', 'sports', 'health', 'entertainment',
+    'economy', 'defence', 'foreign-affairs',
+))
+SENTIMENTS = frozenset(('positive', 'negative', 'neutral'))
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Largest SQLite integer, article ids above it are not ids
+MAX_ID = 2 ** 63 - 1
+
+# Smaller responses are sent uncompressed
+MIN_COMPRESSED_SIZE = 1024
+
+ITEM_QUERY = (
+    'SELECT a.id, a.department, a.headline, a.summary, a.content, s.name, a.url, a.sentiment,'
+    ' a.published_at, a.image_url'
+    ' FROM articles a LEFT JOIN sources s ON s.id = a.source_id'
+    ' WHERE a.department IS NOT NULL'
+)
+
+
+def news_item(row):
+    """NewsItem of an ITEM_QUERY row"""
+    (article_id, department, headline, summary, content, source, url, sentiment,
+     published_at, image_url) = row
+    item = {
+        'id': str(article_id),
+        'department': department,
+        'headline': headline,
+        'summary': summary or '',
+        'content': content or '',
+        'source': source or '',
+        'sourceUrl': url,
+        'sentiment': sentiment,
+        'publishedAt': published_at,
+    }
+    if image_url:
+        item['imageUrl'] = image_url
+    return item
+
+
+def encode_cursor(published_at, article_id):
+    data = json.dumps([published_at, article_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(published_at, id) of a cursor, ValueError when it is not one"""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        published_at, article_id = json.loads(data)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(published_at, str) or type(article_id) is not int or not 0 <= article_id <= MAX_ID:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return published_at, article_id
+
+
+class ArticleReader:
+    """Queries of the read API, with one read-only connection per thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    @property
+    def conn(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = sqlite.connect_readonly(self.path)
+        return conn
+
+    @property
+    def search_index(self):
+        search = getattr(self.local, 'search', None)
+        if search is None:
+            search = self.local.search = ArticleSearch(self.path)
+            search.open()
+        return search
+
+    def page(self, department=None, sentiment=None, source=None, limit=DEFAULT_LIMIT, cursor=None):
+        """(NewsItems, cursor of the next page or None), newest first"""
+        where = []
+        params = []
+        if department is not None:
+            where.append('a.department = ?')
+            params.append(department)
+        if sentiment is not None:
+            where.append('a.sentiment = ?')
+            params.append(sentiment)
+        if source is not None:
+            where.append('a.source_id = (SELECT id FROM sources WHERE name = ?)')
+            params.append(source)
+        if cursor is not None:
+            where.append('(a.published_at, a.id) < (?, ?)')
+            params.extend(decode_cursor(cursor))
+        where = ''.join(f' AND {condition}' for condition in where)
+
+        # One more row than asked for tells whether there is a next page
+        rows = self.conn.execute(
+            f'{ITEM_QUERY}{where} ORDER BY a.published_at DESC, a.id DESC LIMIT ?',
+            [*params, limit + 1],
+        ).fetchall()
+        items = [news_item(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last[8], last[0])
+        return items, next_cursor
+
+    def article(self, article_id):
+        """NewsItem of an article, None when there is none"""
+        if not 0 <= article_id <= MAX_ID:
+            return None
+        row = self.conn.execute(f'{ITEM_QUERY} AND a.id = ?', (article_id,)).fetchone()
+        return news_item(row) if row is not None else None
+
+    def search(self, text, page=1, per_page=DEFAULT_LIMIT, source=None, category=None):
+        results = self.search_index.search(text, page, per_page, source=source, category=category,
+                                           labeled=True)
+        return {
+            'query': results['query'],
+            'total': results['total'],
+            'page': results['page'],
+            'perPage': results['per_page'],
+            'items': [{
+                'id': str(hit['id']),
+                'department': hit['department'],
+                'headline': hit['headline'],
+                'summary': hit['summary'] or '',
+                'source': hit['source'] or '',
+                'sourceUrl': hit['url'],
+                'sentiment': hit['sentiment'],
+                'publishedAt': hit['published_at'],
+                **({'imageUrl': hit['image_url']} if hit['image_url'] else {}),
+                'snippet': hit['snippet'],
+                'score': hit['score'],
+            } for hit in results['hits']],
+        }
+
+
+def _choice(query, name, choices):
+    value = query.get(name) or None
+    if value is not None and value not in choices:
+        raise ValueError(f"Unknown {name}: {value!r}")
+    return value
+
+
+def _number(query, name, default, maximum=None):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise ValueError(f"{name} is not a number") from None
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1")
+    return min(value, maximum) if maximum else value
+
+
+class ReadApi:
+    """aiohttp handlers of the read API"""
+
+    def __init__(self, reader, cache_seconds=60, cors_origin='*'):
+        self.reader = reader
+        self.cache_seconds = cache_seconds
+        self.cors_origin = cors_origin
+
+    def application(self):
+        if web is None:
+            raise RuntimeError("The read API needs aiohttp (pip install aiohttp)")
+        app = web.Application()
+        app.router.add_get('/api/news', self.list_news)
+        app.router.add_get('/api/news/{id}', self.get_news)
+        app.router.add_get('/api/search', self.search)
+        return app
+
+    async def list_news(self, request):
+        query = request.query
+        try:
+            items, next_cursor = await asyncio.to_thread(
+                self.reader.page,
+                department=_choice(query, 'department', DEPARTMENT_NAMES),
+                sentiment=_choice(query, 'sentiment', SENTIMENTS),
+                source=query.get('source') or None,
+                limit=_number(query, 'limit', DEFAULT_LIMIT, MAX_LIMIT),
+                cursor=query.get('cursor') or None,
+            )
+        except ValueError as e:
+            return self.error(request, 400, str(e))
+        return self.respond(request, {'items': items, 'nextCursor': next_cursor})
+
+    async def get_news(self, request):
+        try:
+            article_id = int(request.match_info['id'])
+        except ValueError:
+            return self.error(request, 404, "No such article")
+        item = await asyncio.to_thread(self.reader.article, article_id)
+        if item is None:
+            return self.error(request, 404, "No such article")
+        return self.respond(request, item)
+
+    async def search(self, request):
+        query = request.query
+        try:
+            results = await asyncio.to_thread(
+                self.reader.search,
+                query.get('q', ''),
+                page=_number(query, 'page', 1),
+                per_page=_number(query, 'perPage', DEFAULT_LIMIT, MAX_LIMIT),
+                source=query.get('source') or None,
+                category=query.get('category') or None,
+            )
+        except ValueError as e:
+            return self.error(request, 400, str(e))
+        return self.respond(request, results)
+
+    def _headers(self):
+        headers = {'Vary': 'Accept-Encoding'}
+        if self.cors_origin:
+            headers['Access-Control-Allow-Origin'] = self.cors_origin
+        return headers
+
+    def respond(self, request, data):
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        # Weak: the same JSON is sent gzip-compressed or not
+        etag = f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        headers = self._headers()
+        headers['ETag'] = etag
+        headers['Cache-Control'] = f'public, max-age={self.cache_seconds}'
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if if_none_match and (if_none_match.strip() == '*' or etag in (
+                tag.strip() for tag in if_none_match.split(','))):
+            return web.Response(status=304, headers=headers)
+
+        response = web.Response(body=body, content_type='application/json', charset='utf-8',
+                                headers=headers)
+        if len(body) >= MIN_COMPRESSED_SIZE:
+            # gzip or deflate, as the request's Accept-Encoding allows
+            response.enable_compression()
+        return response
+
+    def error(self, request, status, message):
+        headers = self._headers()
+        headers['Cache-Control'] = 'no-store'
+        return web.json_response({'error': message}, status=status, headers=headers)
+
+
+def default_store_path():
+    """ARTICLE_STORE_PATH of the Scrapy project in the working directory"""
+    from scrapy.utils.project import data_path, get_project_settings
+
+    return data_path(get_project_settings().get('ARTICLE_STORE_PATH') or 'articles.sqlite3')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the scraped articles to the frontend")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--store', help="article store (default: the project's ARTICLE_STORE_PATH)")
+    parser.add_argument('--cache-seconds', type=int, default=60, help='Cache-Control max-age')
+    parser.add_argument('--cors-origin', default='*', help="Access-Control-Allow-Origin ('' for none)")
+    args = parser.parse_args(argv)
+    if web is None:
+        parser.error("the read API needs aiohttp (pip install aiohttp)")
+
+    api = ReadApi(ArticleReader(args.store or default_store_path()),
+                  cache_seconds=args.cache_seconds, cors_origin=args.cors_origin)
+    web.run_app(api.application(), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
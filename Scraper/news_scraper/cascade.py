@@ -0,0 +1,149 @@
+# Selector fallback chains that learn which candidate works for a source.
+#
+# A SelectorCascade is the ordered list of candidates the spiders used to
+# try one after another for a field ("h1.sp-ttl::text" or "h1::text" or ...).
+# CascadeEngine resolves them page by page and counts which candidate
+# produced the value. Once a later candidate has won often enough for a
+# source it is tried first; if it fails on a page, the whole cascade is run
+# in its original order, so a page never gets less than the full chain.
+# Candidates are usually Query objects, selectors compiled once.
+
+from collections import defaultdict
+
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+
+_css_translator = HTMLTranslator()
+
+
+class Query:
+    """A CSS query (or an XPath one, prefixed with ``xpath:``) compiled once
+
+    CSS is translated with the same translator ``response.css()`` uses and
+    the XPath is compiled by lxml up front, so evaluating it on a page is
+    only the tree walk. Results are strings, as ``.getall()`` would return.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        if query.startswith('xpath:'):
+            xpath = query[len('xpath:'):]
+        else:
+            xpath = _css_translator.css_to_xpath(query)
+        self.xpath = etree.XPath(xpath, smart_strings=False)
+
+    def __str__(self):
+        return self.query
+
+    def __repr__(self):
+        return f'Query({self.query!r})'
+
+    def getall(self, response):
+        result = self.xpath(response.selector.root)
+        if not isinstance(result, list):
+            # string(), normalize-space(), count() ...
+            return [result if isinstance(result, str) else str(result)]
+        return [
+            value if isinstance(value, str)
+            else etree.tostring(value, method='html', encoding='unicode', with_tail=False)
+            for value in result
+        ]
+
+    def get(self, response):
+        values = self.getall(response)
+        return values[0] if values else None
+
+
+def first_match(response, query):
+    """First CSS match, the ``response.css(query).get()`` of the old chains"""
+    return response.css(query).get()
+
+
+class SelectorCascade:
+    """Ordered candidates for one field
+
+    ``extract(response, candidate)`` returns the field value, or something
+    falsy when the candidate does not apply to the page.
+    """
+
+    def __init__(self, field, candidates, extract=first_match):
+        self.field = field
+        self.candidates = tuple(candidates)
+        self.extract = extract
+
+
+class CascadeEngine:
+    """Resolve cascades for one source and keep per-field hit counts"""
+
+    def __init__(self, source, min_hits=3):
+        self.source = source
+        # Wins a candidate needs (and more than the first one has) to be promoted
+        self.min_hits = min_hits
+        # field -> hits per candidate index
+        self.hits = {}
+        self.misses = defaultdict(int)
+        self.pages = defaultdict(int)
+        self.evaluations = 0
+        self.shortcuts = 0
+
+    def resolve(self, response, cascade, default=""):
+        hits = self.hits.get(cascade.field)
+        if hits is None:
+            hits = self.hits[cascade.field] = [0] * len(cascade.candidates)
+        self.pages[cascade.field] += 1
+
+        winner = self._winner(hits)
+        if winner is not None:
+            self.evaluations += 1
+            value = cascade.extract(response, cascade.candidates[winner])
+            if value:
+                hits[winner] += 1
+                self.shortcuts += 1
+                return value
+
+        for index, candidate in enumerate(cascade.candidates):
+            if index == winner:
+                continue
+            self.evaluations += 1
+            value = cascade.extract(response, candidate)
+            if value:
+                hits[index] += 1
+                return value
+
+        self.misses[cascade.field] += 1
+        return default
+
+    def _winner(self, hits):
+        best = max(range(len(hits)), key=hits.__getitem__)
+        if best and hits[best] >= self.min_hits and hits[best] > hits[0]:
+            return best
+        return None
+
+    def hit_rates(self, cascades):
+        """(field, candidate, hits, share of pages) for every candidate"""
+        rows = []
+        for cascade in cascades:
+            hits = self.hits.get(cascade.field)
+            pages = self.pages[cascade.field]
+            if hits is None or not pages:
+                continue
+            for candidate, count in zip(cascade.candidates, hits):
+                rows.append((cascade.field, candidate, count, count / pages))
+        return rows
+
+    def update_stats(self, stats, cascades):
+        """Write the hit counts into the crawl stats under selectors/<source>/"""
+        prefix = f'selectors/{self.source}'
+        for field, candidate, count, _ in self.hit_rates(cascades):
+            stats.set_value(f'{prefix}/{field}/{candidate}', count)
+        for field, count in self.misses.items():
+            stats.set_value(f'{prefix}/{field}/(none)', count)
+        stats.set_value(f'{prefix}/evaluations', self.evaluations)
+        stats.set_value(f'{prefix}/shortcuts', self.shortcuts)
+
+    def dead_candidates(self, cascades, min_pages=20):
+        """Candidates that never produced a value on a field resolved on at
+        least ``min_pages`` pages"""
+        return [(field, candidate) for field, candidate, count, _ in self.hit_rates(cascades)
+                if count == 0 and self.pages[field] >= min_pages]
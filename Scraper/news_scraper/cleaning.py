@@ -0,0 +1,227 @@
+# Text cleaning engine shared by the item pipelines.
+#
+# Every pattern is compiled once per TextCleaner and the substitutions are
+# guarded by cheap substring checks, so an article is only rescanned by the
+# rules that can actually change it. The output is identical to running the
+# original per-call ``re.sub`` chains.
+
+import re
+from urllib.parse import urlparse
+
+from w3lib.html import remove_tags
+
+
+# Source names appended to headlines, e.g. "Some story - NDTV"
+HEADLINE_SOURCE_PATTERNS = {
+    'NDTV': [r'\s*[-|]\s*NDTV\s*$', r'\s*[-|]\s*NDTV\.com\s*$'],
+    'Telegraph India': [r'\s*[-|]\s*Telegraph India\s*$', r'\s*[-|]\s*The Telegraph\s*$'],
+    'Indian Express': [r'\s*[-|]\s*The Indian Express\s*$', r'\s*\|\s*Express\s*$', r'\s*[-|]\s*Indian Express\s*$'],
+    'Times of India': [r'\s*[-|]\s*Times of India\s*$', r'\s*[-|]\s*TOI\s*$', r'\s*[-|]\s*The Times of India\s*$']
+}
+
+# Common footer phrases, everything from the phrase to the end is dropped.
+# Each entry is (head, tail): the rule is ``head + tail + '.*$'``.
+CONTENT_FOOTER_RULES = [
+    ('follow us on', ''),
+    ('for all the latest', '.*news'),
+    ('download the', '.*app'),
+    ('click here to', ''),
+    ('subscribe to our newsletter', ''),
+    ('follow our', '.*channel'),
+    ('for more news', '.*visit'),
+    ('copyright ©', ''),
+    ('share this article', ''),
+    ('tags:', ''),
+    ('also read:', ''),
+    ('read more:', ''),
+    ('get the latest', '.*updates'),
+    ('stay updated', ''),
+]
+
+SUMMARY_TRAILER_PATTERNS = [
+    r'(?i)read (full|more|article).*$',
+    r'(?i)click (here|to).*$',
+    r'(?i)continue reading.*$',
+]
+
+AUTHOR_PREFIX_PATTERNS = [
+    r'(?i)^by\s+',
+    r'(?i)^written by\s+',
+    r'(?i)^reported by\s+',
+    r'(?i)^with inputs from\s+',
+]
+
+AUTHOR_SUFFIX_PATTERNS = [
+    r'(?i)\|\s*staff.*$',
+    r'(?i)\|\s*correspondent.*$',
+]
+
+
+class TextCleaner:
+    """Precompiled cleaning rules for headline, content, summary and author"""
+
+    def __init__(self):
+        self.headline_patterns = {
+            source: [re.compile(p, re.IGNORECASE) for p in patterns]
+            for source, patterns in HEADLINE_SOURCE_PATTERNS.items()
+        }
+
+        self.footer_rules = [
+            (head, re.compile('(?i)' + re.escape(head) + tail + '.*$'))
+            for head, tail in CONTENT_FOOTER_RULES
+        ]
+
+        self.url_re = re.compile(r'https?://\S+')
+        self.email_re = re.compile(r'\S+@\S+\.\S+')
+        self.ellipsis_re = re.compile(r'\.{3,}')
+        self.exclamation_re = re.compile(r'!{2,}')
+        self.question_re = re.compile(r'\?{2,}')
+
+        self.summary_patterns = [re.compile(p) for p in SUMMARY_TRAILER_PATTERNS]
+        self.author_patterns = [re.compile(p) for p in AUTHOR_PREFIX_PATTERNS + AUTHOR_SUFFIX_PATTERNS]
+        self.author_and_re = re.compile(r'\s+and\s+')
+
+    @staticmethod
+    def strip_tags(text):
+        """remove_tags() that skips the regex pass when there is no markup"""
+        if '<' not in text:
+            return text
+        return remove_tags(text)
+
+    @staticmethod
+    def normalize_whitespace(text):
+        """Same result as re.sub(r'\\s+', ' ', text).strip() in a single C pass"""
+        return ' '.join(text.split())
+
+    def _footer_candidates(self, content):
+        """Footer rules whose phrase occurs in the content
+
+        A rule can only match where its phrase occurs, so the others can be
+        skipped. ``str.lower()`` agrees with the regex IGNORECASE matching
+        except for a few letters (dotted/dotless i, long s); if one of those
+        shows up every rule is returned.
+        """
+        if not content.isascii() and ('\u0130' in content or '\u0131' in content or '\u017f' in content):
+            return self.footer_rules
+
+        lowered = content.lower()
+        return [rule for rule in self.footer_rules if rule[0] in lowered]
+
+    def clean_headline(self, headline, source):
+        """Clean headlines by removing source names and standardizing format"""
+        if not headline:
+            return ""
+
+        headline = self.strip_tags(str(headline).strip())
+
+        for pattern in self.headline_patterns.get(source, ()):
+            headline = pattern.sub('', headline)
+
+        headline = self.normalize_whitespace(headline)
+
+        # Fix capitalization if headline is ALL CAPS
+        if headline.isupper() and len(headline) > 10:
+            headline = headline.title()
+
+        # Remove quotes if they wrap the entire headline
+        if headline.startswith('"') and headline.endswith('"'):
+            headline = headline[1:-1]
+        if headline.startswith("'") and headline.endswith("'"):
+            headline = headline[1:-1]
+
+        return headline.strip()
+
+    def clean_content(self, content):
+        """Clean article content"""
+        if not content:
+            return ""
+
+        # After this the text only contains single spaces
+        content = self.normalize_whitespace(self.strip_tags(str(content)))
+
+        # Remove common footer phrases (case insensitive)
+        for _, pattern in self._footer_candidates(content):
+            content = pattern.sub('', content)
+
+        # URL and email removal are the only rules that can leave runs of
+        # spaces behind, everything else only needs the final strip()
+        respace = False
+        if '://' in content:
+            content, count = self.url_re.subn('', content)
+            respace = count > 0
+
+        # An email match never spans a space and always covers the whole
+        # word it starts in, so only words containing '@' need checking
+        if '@' in content:
+            words = content.split(' ')
+            for i, word in enumerate(words):
+                if '@' in word and self.email_re.search(word):
+                    words[i] = ''
+                    respace = True
+            content = ' '.join(words)
+
+        # Remove excessive punctuation
+        if '...' in content:
+            content = self.ellipsis_re.sub('...', content)
+        if '!!' in content:
+            content = self.exclamation_re.sub('!', content)
+        if '??' in content:
+            content = self.question_re.sub('?', content)
+
+        if respace:
+            return self.normalize_whitespace(content)
+        return content.strip()
+
+    def clean_summary(self, summary):
+        """Clean article summary"""
+        if not summary:
+            return ""
+
+        summary = self.normalize_whitespace(self.strip_tags(str(summary).strip()))
+
+        for pattern in self.summary_patterns:
+            summary = pattern.sub('', summary)
+
+        return summary.strip()
+
+    def clean_author(self, author):
+        """Clean author field"""
+        if not author:
+            return ""
+
+        author = self.strip_tags(str(author).strip())
+
+        for pattern in self.author_patterns:
+            author = pattern.sub('', author)
+
+        # Clean up multiple authors separated by commas or 'and'
+        author = self.author_and_re.sub(', ', author)
+
+        return author.strip()
+
+    def clean_keywords(self, keywords):
+        """Clean keywords field"""
+        if not keywords:
+            return ""
+
+        keywords = self.strip_tags(str(keywords).strip())
+
+        return self.normalize_whitespace(keywords)
+
+    def clean_image_url(self, image_url):
+        """Clean and validate image URL"""
+        if not image_url:
+            return ""
+
+        # Remove surrounding whitespace and quotes
+        image_url = str(image_url).strip().strip('\'"')
+
+        try:
+            parsed = urlparse(image_url)
+            if not parsed.scheme:
+                # If no scheme, assume https
+                image_url = 'https:' + image_url if image_url.startswith('//') else 'https://' + image_url
+        except ValueError:
+            return ""
+
+        return image_url
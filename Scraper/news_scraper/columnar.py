@@ -0,0 +1,182 @@
+# Columnar (Parquet / Arrow IPC) export of NewsArticle items for the ML stages.
+#
+# Items are buffered and written in batches into a hive-partitioned dataset:
+#
+#     <dir>/source=<source>/published=<YYYY-MM-DD>/part-<stamp>-<n>.parquet
+#
+# so readers can select partitions and columns without parsing text:
+#
+#     from news_scraper.columnar import read_articles
+#     df = read_articles('columnar', columns=['headline', 'content'],
+#                        filters=[('source', '=', 'NDTV')])
+#
+# pyarrow is an optional dependency; without it the writer cannot be built.
+
+import os
+import re
+from datetime import date, datetime
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+FORMAT_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def article_schema():
+    """Typed schema of the exported NewsArticle fields"""
+    return pa.schema([
+        ('url', pa.string()),
+        ('headline', pa.string()),
+        ('content', pa.string()),
+        ('summary', pa.string()),
+        ('author', pa.string()),
+        ('date_published', pa.string()),
+        ('date_machine', pa.string()),
+        ('image_url', pa.string()),
+        ('keywords', pa.string()),
+        ('tags', pa.list_(pa.string())),
+        ('category', pa.string()),
+        ('subcategory', pa.string()),
+        ('scraped_at', pa.timestamp('us')),
+        ('word_count', pa.int32()),
+        ('read_time', pa.int32()),
+    ])
+
+
+def publication_date(fields):
+    """Partition date: date_machine when it is an ISO date, else the scrape date"""
+    for field in ('date_machine', 'scraped_at'):
+        match = ISO_DATE_RE.match(str(fields.get(field) or ''))
+        if match:
+            try:
+                return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+            except ValueError:
+                continue
+    return None
+
+
+def _timestamp(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    try:
+        return datetime.fromisoformat(str(value)).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ColumnarBatchWriter:
+    """Buffer article rows and write them as partitioned Parquet/Arrow files"""
+
+    def __init__(self, directory, file_format='parquet', batch_size=1000, compression='zstd'):
+        if pa is None:
+            raise RuntimeError("Columnar export needs pyarrow")
+        if file_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unknown columnar format: {file_format!r}")
+        self.directory = directory
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.compression = compression
+        self.schema = article_schema()
+        self.converters = {
+            'scraped_at': _timestamp,
+            'word_count': _int,
+            'read_time': _int,
+            'tags': lambda tags: [str(tag) for tag in tags] if tags else [],
+        }
+        self.stamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+        self.sequence = 0
+        # (source, publication date) -> column name -> values
+        self.partitions = {}
+        self.buffered = 0
+        self.files_written = 0
+        self.rows_written = 0
+
+    def add(self, fields):
+        key = (str(fields.get('source') or ''), publication_date(fields))
+        columns = self.partitions.get(key)
+        if columns is None:
+            columns = self.partitions[key] = {name: [] for name in self.schema.names}
+
+        for name in self.schema.names:
+            value = fields.get(name)
+            convert = self.converters.get(name)
+            if convert is not None:
+                value = convert(value)
+            elif value is not None:
+                value = str(value)
+            columns[name].append(value)
+
+        self.buffered += 1
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for (source, published), columns in self.partitions.items():
+            table = pa.Table.from_pydict(columns, schema=self.schema)
+            self._write(table, source, published)
+        self.partitions.clear()
+        self.buffered = 0
+
+    def _write(self, table, source, published):
+        directory = os.path.join(
+            self.directory,
+            f"source={quote(source, safe='')}",
+            f"published={published.isoformat() if published else '__HIVE_DEFAULT_PARTITION__'}",
+        )
+        os.makedirs(directory, exist_ok=True)
+        self.sequence += 1
+        name = f"part-{self.stamp}-{os.getpid()}-{self.sequence:05d}{FORMAT_EXTENSIONS[self.file_format]}"
+        # Dataset discovery skips dot files, so readers never see a partial file
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+
+        if self.file_format == 'parquet':
+            pq.write_table(table, tmp_path, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                    writer.write_table(table)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+        self.files_written += 1
+        self.rows_written += table.num_rows
+
+    def close(self):
+        self.flush()
+
+
+def read_articles(directory, columns=None, filters=None, file_format='parquet'):
+    """Load the exported articles as a pandas DataFrame
+
+    Only the requested ``columns`` are read, ``filters`` on source/published
+    prune whole partitions, and Arrow IPC files are memory-mapped.
+    """
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    dataset = ds.dataset(
+        directory,
+        format='ipc' if file_format == 'arrow' else 'parquet',
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+        partitioning=ds.partitioning(
+            pa.schema([('source', pa.string()), ('published', pa.date32())]), flavor='hive'),
+    )
+    expression = pq.filters_to_expression(filters) if filters else None
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
@@ -0,0 +1,79 @@
+# HTTP validators (ETag / Last-Modified) of previously downloaded pages.
+#
+# Stored per URL in SQLite so the next crawl can send conditional requests
+# and let unchanged pages come back as a bodiless 304.
+
+import logging
+import time
+
+from news_scraper import sqlite
+from news_scraper.dedup import url_key
+
+
+class ValidatorStore:
+    """ETag, Last-Modified and body size of the last 200 response per URL"""
+
+    def __init__(self, path=':memory:', batch_size=200):
+        self.path = path
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+        self.conn = None
+        # Validators stored since the last flush, checked before the database
+        self.pending = {}
+
+    def open(self):
+        if self.conn is not None:
+            return
+        self.conn = sqlite.connect(self.path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS validators ('
+            ' key BLOB PRIMARY KEY,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' length INTEGER NOT NULL,'
+            ' stored_at REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        self.logger.debug(f"Opened validator store {self.path}")
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    def __len__(self):
+        count = self.conn.execute('SELECT COUNT(*) FROM validators').fetchone()[0]
+        return count + len(self.pending)
+
+    def get(self, url):
+        """(etag, last_modified, length) for ``url``, or None"""
+        key = url_key(url)
+        validators = self.pending.get(key)
+        if validators is not None:
+            return validators
+        return self.conn.execute(
+            'SELECT etag, last_modified, length FROM validators WHERE key = ?', (key,)
+        ).fetchone()
+
+    def put(self, url, etag, last_modified, length):
+        self.pending[url_key(url)] = (etag, last_modified, length)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all pending validators in a single transaction"""
+        if not self.pending:
+            return
+        now = time.time()
+        rows = [(key, etag, last_modified, length, now)
+                for key, (etag, last_modified, length) in self.pending.items()]
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO validators (key, etag, last_modified, length, stored_at)'
+                ' VALUES (?, ?, ?, ?, ?)',
+                rows,
+            )
+        self.pending.clear()
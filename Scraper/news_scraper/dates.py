@@ -0,0 +1,272 @@
+# Date normalization for the enrichment stage.
+#
+# Produces exactly what the original strptime loop produced, but:
+#   - ISO 8601 values (article:published_time, <time datetime>) are recognised
+#     with one precompiled regex and returned as they are;
+#   - every format has a cheap "gate" regex that accepts a superset of what
+#     strptime accepts, so formats that cannot match are skipped without
+#     raising and catching ValueError;
+#   - purely numeric formats are parsed from the regex groups with range
+#     checks instead of strptime;
+#   - the format that worked last for a source is tried first;
+#   - results are cached in a bounded LRU keyed by the raw string.
+#
+# published_at() turns the normalized date of a stored article into a UTC
+# timestamp for sorting, including dates the normalizer leaves as the page
+# shows them ('Updated: Sep 27, 2025, 22:20 IST').
+
+import calendar
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+
+ISO_PREFIX_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}')
+
+# Tried in this order, the first format that parses wins
+DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%d %b %Y, %H:%M',
+    '%B %d, %Y %H:%M',
+    '%d %B %Y, %H:%M:%S',
+    '%d %b %Y %H:%M:%S',
+    '%A %B %d %Y',
+    '%a, %b %d, %Y',
+    '%Y/%m/%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+    '%Y-%m-%d',
+    '%d-%m-%Y',
+    '%d %b %Y',
+    '%B %d, %Y',
+)
+
+# Date fragments searched for when no format matches the whole string, each
+# with the formats tried on the extracted fragment
+DATE_FRAGMENTS = (
+    r'(\d{4}-\d{2}-\d{2})',  # YYYY-MM-DD
+    r'(\d{2}/\d{2}/\d{4})',  # MM/DD/YYYY or DD/MM/YYYY
+    r'(\d{1,2}\s+\w+\s+\d{4})',  # D Month YYYY
+)
+FRAGMENT_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d %B %Y', '%d %b %Y')
+
+# ASCII digits only: strptime rejects other digits in most directives (it
+# takes them in %Y), so values with them are left to strptime
+NUMERIC_DIRECTIVES = {'Y': r'([0-9]{4})', 'm': r'([0-9]{1,2})', 'd': r'([0-9]{1,2})',
+                      'H': r'([0-9]{1,2})', 'M': r'([0-9]{1,2})', 'S': r'([0-9]{1,2})'}
+
+# Superset of the strptime regex for each directive, \d included
+GATE_DIRECTIVES = {'Y': r'\d{4}', 'm': r'\d{1,2}', 'd': r' ?\d{1,2}',
+                   'H': r'\d{1,2}', 'M': r'\d{1,2}', 'S': r'\d{1,2}',
+                   'b': r'[^\W\d_]+', 'B': r'[^\W\d_]+', 'a': r'[^\W\d_]+', 'A': r'[^\W\d_]+'}
+
+DIRECTIVE_RE = re.compile(r'%(.)|(\s+)|([^%\s]+)')
+
+# The sources are Indian: page dates without a UTC offset are in IST
+SOURCE_TIMEZONE = timezone(timedelta(hours=5, minutes=30))
+
+# Dates as the pages show them, after DISPLAY_LABEL_RE and DISPLAY_ZONE_RE
+DISPLAY_FORMATS = (
+    '%b %d, %Y, %H:%M',   # Sep 27, 2025, 22:20 (Times of India)
+    '%B %d, %Y %H:%M',    # September 27, 2025 22:20 (Indian Express)
+    '%b %d, %Y %H:%M',
+    '%d.%m.%y, %I:%M %p',  # 24.09.25, 10:16 PM (Telegraph)
+    '%b %d, %Y %I:%M %p',
+    '%b %d, %Y',
+    '%B %d, %Y',
+) + DATE_FORMATS
+DISPLAY_LABEL_RE = re.compile(r'^(?:last\s+)?(?:updated|published|posted)(?:\s+on)?\s*:?\s*', re.IGNORECASE)
+DISPLAY_ZONE_RE = re.compile(r'\s*\b(IST|UTC|GMT)$', re.IGNORECASE)
+
+
+class DateFormat:
+    """A strptime format with an exception-free pre-check"""
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        gate, strict, fields = [], [], []
+        numeric = True
+        for directive, space, literal in DIRECTIVE_RE.findall(fmt):
+            if directive:
+                gate.append(GATE_DIRECTIVES[directive])
+                if directive in NUMERIC_DIRECTIVES:
+                    strict.append(NUMERIC_DIRECTIVES[directive])
+                    fields.append(directive)
+                else:
+                    numeric = False
+            elif space:
+                # strptime lets a space in the format match any whitespace run
+                gate.append(r'\s+')
+                strict.append(' ')
+            else:
+                gate.append(re.escape(literal))
+                strict.append(re.escape(literal))
+
+        self.gate = re.compile(''.join(gate), re.IGNORECASE)
+        # Formats made only of numbers and separators are parsed straight
+        # from the regex groups
+        self.strict = re.compile(''.join(strict)) if numeric else None
+        self.fields = fields
+
+    def _from_groups(self, match):
+        values = {'Y': 1900, 'm': 1, 'd': 1, 'H': 0, 'M': 0, 'S': 0}
+        for field, text in zip(self.fields, match.groups()):
+            values[field] = int(text)
+        year, month, day = values['Y'], values['m'], values['d']
+        if not (1 <= year and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+                and values['H'] <= 23 and values['M'] <= 59 and values['S'] <= 59):
+            return None
+        return datetime(year, month, day, values['H'], values['M'], values['S'])
+
+    def parse(self, value):
+        """Return the datetime strptime would return, or None"""
+        if self.gate.fullmatch(value) is None:
+            return None
+        if self.strict is not None:
+            match = self.strict.fullmatch(value)
+            if match is not None:
+                # Every valid value is accepted by strptime and every invalid
+                # one rejected, so no need to ask it
+                return self._from_groups(match)
+        try:
+            return datetime.strptime(value, self.fmt)
+        except ValueError:
+            return None
+
+    def could_match(self, value):
+        return self.gate.fullmatch(value) is not None
+
+
+class DateNormalizer:
+    """Convert scraped date strings to ISO format, learning per-source formats"""
+
+    def __init__(self, cache_size=4096):
+        self.formats = [DateFormat(fmt) for fmt in DATE_FORMATS]
+        self.fragments = [re.compile(pattern) for pattern in DATE_FRAGMENTS]
+        self.fragment_formats = [DateFormat(fmt) for fmt in FRAGMENT_FORMATS]
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        # source -> index into self.formats of the last format that worked
+        self.learned = {}
+        self.counters = {
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'iso_fast_path': 0,
+            'learned_hits': 0,
+            'format_scans': 0,
+            'fragment_matches': 0,
+            'unparsed': 0,
+        }
+
+    def stats(self):
+        return dict(self.counters, cache_size=len(self.cache), learned_sources=len(self.learned))
+
+    def normalize(self, date_str, source=''):
+        if not date_str:
+            return ""
+
+        date_str = str(date_str).strip()
+
+        cached = self.cache.get(date_str)
+        if cached is not None:
+            self.cache.move_to_end(date_str)
+            self.counters['cache_hits'] += 1
+            return cached
+        self.counters['cache_misses'] += 1
+
+        result = self._normalize(date_str, source)
+
+        self.cache[date_str] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def _normalize(self, date_str, source):
+        # Already in ISO format
+        if ISO_PREFIX_RE.match(date_str):
+            self.counters['iso_fast_path'] += 1
+            return date_str
+
+        dt = self._parse_learned(date_str, source)
+        if dt is not None:
+            self.counters['learned_hits'] += 1
+            return dt.isoformat()
+
+        self.counters['format_scans'] += 1
+        for index, date_format in enumerate(self.formats):
+            dt = date_format.parse(date_str)
+            if dt is not None:
+                self.learned[source] = index
+                return dt.isoformat()
+
+        # Try to extract a date when no format matches the whole string
+        for fragment in self.fragments:
+            match = fragment.search(date_str)
+            if match:
+                date_part = match.group(1)
+                for date_format in self.fragment_formats:
+                    dt = date_format.parse(date_part)
+                    if dt is not None:
+                        self.counters['fragment_matches'] += 1
+                        return dt.isoformat()
+
+        # Return original if no format matches
+        self.counters['unparsed'] += 1
+        return date_str
+
+    def _parse_learned(self, date_str, source):
+        index = self.learned.get(source)
+        if index is None:
+            return None
+        dt = self.formats[index].parse(date_str)
+        if dt is None:
+            return None
+        # An earlier format that also fits would have won the ordered scan
+        for date_format in self.formats[:index]:
+            if date_format.could_match(date_str):
+                return None
+        return dt
+
+
+def _parse_timestamp(value):
+    """Aware datetime of an ISO 8601 or displayed page date, None when it is neither"""
+    value = value.strip()
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        dt = None
+    if dt is None:
+        value = DISPLAY_LABEL_RE.sub('', value)
+        zone = DISPLAY_ZONE_RE.search(value)
+        if zone:
+            value = value[:zone.start()]
+        for fmt in DISPLAY_FORMATS:
+            try:
+                dt = datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            if zone and zone.group(1).upper() != 'IST':
+                dt = dt.replace(tzinfo=timezone.utc)
+            break
+        else:
+            return None
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=SOURCE_TIMEZONE)
+
+
+def published_at(date_machine, scraped_at=None):
+    """UTC timestamp ('2025-09-27T16:50:00Z', in order as text) of an article's
+    date, else of when it was scraped; None when neither can be read"""
+    if date_machine:
+        dt = _parse_timestamp(str(date_machine))
+        if dt is not None:
+            return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    if scraped_at:
+        try:
+            # datetime.now().isoformat(): local time of the scraping machine
+            dt = datetime.fromisoformat(str(scraped_at)).astimezone(timezone.utc)
+        except ValueError:
+            return None
+        return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    return None
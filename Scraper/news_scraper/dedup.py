@@ -0,0 +1,120 @@
+# Persistent deduplication store shared by all spiders.
+#
+# Keys are kept in a single SQLite table (WAL mode, so several spider
+# processes can use the same file). Nothing is loaded at spider open: lookups
+# go straight to the primary key index and new keys are buffered and written
+# with executemany() in one transaction per batch.
+
+import hashlib
+import logging
+import time
+
+from news_scraper import sqlite
+from news_scraper.links import canonicalize_article_url
+
+
+KIND_URL = 1
+KIND_CONTENT = 2
+
+# SQLite's default limit on host parameters in a single statement
+MAX_QUERY_PARAMS = 999
+
+
+def canonical_url(url):
+    """Form of an article URL that its dedup key is computed from"""
+    return canonicalize_article_url(url)
+
+
+def url_key(url):
+    """Compact fixed-size key for a URL"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+
+
+class DedupStore:
+    """Set of already seen article keys, persisted across crawl runs"""
+
+    def __init__(self, path=':memory:', batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+        self.conn = None
+        # Keys added since the last flush, checked before the database
+        self.pending = {}
+
+    def open(self):
+        if self.conn is not None:
+            return
+        self.conn = sqlite.connect(self.path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS seen ('
+            ' kind INTEGER NOT NULL,'
+            ' key BLOB NOT NULL,'
+            ' spider TEXT,'
+            ' seen_at REAL NOT NULL,'
+            ' PRIMARY KEY (kind, key)'
+            ') WITHOUT ROWID'
+        )
+        self.logger.debug(f"Opened dedup store {self.path}")
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    def __len__(self):
+        count = self.conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+        return count + len(self.pending)
+
+    def contains(self, kind, key):
+        """Check a single key"""
+        if (kind, key) in self.pending:
+            return True
+        row = self.conn.execute(
+            'SELECT 1 FROM seen WHERE kind = ? AND key = ?', (kind, key)
+        ).fetchone()
+        return row is not None
+
+    def contains_many(self, kind, keys):
+        """Return the subset of ``keys`` that is already known"""
+        keys = list(keys)
+        found = {key for key in keys if (kind, key) in self.pending}
+        remaining = [key for key in keys if key not in found]
+
+        for start in range(0, len(remaining), MAX_QUERY_PARAMS - 1):
+            chunk = remaining[start:start + MAX_QUERY_PARAMS - 1]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f'SELECT key FROM seen WHERE kind = ? AND key IN ({placeholders})',
+                (kind, *chunk),
+            )
+            found.update(row[0] for row in rows)
+
+        return found
+
+    def add(self, kind, key, spider=None):
+        """Record a key, written to disk with the next batch"""
+        self.pending[(kind, key)] = spider
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, kind, keys, spider=None):
+        for key in keys:
+            self.pending[(kind, key)] = spider
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all pending keys in a single transaction"""
+        if not self.pending:
+            return
+        now = time.time()
+        rows = [(kind, key, spider, now) for (kind, key), spider in self.pending.items()]
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO seen (kind, key, spider, seen_at) VALUES (?, ?, ?, ?)',
+                rows,
+            )
+        self.pending.clear()
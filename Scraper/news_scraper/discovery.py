@@ -0,0 +1,226 @@
+# Article discovery from news sitemaps and RSS/Atom feeds.
+#
+# Walking HTML listing pages costs a full page download per 10-20 links, and
+# NDTV and the Telegraph keep requesting numbered pages up to their limit.
+# A news sitemap or a feed lists the latest articles with their publication
+# or modification time in one small XML document, so discovery can skip
+# everything older than the last finished crawl of the spider without
+# downloading it, and sitemap indexes let it skip whole child sitemaps the
+# same way.
+#
+# A source opts in with a 'discovery' entry in its extraction config:
+#
+#     'discovery': {
+#         'sitemaps': ['https://www.example.com/robots.txt'],  # or sitemap URLs
+#         'follow': r'news',       # child sitemaps (and robots.txt entries) read
+#         'feeds': ['https://www.example.com/rss/kolkata.xml'],
+#         'allow': r'/kolkata/',   # article URLs kept
+#     },
+#
+# and DISCOVERY_MODE (or -a discovery=feeds|listing) selects it. See
+# SourceSpider.start() for the fallback to listing pages.
+
+import re
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from lxml import etree
+from scrapy.utils.gz import gunzip
+from scrapy.utils.sitemap import sitemap_urls_from_robots
+
+from news_scraper import sqlite
+from news_scraper.links import canonicalize_article_url
+
+
+# Largest sitemap accepted after decompression, as for Scrapy's SitemapSpider
+MAX_SITEMAP_SIZE = 50 * 1024 * 1024
+
+# Entry element -> its link and date elements, in order of preference
+ENTRY_TAGS = {
+    'sitemap': (('loc',), ('lastmod',)),
+    'url': (('loc',), ('publication_date', 'lastmod')),
+    'item': (('link', 'guid'), ('pubDate', 'date', 'updated')),
+    'entry': (('link', 'id'), ('updated', 'published')),
+}
+
+# Document root -> kind of document
+DOCUMENT_KINDS = {
+    'sitemapindex': 'sitemapindex',
+    'urlset': 'urlset',
+    'rss': 'feed',
+    'RDF': 'feed',
+    'feed': 'feed',
+}
+
+
+def parse_timestamp(value):
+    """POSIX timestamp of a sitemap (W3C/ISO 8601) or feed (RFC 822) date,
+    or None; dates without a time zone are taken as UTC"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+def _local_name(tag):
+    return tag.rpartition('}')[2] if isinstance(tag, str) else ''
+
+
+def _entry(element, link_tags, date_tags):
+    """(link, date) texts of a sitemap entry, feed item or Atom entry"""
+    values = {}
+    for child in element.iter():
+        name = _local_name(child.tag)
+        if name in values:
+            continue
+        if name == 'link' and child.get('href'):
+            # Atom: the alternate (or only) link
+            if child.get('rel', 'alternate') == 'alternate':
+                values[name] = child.get('href')
+        elif child.text and child.text.strip():
+            values[name] = child.text.strip()
+    link = next((values[tag] for tag in link_tags if tag in values), None)
+    date = next((values[tag] for tag in date_tags if tag in values), None)
+    return link, date
+
+
+def read_document(body):
+    """(kind, [(url, timestamp or None)]) of a sitemap index, urlset or
+    RSS/Atom feed; kind is None when the body is none of them"""
+    if body[:2] == b'\x1f\x8b':
+        try:
+            body = gunzip(body, max_size=MAX_SITEMAP_SIZE)
+        except (OSError, EOFError, ValueError):
+            return None, []
+    parser = etree.XMLParser(recover=True, remove_comments=True, resolve_entities=False)
+    try:
+        root = etree.fromstring(body.strip(), parser=parser)
+    except etree.XMLSyntaxError:
+        return None, []
+    if root is None:
+        return None, []
+    kind = DOCUMENT_KINDS.get(_local_name(root.tag))
+    if kind is None:
+        return None, []
+
+    entries = []
+    for element in root.iter():
+        tags = ENTRY_TAGS.get(_local_name(element.tag))
+        if tags is None:
+            continue
+        link, date = _entry(element, *tags)
+        if link:
+            entries.append((link, parse_timestamp(date)))
+    return kind, entries
+
+
+class SourceDiscovery:
+    """The 'discovery' part of a source config, compiled"""
+
+    def __init__(self, config):
+        self.sitemaps = list(config.get('sitemaps', ()))
+        self.feeds = list(config.get('feeds', ()))
+        self.follow = re.compile(config['follow']) if config.get('follow') else None
+        self.allow = re.compile(config['allow']) if config.get('allow') else None
+
+    @property
+    def urls(self):
+        """Sitemap, robots.txt and feed URLs read first"""
+        return self.sitemaps + self.feeds
+
+    def sitemaps_from_robots(self, response):
+        return [url for url in sitemap_urls_from_robots(response.body, base_url=response.url)
+                if self.follow is None or self.follow.search(url)]
+
+    def read(self, response, since=None):
+        """(kind, child sitemap URLs, article URLs, entries too old) of a
+        downloaded sitemap or feed; entries dated before ``since`` are
+        skipped"""
+        kind, entries = read_document(response.body)
+        sitemaps = []
+        articles = []
+        stale = 0
+        for url, timestamp in entries:
+            if since is not None and timestamp is not None and timestamp < since:
+                stale += 1
+                continue
+            url = response.urljoin(url)
+            if kind == 'sitemapindex':
+                if self.follow is None or self.follow.search(url):
+                    sitemaps.append(url)
+                continue
+            url = canonicalize_article_url(url)
+            if self.allow is None or self.allow.search(url):
+                articles.append(url)
+        return kind, sitemaps, articles, stale
+
+
+class CrawlLog:
+    """Start time of the last finished discovery crawl per spider
+
+    A crawl that stops early and is resumed (the frontier, news_scraper.frontier)
+    does not read the feeds again, so the crawl that finishes it counts as
+    started when the first unfinished one did.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.conn = None
+
+    def open(self):
+        if self.conn is not None:
+            return
+        self.conn = sqlite.connect(self.path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS crawls ('
+            ' spider TEXT PRIMARY KEY,'
+            ' started_at REAL NOT NULL,'
+            ' finished_at REAL NOT NULL'
+            ')'
+        )
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS unfinished ('
+            ' spider TEXT PRIMARY KEY,'
+            ' started_at REAL NOT NULL'
+            ')'
+        )
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.conn.close()
+        self.conn = None
+
+    def last_started(self, spider):
+        row = self.conn.execute(
+            'SELECT started_at FROM crawls WHERE spider = ?', (spider,)).fetchone()
+        return row[0] if row else None
+
+    def started(self, spider, started_at):
+        """Start time of the crawl: ``started_at``, or that of an earlier
+        crawl that did not finish"""
+        self.conn.execute(
+            'INSERT OR IGNORE INTO unfinished (spider, started_at) VALUES (?, ?)',
+            (spider, started_at),
+        )
+        return self.conn.execute(
+            'SELECT started_at FROM unfinished WHERE spider = ?', (spider,)).fetchone()[0]
+
+    def finished(self, spider, started_at):
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.execute(
+                'INSERT OR REPLACE INTO crawls (spider, started_at, finished_at) VALUES (?, ?, ?)',
+                (spider, started_at, time.time()),
+            )
+            self.conn.execute('DELETE FROM unfinished WHERE spider = ?', (spider,))
@@ -0,0 +1,184 @@
+# Streaming article export.
+#
+# Articles are written as newline-delimited JSON into size/time rotated
+# files. A file is written under a hidden ".part" name and only renamed to
+# its final name once it is complete, flushed and fsynced; a line describing
+# it is then appended to manifest.jsonl. Consumers can follow the manifest
+# and read each new file in full without ever seeing a partial one.
+
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from itemadapter import ItemAdapter
+from scrapy.utils.serialize import ScrapyJSONEncoder
+
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+EXTENSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def _zstd_module():
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd
+    except ImportError:
+        pass
+    try:
+        from backports import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def open_compressed(path, compression, level=None):
+    """Binary write handle for ``path`` with optional gzip/zstd compression"""
+    if compression is None:
+        return open(path, 'wb')
+    if compression == 'gzip':
+        return gzip.open(path, 'wb', compresslevel=level or 6)
+    if compression == 'zstd':
+        zstd = _zstd_module()
+        if zstd is None:
+            raise RuntimeError("zstd compression needs Python 3.14, backports.zstd or zstandard")
+        if level is None:
+            return zstd.open(path, 'wb')
+        if hasattr(zstd, 'ZstdFile'):
+            return zstd.open(path, 'wb', level=level)
+        return zstd.open(path, 'wb', cctx=zstd.ZstdCompressor(level=level))
+    raise ValueError(f"Unknown compression: {compression!r}")
+
+
+class RotatingJsonLinesWriter:
+    """Write records as JSON lines into rotated, atomically published files"""
+
+    def __init__(self, directory, prefix, max_bytes=64 * 1024 * 1024, max_seconds=3600,
+                 compression='gzip', compression_level=None, time_field='scraped_at'):
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unknown compression: {compression!r}")
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compression = compression
+        self.compression_level = compression_level
+        self.time_field = time_field
+        self.encoder = ScrapyJSONEncoder(ensure_ascii=False)
+        self.logger = logging.getLogger(__name__)
+
+        self.sequence = 0
+        self.file = None
+        self._reset()
+
+    def _reset(self):
+        self.file = None
+        self.part_path = None
+        self.final_name = None
+        self.records = 0
+        self.bytes_written = 0
+        self.opened_at = None
+        self.first_time = None
+        self.last_time = None
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        while True:
+            self.sequence += 1
+            self.final_name = f"{self.prefix}-{stamp}-{self.sequence:05d}.jsonl{EXTENSIONS[self.compression]}"
+            self.part_path = os.path.join(self.directory, f".{self.final_name}.part")
+            # Never reuse the name of a published or in-progress file
+            if not (os.path.exists(self.part_path)
+                    or os.path.exists(os.path.join(self.directory, self.final_name))):
+                break
+        self.file = open_compressed(self.part_path, self.compression, self.compression_level)
+        self.opened_at = time.monotonic()
+
+    def write(self, item):
+        record = ItemAdapter(item).asdict()
+        line = (self.encoder.encode(record) + '\n').encode('utf-8')
+
+        if self.file is None:
+            self._open()
+        self.file.write(line)
+        self.records += 1
+        self.bytes_written += len(line)
+
+        timestamp = record.get(self.time_field)
+        if timestamp:
+            timestamp = str(timestamp)
+            if self.first_time is None or timestamp < self.first_time:
+                self.first_time = timestamp
+            if self.last_time is None or timestamp > self.last_time:
+                self.last_time = timestamp
+
+        if self.max_bytes and self.bytes_written >= self.max_bytes:
+            self.rotate()
+        else:
+            self.rotate_if_due()
+
+    def rotate_if_due(self):
+        if (self.file is not None and self.max_seconds
+                and time.monotonic() - self.opened_at >= self.max_seconds):
+            self.rotate()
+
+    def rotate(self):
+        """Publish the current file, if it has any records"""
+        if self.file is None:
+            return
+        self.file.close()
+        if not self.records:
+            os.remove(self.part_path)
+            self._reset()
+            return
+
+        final_path = os.path.join(self.directory, self.final_name)
+        with open(self.part_path, 'rb') as f:
+            os.fsync(f.fileno())
+        size = os.path.getsize(self.part_path)
+        os.replace(self.part_path, final_path)
+
+        entry = {
+            'file': self.final_name,
+            'records': self.records,
+            'bytes': size,
+            'uncompressed_bytes': self.bytes_written,
+            'compression': self.compression,
+            'first_' + self.time_field: self.first_time,
+            'last_' + self.time_field: self.last_time,
+            'published_at': datetime.now(timezone.utc).isoformat(),
+        }
+        self._append_manifest(entry)
+        self.logger.info(f"Published {self.final_name} ({self.records} records)")
+        self._reset()
+
+    def _append_manifest(self, entry):
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        # A single short O_APPEND write, so concurrent writers never interleave lines
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(entry) + '\n').encode('utf-8'))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self.rotate()
+
+
+def read_manifest(directory):
+    """Manifest entries of the published files, oldest first"""
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
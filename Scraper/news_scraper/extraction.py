@@ -0,0 +1,161 @@
+# Declarative extraction configs for the news sources.
+#
+# A source config is a plain dict kept next to its spider: the listing page
+# link rules and pagination, one ordered selector list per item field with
+# the filters its text has to pass, and the URL rules that pick the category.
+# SourceExtractor compiles it once, when the spider starts, into Query
+# objects, selector cascades and regular expressions, so a new outlet is a
+# new config rather than new parsing code. See spiders/base.py for the spider
+# that runs it.
+#
+#     'fields': {
+#         'headline': ['h1.title::text', 'h1::text'],
+#         'content': {
+#             'select': ['.story p::text'],
+#             'join': True,            # all matches, stripped and space-joined
+#             'min_length': 30,        # drop shorter text nodes
+#             'skip': ['advertisement'],  # drop text nodes containing these
+#             'min_total': 100,        # a candidate needs more text than this
+#             'fallback': {...},       # another field config tried last
+#         },
+#         'author': {'select': [...], 'replace': [('By ', '')]},
+#     },
+#     'categories': [(r'/business/', 'business', 'kolkata')],
+#     'category': ('kolkata', ''),     # when no rule matches
+#     'sections': [(r'/kolkata/', 2)],  # crawl priority bonus by URL
+#     'discovery': {...},              # sitemaps and feeds, see news_scraper.discovery
+
+import re
+
+from news_scraper.cascade import Query, SelectorCascade
+from news_scraper.discovery import SourceDiscovery
+from news_scraper.links import ArticleLinkExtractor
+from news_scraper.structured import FIELDS
+
+
+class FieldRule:
+    """One item field: its compiled cascade, text filters and clean-up"""
+
+    def __init__(self, field, config):
+        if isinstance(config, (list, tuple)):
+            config = {'select': config}
+        self.field = field
+        self.join = config.get('join', False)
+        self.min_length = config.get('min_length', 0)
+        self.skip = tuple(word.lower() for word in config.get('skip', ()))
+        self.min_total = config.get('min_total', 0)
+        self.replace = tuple(config.get('replace', ()))
+        # Whether JSON-LD / meta tag values are used before the selectors
+        self.structured = config.get('structured', field in FIELDS)
+        self.cascade = SelectorCascade(
+            field, [Query(query) for query in config['select']], extract=self.extract)
+        fallback = config.get('fallback')
+        self.fallback = FieldRule(f'{field} (fallback)', fallback) if fallback else None
+
+    def extract(self, response, query):
+        if not self.join:
+            return query.get(response)
+        texts = []
+        for text in query.getall(response):
+            text = text.strip()
+            if len(text) > self.min_length and not (
+                    self.skip and any(word in text.lower() for word in self.skip)):
+                texts.append(text)
+        value = ' '.join(texts)
+        if len(value) > self.min_total:
+            return value
+        return None
+
+    def clean(self, value):
+        if not value:
+            return ""
+        for old, new in self.replace:
+            value = value.replace(old, new)
+        return value.strip()
+
+
+class Pagination:
+    """Next listing page: a "next" link, and/or the page number in the URL
+    counted up to ``max_pages``
+
+    ``numbered`` is 'always' to request the numbered page as well as the
+    link, 'fallback' to request it only when there is no link. Numbered pages
+    are only requested while the page matches ``continue_if``, or without it
+    while the page had article links.
+    """
+
+    def __init__(self, config):
+        self.next = Query(config['next']) if config.get('next') else None
+        self.numbered = config.get('numbered')
+        self.page_url = config.get('page_url')
+        self.page_number = re.compile(config.get('page_number', r'page=(\d+)'))
+        self.max_pages = config.get('max_pages', 20)
+        self.continue_if = Query(config['continue_if']) if config.get('continue_if') else None
+
+    def next_urls(self, response, has_articles):
+        urls = []
+        next_link = self.next.get(response) if self.next is not None else None
+        if next_link:
+            urls.append(response.urljoin(next_link))
+        if self.numbered == 'always' or (self.numbered == 'fallback' and not next_link):
+            match = self.page_number.search(response.url)
+            page = int(match.group(1)) if match else 1
+            if self.continue_if is not None:
+                has_articles = bool(self.continue_if.getall(response))
+            if page < self.max_pages and has_articles:
+                urls.append(self.page_url.format(page=page + 1))
+        return urls
+
+
+class SourceExtractor:
+    """A source config compiled for one spider"""
+
+    def __init__(self, config):
+        self.source = config['source']
+        self.article_links = ArticleLinkExtractor(config['links'])
+        self.pagination = Pagination(config.get('pagination', {}))
+        self.fields = [FieldRule(field, rule) for field, rule in config['fields'].items()]
+        self.categories = [
+            (re.compile(pattern), category, subcategory)
+            for pattern, category, subcategory in config.get('categories', ())
+        ]
+        self.default_category = tuple(config.get('category', ("", "")))
+        self.sections = [
+            (re.compile(pattern), bonus) for pattern, bonus in config.get('sections', ())
+        ]
+        discovery = config.get('discovery')
+        self.discovery = SourceDiscovery(discovery) if discovery else None
+
+    @property
+    def cascades(self):
+        """Every selector cascade, fallbacks included"""
+        cascades = []
+        for rule in self.fields:
+            cascades.append(rule.cascade)
+            if rule.fallback is not None:
+                cascades.append(rule.fallback.cascade)
+        return cascades
+
+    def category(self, url):
+        """(category, subcategory) of the first rule matching the URL"""
+        url = url.lower()
+        for pattern, category, subcategory in self.categories:
+            if pattern.search(url):
+                return category, subcategory
+        return self.default_category
+
+    def listing_priority(self, page):
+        """Crawl priority of listing page ``page``: below the articles of the
+        page before it"""
+        return 2 * (self.pagination.max_pages - page)
+
+    def priority(self, url, page):
+        """Crawl priority of an article linked from listing page ``page``:
+        fresher pages first, adjusted by the first matching section bonus
+        (one page of freshness is worth 2)"""
+        bonus = 0
+        for pattern, section_bonus in self.sections:
+            if pattern.search(url):
+                bonus = section_bonus
+                break
+        return self.listing_priority(page) + 1 + bonus
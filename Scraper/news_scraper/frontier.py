@@ -0,0 +1,262 @@
+# Resumable crawl frontier: a Scrapy scheduler whose queue survives a crash.
+#
+# Pending requests live in a heap ordered by request priority (the spiders
+# rank article links by listing page depth and section, see
+# SourceExtractor.priority) and are checkpointed to SQLite in one
+# transaction every FRONTIER_CHECKPOINT_INTERVAL seconds or
+# FRONTIER_CHECKPOINT_BATCH changes, together with the fingerprints of every
+# request scheduled so far. A request leaves the store only once it has been
+# downloaded, or dropped on its way to the downloader (robots.txt, offsite:
+# reported by news_scraper.middlewares.FrontierMiddleware), so what was in
+# flight at a crash is scheduled again.
+#
+# When a crawl stops before it finished (crash, deploy, Ctrl-C, CLOSESPIDER_*)
+# the next run of the spider reloads the queue and the fingerprints and
+# continues where it stopped; pages already scheduled are not walked again,
+# start URLs included.
+# A crawl that finishes clears its frontier, so the next run starts afresh.
+
+import heapq
+import logging
+import os
+import pickle
+import time
+from array import array
+from bisect import bisect_left
+
+from scrapy import signals
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.utils.project import data_path
+from scrapy.utils.request import request_from_dict
+
+from news_scraper import sqlite
+
+
+logger = logging.getLogger(__name__)
+
+# Sent for scheduled requests that failed before reaching the downloader
+request_not_downloaded = object()
+
+
+def fingerprint_key(fingerprint):
+    """Signed 64-bit integer from the first 8 bytes of a request fingerprint"""
+    return int.from_bytes(fingerprint[:8], 'big', signed=True)
+
+
+class FingerprintSet:
+    """Set of 64-bit fingerprint keys at about 8 bytes each
+
+    New keys go into a small set; when it fills up it is merged into a sorted
+    array searched by bisection.
+    """
+
+    def __init__(self, sorted_keys=(), buffer_size=4096):
+        self.sorted = array('q', sorted_keys)
+        self.recent = set()
+        self.buffer_size = buffer_size
+
+    def __len__(self):
+        return len(self.sorted) + len(self.recent)
+
+    def __contains__(self, key):
+        if key in self.recent:
+            return True
+        index = bisect_left(self.sorted, key)
+        return index < len(self.sorted) and self.sorted[index] == key
+
+    def add(self, key):
+        if key in self:
+            return
+        self.recent.add(key)
+        if len(self.recent) >= self.buffer_size:
+            self._merge()
+
+    def _merge(self):
+        # array() reads the merged iterator one key at a time, so merging
+        # never holds more than the two arrays
+        self.sorted = array('q', heapq.merge(self.sorted, sorted(self.recent)))
+        self.recent.clear()
+
+
+class FrontierStore:
+    """SQLite checkpoint of the queued requests and scheduled fingerprints"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+
+    def open(self):
+        self.conn = sqlite.connect(self.path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS queue ('
+            ' id INTEGER PRIMARY KEY,'
+            ' priority INTEGER NOT NULL,'
+            ' request BLOB NOT NULL'
+            ')'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS seen (key INTEGER PRIMARY KEY)')
+
+    def close(self):
+        self.conn.close()
+        self.conn = None
+
+    def load(self):
+        """(queued (id, priority, request) rows, fingerprint keys in order)"""
+        rows = self.conn.execute('SELECT id, priority, request FROM queue').fetchall()
+        keys = (key for (key,) in self.conn.execute('SELECT key FROM seen ORDER BY key'))
+        return rows, keys
+
+    def checkpoint(self, added, done, keys):
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO queue (id, priority, request) VALUES (?, ?, ?)', added)
+            self.conn.executemany('DELETE FROM queue WHERE id = ?', [(i,) for i in done])
+            self.conn.executemany('INSERT OR IGNORE INTO seen (key) VALUES (?)', [(k,) for k in keys])
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.execute('DELETE FROM queue')
+            self.conn.execute('DELETE FROM seen')
+
+
+class FrontierScheduler(BaseScheduler):
+    """Priority scheduler and duplicate filter checkpointed to disk
+    (SCHEDULER = "news_scraper.frontier.FrontierScheduler")"""
+
+    def __init__(self, crawler, directory=None, checkpoint_interval=10.0, checkpoint_batch=500):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.directory = directory
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_batch = checkpoint_batch
+        self.store = None
+        # (-priority, id, pickled request dict or Request)
+        self.heap = []
+        self.seen = FingerprintSet()
+        self.next_id = 1
+        # Whether open() found requests left by an earlier run
+        self.resuming = False
+        # Changes since the last checkpoint
+        self.added = []
+        self.done = []
+        self.new_keys = []
+        self.last_checkpoint = time.monotonic()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        s = cls(
+            crawler,
+            directory=settings.get('FRONTIER_DIR'),
+            checkpoint_interval=settings.getfloat('FRONTIER_CHECKPOINT_INTERVAL', 10.0),
+            checkpoint_batch=settings.getint('FRONTIER_CHECKPOINT_BATCH', 500),
+        )
+        crawler.signals.connect(s.request_done, signal=signals.request_left_downloader)
+        crawler.signals.connect(s.request_done, signal=signals.response_received)
+        crawler.signals.connect(s.request_done, signal=request_not_downloaded)
+        return s
+
+    def open(self, spider):
+        self.spider = spider
+        if not self.directory:
+            return None
+        self.store = FrontierStore(os.path.join(data_path(self.directory), f'{spider.name}.sqlite3'))
+        self.store.open()
+        rows, keys = self.store.load()
+        self.seen = FingerprintSet(keys)
+        self.heap = [(-priority, request_id, payload) for request_id, priority, payload in rows]
+        heapq.heapify(self.heap)
+        self.next_id = max((request_id for request_id, _, _ in rows), default=0) + 1
+        self.resuming = bool(self.heap)
+        if self.heap or len(self.seen):
+            logger.info(f"Resuming crawl frontier: {len(self.heap)} queued requests, "
+                        f"{len(self.seen)} already scheduled")
+            self.stats.set_value('frontier/resumed', len(self.heap))
+        return None
+
+    def close(self, reason):
+        if self.store is None:
+            return None
+        if reason == 'finished' and not self.heap:
+            self.store.clear()
+        else:
+            self.checkpoint()
+            logger.info(f"Crawl frontier saved: {len(self.heap)} requests to resume ({reason})")
+        self.store.close()
+        return None
+
+    def __len__(self):
+        return len(self.heap)
+
+    def has_pending_requests(self):
+        return bool(self.heap)
+
+    def enqueue_request(self, request):
+        # Start requests are dont_filter, but their fingerprints are kept so
+        # that resuming a crawl does not walk the start URLs again
+        start = request.meta.get('is_start_request', False)
+        if not request.dont_filter or start:
+            key = fingerprint_key(self.crawler.request_fingerprinter.fingerprint(request))
+            if key in self.seen and (not request.dont_filter or self.resuming):
+                self.stats.inc_value('dupefilter/filtered')
+                logger.debug(f"Filtered duplicate request: {request}")
+                return False
+            self.seen.add(key)
+            if self.store is not None:
+                self.new_keys.append(key)
+
+        request_id = self.next_id
+        self.next_id += 1
+        payload = request
+        if self.store is not None:
+            try:
+                payload = pickle.dumps(request.to_dict(spider=self.spider), protocol=4)
+            except (ValueError, TypeError, AttributeError, pickle.PicklingError):
+                # e.g. a callback that is not a spider method: kept in memory only
+                self.stats.inc_value('frontier/unserializable')
+            else:
+                self.added.append((request_id, request.priority, payload))
+        heapq.heappush(self.heap, (-request.priority, request_id, payload))
+
+        self.stats.inc_value('scheduler/enqueued')
+        self.stats.inc_value('scheduler/enqueued/disk' if payload is not request else 'scheduler/enqueued/memory')
+        self._maybe_checkpoint()
+        return True
+
+    def next_request(self):
+        if not self.heap:
+            return None
+        _, request_id, payload = heapq.heappop(self.heap)
+        if isinstance(payload, bytes):
+            request = request_from_dict(pickle.loads(payload), spider=self.spider)
+            # Deleted from the store once downloaded, see request_done()
+            request.meta['frontier_id'] = request_id
+        else:
+            request = payload
+        self.stats.inc_value('scheduler/dequeued')
+        self._maybe_checkpoint()
+        return request
+
+    def request_done(self, request, **kwargs):
+        request_id = request.meta.pop('frontier_id', None)
+        if request_id is not None:
+            self.done.append(request_id)
+
+    def _maybe_checkpoint(self):
+        if self.store is None:
+            return
+        changes = len(self.added) + len(self.done) + len(self.new_keys)
+        if changes >= self.checkpoint_batch or (
+                changes and time.monotonic() - self.last_checkpoint >= self.checkpoint_interval):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Write the changes since the last checkpoint in one transaction"""
+        self.store.checkpoint(self.added, self.done, self.new_keys)
+        self.added = []
+        self.done = []
+        self.new_keys = []
+        self.last_checkpoint = time.monotonic()
+        self.stats.inc_value('frontier/checkpoints')
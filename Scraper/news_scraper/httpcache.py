@@ -0,0 +1,335 @@
+# Content-addressed HTTP cache storage (HTTPCACHE_STORAGE).
+#
+# Response bodies are stored once per content hash, compressed, under
+#
+#     <HTTPCACHE_DIR>/objects/<2 hex>/<blake2b hex>.zst
+#
+# so identical bodies (an unchanged listing page fetched by every crawl, the
+# same article under two URLs) take the space of one. The cache middleware
+# sits before HttpCompressionMiddleware, so gzip/deflate transfer encoding is
+# undone here first: the hash is of the page itself and zstd gets text to
+# compress.
+#
+# A SQLite index maps (spider, request fingerprint) to the status, headers
+# and body hash, and keeps the size of every body. When the bodies outgrow
+# HTTPCACHE_MAX_SIZE the least recently used responses are evicted and
+# bodies nobody refers to any more are deleted.
+#
+# To reprocess the last crawl without the network (after a pipeline fix):
+#
+#     scrapy crawl <spider> -s HTTPCACHE_EXPIRATION_SECS=0 -s HTTPCACHE_IGNORE_MISSING=True \
+#         -s DEDUP_STORE_PATH= -s FRONTIER_DIR= -s DISCOVERY_STATE_PATH=
+#
+# The empty settings keep the dedup store, the known-URL gate and the feed
+# cutoff from dropping the articles already exported, and start the crawl
+# over instead of resuming a saved frontier.
+
+import gzip
+import hashlib
+import logging
+import os
+import time
+import zlib
+
+from scrapy.http.headers import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.misc import load_object
+from scrapy.utils.project import data_path
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+from news_scraper import sqlite
+from news_scraper.export import EXTENSIONS, _zstd_module
+
+
+logger = logging.getLogger(__name__)
+
+
+class BodyCodec:
+    """Compress and decompress whole bodies with zstd, gzip or nothing"""
+
+    def __init__(self, compression, level=None):
+        self.compression = compression
+        self.level = level
+        self.extension = EXTENSIONS[compression]
+        if compression == 'zstd':
+            self._zstd = _zstd_module()
+            if self._zstd is None:
+                raise RuntimeError("zstd compression needs Python 3.14, backports.zstd or zstandard")
+        elif compression not in (None, 'gzip'):
+            raise ValueError(f"Unknown compression: {compression!r}")
+
+    def compress(self, data):
+        if self.compression == 'zstd':
+            if self.level is None:
+                return self._zstd.compress(data)
+            return self._zstd.compress(data, self.level)
+        if self.compression == 'gzip':
+            return gzip.compress(data, compresslevel=self.level or 6)
+        return data
+
+    def decompress(self, data):
+        if self.compression == 'zstd':
+            return self._zstd.decompress(data)
+        if self.compression == 'gzip':
+            return gzip.decompress(data)
+        return data
+
+
+def body_digest(body):
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+def decoded(response):
+    """(body, headers) of ``response`` without gzip/deflate Content-Encoding;
+    other encodings are kept as they are"""
+    encoding = response.headers.get('Content-Encoding', b'').strip().lower()
+    if encoding not in (b'gzip', b'x-gzip', b'deflate'):
+        return response.body, response.headers
+    try:
+        if encoding == b'deflate':
+            try:
+                body = zlib.decompress(response.body)
+            except zlib.error:
+                body = zlib.decompress(response.body, -zlib.MAX_WBITS)
+        else:
+            body = gzip.decompress(response.body)
+    except (OSError, EOFError, zlib.error):
+        return response.body, response.headers
+    headers = response.headers.copy()
+    headers.pop('Content-Encoding', None)
+    headers.pop('Content-Length', None)
+    return body, headers
+
+
+class ContentAddressedCacheStorage:
+    """Scrapy cache storage keeping each distinct body once"""
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings['HTTPCACHE_DIR'])
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self.max_size = settings.getint('HTTPCACHE_MAX_SIZE')
+        self.batch_size = settings.getint('HTTPCACHE_BATCH_SIZE', 100)
+
+        compression = settings.get('HTTPCACHE_COMPRESSION', 'zstd') or None
+        level = settings.getint('HTTPCACHE_COMPRESSION_LEVEL') or None
+        if compression == 'zstd' and _zstd_module() is None:
+            logger.warning("zstd is not available (Python 3.14, backports.zstd or "
+                           "zstandard), compressing the HTTP cache with gzip")
+            compression = 'gzip'
+        self.codec = BodyCodec(compression, level)
+        self.codecs = {compression: self.codec}
+
+        self.conn = None
+        self.stats = None
+        # Index rows and body rows written since the last flush
+        self.pending = {}
+        self.pending_bodies = {}
+        self.accessed = {}
+        # Compressed size of all bodies, once the index is open
+        self.size = 0
+
+    def open_spider(self, spider):
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        self.stats = spider.crawler.stats
+        self.conn = sqlite.connect(os.path.join(self.cachedir, 'index.sqlite3'))
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' spider TEXT NOT NULL,'
+            ' fingerprint BLOB NOT NULL,'
+            ' url TEXT NOT NULL,'
+            ' status INTEGER NOT NULL,'
+            ' class TEXT,'
+            ' protocol TEXT,'
+            ' headers BLOB NOT NULL,'
+            ' body BLOB NOT NULL,'
+            ' stored_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL,'
+            ' PRIMARY KEY (spider, fingerprint)'
+            ') WITHOUT ROWID'
+        )
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS bodies ('
+            ' digest BLOB PRIMARY KEY,'
+            ' compression TEXT,'
+            ' size INTEGER NOT NULL,'
+            ' length INTEGER NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        self.size = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM bodies').fetchone()[0]
+        logger.debug(f"Using content-addressed cache storage in {self.cachedir} "
+                     f"({self.size / 2**20:.1f} MiB of bodies, {self.codec.compression or 'uncompressed'})")
+
+    def close_spider(self, spider):
+        if self.conn is None:
+            return
+        self.flush()
+        self.evict()
+        self.conn.close()
+        self.conn = None
+
+    def retrieve_response(self, spider, request):
+        """Return response if present in cache, or None otherwise."""
+        key = (spider.name, self._fingerprinter.fingerprint(request))
+        row = self.pending.get(key)
+        if row is None:
+            row = self.conn.execute(
+                'SELECT url, status, class, protocol, headers, body, stored_at'
+                ' FROM responses WHERE spider = ? AND fingerprint = ?', key,
+            ).fetchone()
+            if row is None:
+                return None  # not cached
+        else:
+            row = row[2:9]
+        url, status, cls, protocol, rawheaders, digest, stored_at = row
+        if 0 < self.expiration_secs < time.time() - stored_at:
+            return None  # expired
+
+        body = self._read_body(digest)
+        if body is None:
+            return None  # body evicted meanwhile
+        self.accessed[key] = time.time()
+
+        headers = Headers(headers_raw_to_dict(rawheaders))
+        if cls:
+            respcls = load_object(cls)
+        else:
+            respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        request.meta['cache_timestamp'] = stored_at
+        return respcls(url=url, status=status, headers=headers, body=body, protocol=protocol)
+
+    def store_response(self, spider, request, response):
+        """Store the given response in the cache."""
+        body, headers = decoded(response)
+        digest = body_digest(body)
+        if digest in self.pending_bodies or self._has_body(digest):
+            self.stats.inc_value('httpcache/bodies_shared')
+            self.stats.inc_value('httpcache/bytes_shared', len(body))
+        else:
+            self._write_body(digest, body)
+
+        now = time.time()
+        if headers is response.headers:
+            cls = type(response)
+        else:
+            # Still a plain Response while it was encoded
+            cls = responsetypes.from_args(headers=headers, url=response.url, body=body)
+        key = (spider.name, self._fingerprinter.fingerprint(request))
+        self.pending[key] = key + (
+            response.url, response.status, f'{cls.__module__}.{cls.__name__}',
+            response.protocol, headers_dict_to_raw(headers), digest, now, now,
+        )
+        self.accessed.pop(key, None)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write pending index rows and access times in a single transaction"""
+        if not (self.pending or self.pending_bodies or self.accessed):
+            return
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO bodies (digest, compression, size, length) VALUES (?, ?, ?, ?)',
+                [(digest,) + row for digest, row in self.pending_bodies.items()],
+            )
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO responses (spider, fingerprint, url, status, class,'
+                ' protocol, headers, body, stored_at, accessed_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                list(self.pending.values()),
+            )
+            self.conn.executemany(
+                'UPDATE responses SET accessed_at = ? WHERE spider = ? AND fingerprint = ?',
+                [(accessed_at,) + key for key, accessed_at in self.accessed.items()],
+            )
+        self.pending.clear()
+        self.pending_bodies.clear()
+        self.accessed.clear()
+        if self.max_size and self.size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Delete unreferenced bodies, then least recently used responses
+        until the bodies fit in HTTPCACHE_MAX_SIZE"""
+        self._collect_garbage()
+        evicted = 0
+        while self.max_size and self.size > self.max_size:
+            with self.conn:
+                self.conn.execute('BEGIN')
+                cursor = self.conn.execute(
+                    'DELETE FROM responses WHERE (spider, fingerprint) IN ('
+                    ' SELECT spider, fingerprint FROM responses ORDER BY accessed_at LIMIT ?)',
+                    (self.batch_size,),
+                )
+            if not cursor.rowcount:
+                break
+            evicted += cursor.rowcount
+            self._collect_garbage()
+        if evicted:
+            self.stats.inc_value('httpcache/evicted', evicted)
+            logger.info(f"Evicted {evicted} cached responses, {self.size / 2**20:.1f} MiB of bodies left")
+
+    def _collect_garbage(self):
+        orphans = self.conn.execute(
+            'SELECT digest, compression, size FROM bodies'
+            ' WHERE digest NOT IN (SELECT body FROM responses)'
+        ).fetchall()
+        if not orphans:
+            return
+        for digest, compression, size in orphans:
+            try:
+                os.remove(self._body_path(digest, self._codec(compression)))
+            except FileNotFoundError:
+                pass
+            self.size -= size
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'DELETE FROM bodies WHERE digest = ?', [(digest,) for digest, _, _ in orphans])
+
+    def _codec(self, compression):
+        codec = self.codecs.get(compression)
+        if codec is None:
+            codec = self.codecs[compression] = BodyCodec(compression)
+        return codec
+
+    def _body_path(self, digest, codec):
+        name = digest.hex()
+        return os.path.join(self.cachedir, 'objects', name[:2], name + codec.extension)
+
+    def _has_body(self, digest):
+        return self.conn.execute(
+            'SELECT 1 FROM bodies WHERE digest = ?', (digest,)).fetchone() is not None
+
+    def _write_body(self, digest, body):
+        path = self._body_path(digest, self.codec)
+        data = self.codec.compress(body)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a temporary name so a crash never leaves half a body
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.pending_bodies[digest] = (self.codec.compression, len(data), len(body))
+        self.size += len(data)
+        self.stats.inc_value('httpcache/bodies_stored')
+        self.stats.inc_value('httpcache/bytes_stored', len(data))
+
+    def _read_body(self, digest):
+        pending = self.pending_bodies.get(digest)
+        if pending is not None:
+            compression = pending[0]
+        else:
+            row = self.conn.execute(
+                'SELECT compression FROM bodies WHERE digest = ?', (digest,)).fetchone()
+            if row is None:
+                return None
+            compression = row[0]
+        codec = self._codec(compression)
+        try:
+            with open(self._body_path(digest, codec), 'rb') as f:
+                return codec.decompress(f.read())
+        except FileNotFoundError:
+            return None
@@ -3,7 +3,13 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
 
+from collections.abc import MutableMapping
+from dataclasses import dataclass, fields
+from pprint import pformat
+
 import scrapy
+from itemadapter import ItemAdapter
+from itemadapter.adapter import DataclassAdapter
 
 
 class NewsScraperItem(scrapy.Item):
@@ -15,35 +21,135 @@ class NewsScraperItem(scrapy.Item):
 
 
 
-import scrapy
+@dataclass(slots=True, init=False, repr=False, eq=False)
+class NewsArticle(MutableMapping):
+    """A scraped article, one slot per field
 
+    Used like a scrapy.Item: ``article['headline']``, ``article.get(...)``,
+    ``'tags' in article``, and fields that were never set are missing (a
+    KeyError, skipped by ItemAdapter and the feed exporters through
+    NewsArticleAdapter). The values live
+    in the instance's slots instead of a dict next to it, which saves about
+    three quarters of the per-item overhead while thousands of items are in
+    flight (benchmarks/bench_item_memory.py).
+    """
 
-class NewsArticle(scrapy.Item):
     # Core article information
-    url = scrapy.Field()
-    headline = scrapy.Field()
-    content = scrapy.Field()
-    summary = scrapy.Field()
-    
+    url: str
+    headline: str
+    content: str
+    summary: str
+
     # Publication details
-    author = scrapy.Field()
-    date_published = scrapy.Field()
-    date_machine = scrapy.Field()  # Machine-readable date format
-    
+    author: str
+    date_published: str
+    date_machine: str  # Machine-readable date format
+
     # Media and metadata
-    image_url = scrapy.Field()
-    keywords = scrapy.Field()
-    tags = scrapy.Field()
-    
+    image_url: str
+    keywords: str
+    tags: tuple
+
     # Categorization
-    category = scrapy.Field()
-    subcategory = scrapy.Field()
-    source = scrapy.Field()
-    
+    category: str
+    subcategory: str
+    source: str
+
     # Additional metadata
-    scraped_at = scrapy.Field()  # Timestamp when scraped
-    word_count = scrapy.Field()  # Content word count
-    read_time = scrapy.Field()   # Estimated reading time
+    scraped_at: str  # Timestamp when scraped
+    word_count: int  # Content word count
+    read_time: int   # Estimated reading time
+    revisit: bool    # Re-crawl of a known URL (KNOWN_URL_REVISITS)
+
+    def __init__(self, *args, **kwargs):
+        if args or kwargs:
+            self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        if key in FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in FIELD_SET:
+            raise KeyError(f"{type(self).__name__} does not support field: {key}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in FIELD_SET:
+            raise KeyError(key)
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in FIELD_SET and hasattr(self, key)
+
+    def __iter__(self):
+        return (field for field in ARTICLE_FIELDS if hasattr(self, field))
+
+    def __len__(self):
+        return sum(1 for field in ARTICLE_FIELDS if hasattr(self, field))
+
+    def get(self, key, default=None):
+        # Called for most fields by every pipeline stage, without the
+        # KeyError round trip of Mapping.get()
+        if key in FIELD_SET:
+            return getattr(self, key, default)
+        return default
+
+    def __repr__(self):
+        return pformat(dict(self))
+
+    def __getstate__(self):
+        return dict(self)
+
+    def __setstate__(self, state):
+        self.update(state)
+
+    def copy(self):
+        return type(self)(self)
+
+
+# Field names in declaration order, the order they are exported in
+ARTICLE_FIELDS = tuple(field.name for field in fields(NewsArticle))
+FIELD_SET = frozenset(ARTICLE_FIELDS)
+
+
+class NewsArticleAdapter(DataclassAdapter):
+    """ItemAdapter support for NewsArticle through its mapping protocol
+
+    DataclassAdapter would read the slots directly, so a field that was never
+    set raises AttributeError from adapter.get(), ``in`` and the exporters
+    instead of being missing.
+    """
+
+    @classmethod
+    def is_item(cls, item):
+        return isinstance(item, NewsArticle)
+
+    @classmethod
+    def is_item_class(cls, item_class):
+        return issubclass(item_class, NewsArticle)
+
+    def __getitem__(self, field_name):
+        return self.item[field_name]
+
+    def __setitem__(self, field_name, value):
+        self.item[field_name] = value
+
+    def __delitem__(self, field_name):
+        del self.item[field_name]
+
+    def __iter__(self):
+        return iter(self.item)
 
+    def __len__(self):
+        return len(self.item)
 
 
+ItemAdapter.ADAPTER_CLASSES.appendleft(NewsArticleAdapter)
@@ -0,0 +1,109 @@
+# Article link extraction shared by the spiders.
+#
+# Links are made absolute and canonical (no tracking parameters, fragments,
+# AMP or mobile variants) before they are filtered and de-duplicated, so each
+# article on a listing page produces exactly one request however many of the
+# spider's selectors point at it.
+
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+from w3lib.url import canonicalize_url
+
+from scrapy import Request
+
+from news_scraper.cascade import Query
+
+
+# Query parameters that only identify where a click came from
+TRACKING_PARAMS_RE = re.compile(
+    r'^(?:utm_\w+|fbclid|gclid|dclid|msclkid|igshid|mc_cid|mc_eid|_ga|'
+    r'ref|ref_src|referrer|from|frmapp|amp|outputtype|ito)$',
+    re.IGNORECASE,
+)
+
+# Mobile and AMP hosts and the desktop host they mirror
+HOST_ALIASES = {
+    'm.timesofindia.com': 'timesofindia.indiatimes.com',
+    'm.ndtv.com': 'www.ndtv.com',
+    'amp.ndtv.com': 'www.ndtv.com',
+    'm.indianexpress.com': 'indianexpress.com',
+    'm.telegraphindia.com': 'www.telegraphindia.com',
+}
+
+# AMP renderings of an article path: /amp_articleshow/, /amp/..., .../amp, .../lite
+AMP_PATH_RULES = (
+    (re.compile(r'/amp_articleshow/'), '/articleshow/'),
+    (re.compile(r'^/amp(?=/)'), ''),
+    (re.compile(r'/(?:amp|lite)/?$'), '/'),
+)
+
+SKIPPED_SCHEMES = ('javascript:', 'mailto:', 'tel:', 'whatsapp:', '#')
+
+
+def canonicalize_article_url(url):
+    """One spelling per article: desktop host, no AMP path, no tracking
+    parameters or fragment, sorted query"""
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    host = HOST_ALIASES.get(host, host)
+    if parts.port:
+        host = f'{host}:{parts.port}'
+
+    path = parts.path
+    if 'amp' in path or 'lite' in path:
+        for pattern, replacement in AMP_PATH_RULES:
+            path = pattern.sub(replacement, path)
+
+    query = parts.query
+    if query:
+        query = '&'.join(
+            pair for pair in query.split('&')
+            if pair and not TRACKING_PARAMS_RE.match(pair.split('=', 1)[0])
+        )
+
+    return canonicalize_url(urlunsplit((parts.scheme, host, path or '/', query, '')))
+
+
+class ArticleLinkExtractor:
+    """Collect article links from a listing page with a list of
+    ``(css, pattern)`` rules
+
+    ``css`` must select href values; links are kept when the compiled
+    ``pattern`` (or None for any link) matches their canonical URL. Both are
+    compiled once, here.
+    """
+
+    def __init__(self, rules):
+        self.rules = [
+            (Query(css), re.compile(pattern) if isinstance(pattern, str) else pattern)
+            for css, pattern in rules
+        ]
+
+    def extract_links(self, response):
+        """(canonical URLs in page order, number of duplicate links skipped)"""
+        seen = set()
+        links = []
+        duplicates = 0
+        for query, pattern in self.rules:
+            for href in query.getall(response):
+                href = href.strip()
+                if not href or href.startswith(SKIPPED_SCHEMES):
+                    continue
+                url = canonicalize_article_url(response.urljoin(href))
+                if pattern is not None and pattern.search(url) is None:
+                    continue
+                if url in seen:
+                    duplicates += 1
+                    continue
+                seen.add(url)
+                links.append(url)
+        return links, duplicates
+
+    def follow(self, response, callback, stats=None, **kwargs):
+        """One request per distinct article link on the page"""
+        links, duplicates = self.extract_links(response)
+        if stats is not None:
+            stats.inc_value('links/extracted', len(links))
+            stats.inc_value('links/duplicates_avoided', duplicates)
+        return [Request(url, callback=callback, **kwargs) for url in links]
@@ -0,0 +1,277 @@
+# Per-stage item pipeline instrumentation (ITEM_PROCESSOR).
+#
+# InstrumentedItemPipelineManager is Scrapy's item pipeline manager running
+# the process_item() chain of ITEM_PIPELINES itself: the time each stage
+# takes goes into a latency histogram for the stage, and each dropped item is
+# counted under its reason. Stages raise ArticleDropped with a
+# "<stage>.<reason>" code (e.g. quality.headline_too_short); other DropItems
+# count as "<stage>.other".
+#
+# Per stage and item this costs one clock read and a list append; the chain
+# also skips the coroutine Scrapy wraps around every synchronous stage, so an
+# instrumented item goes through the pipelines faster than an uninstrumented
+# one (benchmarks/bench_pipeline_metrics.py). Durations are only sorted into
+# histogram buckets, and published to the Scrapy stats and the metrics file,
+# every PIPELINE_METRICS_INTERVAL seconds and when the spider closes:
+#
+#     pipeline/<stage>/items, dropped, time_us, p50_us, p90_us, p99_us, max_us
+#     pipeline/drop_reason/<stage>.<reason>
+#
+# PIPELINE_METRICS_FILE is written in the Prometheus text format, ready for a
+# node_exporter textfile collector.
+
+import inspect
+import logging
+import os
+import re
+import time
+
+from scrapy.exceptions import DropItem
+from scrapy.pipelines import ItemPipelineManager
+from scrapy.utils.defer import ensure_awaitable
+from scrapy.utils.python import global_object_name
+from twisted.internet import task
+from twisted.internet.defer import Deferred
+
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets: 4 per power of two of nanoseconds, up to 2**40 ns
+SUB_BUCKETS = 4
+BUCKETS = 40 * SUB_BUCKETS
+
+# Bucket bounds written to the metrics file: powers of two from 1 µs to 34 s
+EXPORTED_BOUNDS = range(10, 36)
+
+PERCENTILES = (50, 90, 99)
+
+
+class ArticleDropped(DropItem):
+    """DropItem with a structured reason, "<stage>.<reason>\""""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def stage_name(pipeline):
+    """'quality' for NewsArticleQualityPipeline, 'json_lines_export' for
+    NewsArticleJsonLinesExportPipeline"""
+    name = type(pipeline).__name__
+    name = re.sub(r'^NewsArticle|Pipeline$', '', name) or name
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+
+def bucket_upper_bound(index):
+    """Smallest duration (ns) above bucket ``index``"""
+    if index < SUB_BUCKETS:
+        return index + 1
+    bits, sub = divmod(index, SUB_BUCKETS)
+    bits += 2
+    return (SUB_BUCKETS + sub + 1) << (bits - 3)
+
+
+class LatencyHistogram:
+    """Call count, total and distribution of one stage's durations
+
+    Durations are appended to ``pending`` as they are measured and only
+    sorted into the buckets by fold().
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max', 'dropped', 'pending')
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.dropped = 0
+        self.pending = []
+
+    def add(self, nanoseconds):
+        # Bucket: the power of two, then the next two bits below the top one
+        bits = nanoseconds.bit_length()
+        if bits < 3:
+            index = nanoseconds
+        else:
+            index = (bits - 2) * SUB_BUCKETS + ((nanoseconds >> (bits - 3)) & 3)
+            if index >= BUCKETS:
+                index = BUCKETS - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def fold(self):
+        """Add the pending durations to the histogram"""
+        for nanoseconds in self.pending:
+            self.add(nanoseconds)
+        # Cleared in place: the pipeline manager holds on to the list
+        self.pending.clear()
+
+    def percentile(self, percent):
+        """Upper bound (ns) of the bucket holding the ``percent``th percentile"""
+        if not self.count:
+            return 0
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+    def cumulative(self, bound_ns):
+        """Number of durations below ``bound_ns``, a power of two"""
+        end = (bound_ns.bit_length() - 2) * SUB_BUCKETS
+        return sum(self.counts[:end])
+
+
+class PipelineMetrics:
+    """Latency histograms and drop reason counters of the pipeline stages"""
+
+    def __init__(self, stats=None, path=None):
+        self.stats = stats
+        self.path = path
+        self.stages = {}
+        self.drop_reasons = {}
+        self.spider_name = ''
+
+    def stage(self, name):
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = LatencyHistogram()
+        return histogram
+
+    def dropped(self, histogram, stage, exception):
+        histogram.dropped += 1
+        reason = getattr(exception, 'reason', None) or f'{stage}.other'
+        self.drop_reasons[reason] = self.drop_reasons.get(reason, 0) + 1
+
+    def publish(self):
+        """Copy the totals so far into the stats and the metrics file"""
+        for histogram in self.stages.values():
+            histogram.fold()
+        if self.stats is not None:
+            for name, histogram in self.stages.items():
+                prefix = f'pipeline/{name}'
+                self.stats.set_value(f'{prefix}/items', histogram.count)
+                self.stats.set_value(f'{prefix}/dropped', histogram.dropped)
+                self.stats.set_value(f'{prefix}/time_us', histogram.total // 1000)
+                for percent in PERCENTILES:
+                    self.stats.set_value(f'{prefix}/p{percent}_us', histogram.percentile(percent) / 1000)
+                self.stats.set_value(f'{prefix}/max_us', histogram.max / 1000)
+            for reason, count in self.drop_reasons.items():
+                self.stats.set_value(f'pipeline/drop_reason/{reason}', count)
+        if self.path:
+            self.write(self.path)
+
+    def write(self, path):
+        lines = [
+            '# HELP news_pipeline_stage_seconds Time spent in item pipeline stages.',
+            '# TYPE news_pipeline_stage_seconds histogram',
+        ]
+        spider = self.spider_name
+        for name, histogram in self.stages.items():
+            labels = f'spider="{spider}",stage="{name}"'
+            for bits in EXPORTED_BOUNDS:
+                bound = 1 << bits
+                lines.append(f'news_pipeline_stage_seconds_bucket{{{labels},le="{bound / 1e9:g}"}} '
+                             f'{histogram.cumulative(bound)}')
+            lines.append(f'news_pipeline_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'news_pipeline_stage_seconds_sum{{{labels}}} {histogram.total / 1e9:.9f}')
+            lines.append(f'news_pipeline_stage_seconds_count{{{labels}}} {histogram.count}')
+        lines += [
+            '# HELP news_pipeline_dropped_items_total Items dropped by the item pipelines, by reason.',
+            '# TYPE news_pipeline_dropped_items_total counter',
+        ]
+        for reason, count in sorted(self.drop_reasons.items()):
+            lines.append(f'news_pipeline_dropped_items_total{{spider="{spider}",reason="{reason}"}} {count}')
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Replaced in one rename so collectors never read half a file
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+
+    def summary(self):
+        return ', '.join(
+            f'{name} {histogram.percentile(50) / 1000:.0f}/{histogram.percentile(99) / 1000:.0f}'
+            for name, histogram in self.stages.items()
+        )
+
+
+class InstrumentedItemPipelineManager(ItemPipelineManager):
+    """Item pipeline manager timing every stage and counting drop reasons
+    (ITEM_PROCESSOR = "news_scraper.metrics.InstrumentedItemPipelineManager")"""
+
+    def __init__(self, *middlewares, crawler=None):
+        settings = crawler.settings if crawler is not None else {}
+        self.metrics = PipelineMetrics(
+            stats=crawler.stats if crawler is not None else None,
+            path=settings.get('PIPELINE_METRICS_FILE'),
+        )
+        self.interval = float(settings.get('PIPELINE_METRICS_INTERVAL') or 30)
+        self.publisher = None
+        # (stage name, process_item, whether it takes the spider, histogram)
+        self.stages = []
+        # Stage result types already seen not to be awaitable
+        self.sync_types = set()
+        super().__init__(*middlewares, crawler=crawler)
+
+    def _add_middleware(self, mw):
+        super()._add_middleware(mw)
+        if hasattr(mw, 'process_item'):
+            name = stage_name(mw)
+            method = mw.process_item
+            self.stages.append((
+                name, method, method in self._mw_methods_requiring_spider, self.metrics.stage(name),
+            ))
+
+    async def process_item_async(self, item):
+        # ItemPipelineManager's process_item chain, timed: the end of one
+        # stage is the start of the next
+        clock = time.perf_counter_ns
+        sync_types = self.sync_types
+        start = clock()
+        for name, method, needs_spider, histogram in self.stages:
+            try:
+                result = method(item, self._spider) if needs_spider else method(item)
+                if type(result) not in sync_types:
+                    if isinstance(result, Deferred):
+                        result = await ensure_awaitable(result, _warn=global_object_name(method))
+                    elif inspect.isawaitable(result):
+                        result = await result
+                    else:
+                        sync_types.add(type(result))
+            except DropItem as e:
+                histogram.pending.append(clock() - start)
+                self.metrics.dropped(histogram, name, e)
+                raise
+            end = clock()
+            histogram.pending.append(end - start)
+            start = end
+            item = result
+        return item
+
+    async def open_spider_async(self):
+        await super().open_spider_async()
+        if self.crawler is not None and self.crawler.spider is not None:
+            self.metrics.spider_name = self.crawler.spider.name
+        if self.interval > 0:
+            self.publisher = task.LoopingCall(self.metrics.publish)
+            self.publisher.start(self.interval, now=False)
+
+    async def close_spider_async(self):
+        try:
+            await super().close_spider_async()
+        finally:
+            if self.publisher is not None and self.publisher.running:
+                self.publisher.stop()
+            self.metrics.publish()
+            if self.metrics.stages:
+                logger.info(f"Item pipeline stage latency p50/p99 (µs): {self.metrics.summary()}")
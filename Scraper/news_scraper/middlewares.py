@@ -3,22 +3,55 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
-from scrapy import signals
+import time
+
+from scrapy import Request, signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.project import data_path
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from news_scraper.conditional import ValidatorStore
+from news_scraper.pruning import prune_html
+from news_scraper.dedup import DedupStore, KIND_URL, canonical_url, url_key
+from news_scraper.frontier import request_not_downloaded
+from news_scraper.throttle import THROTTLE_STATUSES, DomainThrottle, ThrottleLimits, retry_after_seconds
+
 
 class NewsScraperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
     # scrapy acts as if the spider middleware does not modify the
     # passed objects.
 
+    # Known-URL gate: article requests whose canonical URL is already in the
+    # dedup store are dropped before they are downloaded
+
+    def __init__(self, store, stats, callbacks=('parse_article_page',), revisits=None):
+        self.store = store
+        self.stats = stats
+        # Names of the spider callbacks that parse article pages
+        self.callbacks = frozenset(callbacks)
+        # spider name -> known article URLs still let through per run
+        self.revisits = revisits or {}
+        self.revisited = 0
+
     @classmethod
     def from_crawler(cls, crawler):
         # This method is used by Scrapy to create your spiders.
-        s = cls()
+        settings = crawler.settings
+        store_path = settings.get('DEDUP_STORE_PATH')
+        if not store_path:
+            raise NotConfigured('DEDUP_STORE_PATH is not set, there are no known URLs')
+        s = cls(
+            DedupStore(data_path(store_path)),
+            crawler.stats,
+            callbacks=settings.getlist('KNOWN_URL_CALLBACKS', ['parse_article_page']),
+            revisits=settings.getdict('KNOWN_URL_REVISITS'),
+        )
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
         return s
 
     def process_spider_input(self, response, spider):
@@ -33,9 +66,54 @@ class NewsScraperSpiderMiddleware:
         # it has processed the response.
 
         # Must return an iterable of Request, or item objects.
+        articles = []
         for i in result:
+            if self._is_article_request(i):
+                articles.append(i)
+            else:
+                yield i
+        yield from self._unknown(articles, spider)
+
+    async def process_spider_output_async(self, response, result, spider):
+        articles = []
+        async for i in result:
+            if self._is_article_request(i):
+                articles.append(i)
+            else:
+                yield i
+        for i in self._unknown(articles, spider):
             yield i
 
+    def _is_article_request(self, obj):
+        return (isinstance(obj, Request) and obj.callback is not None
+                and getattr(obj.callback, '__name__', None) in self.callbacks
+                and not obj.dont_filter)
+
+    def _unknown(self, requests, spider):
+        """The article requests whose URL is not in the dedup store, one
+        batched lookup per callback output"""
+        if not requests:
+            return []
+        keys = [url_key(canonical_url(request.url)) for request in requests]
+        known = self.store.contains_many(KIND_URL, keys)
+        if not known:
+            return requests
+
+        allowance = int(self.revisits.get(spider.name, 0))
+        unknown = []
+        for request, key in zip(requests, keys):
+            if key not in known:
+                unknown.append(request)
+            elif self.revisited < allowance:
+                self.revisited += 1
+                self.stats.inc_value('known_urls/revisited')
+                # Copied onto the item, so deduplication lets the re-crawl through
+                request.meta['revisit'] = True
+                unknown.append(request)
+            else:
+                self.stats.inc_value('known_urls/skipped')
+        return unknown
+
     def process_spider_exception(self, response, exception, spider):
         # Called when a spider or process_spider_input() method
         # (from other spider middleware) raises an exception.
@@ -51,6 +129,10 @@ class NewsScraperSpiderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+        self.store.open()
+
+    def spider_closed(self, spider):
+        self.store.close()
 
 
 class NewsScraperDownloaderMiddleware:
@@ -98,3 +180,202 @@ class NewsScraperDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class ConditionalRequestMiddleware(NewsScraperDownloaderMiddleware):
+    """Revalidate pages downloaded in earlier runs with If-None-Match /
+    If-Modified-Since and drop the ones that come back 304 Not Modified
+    before they reach the spider"""
+
+    def __init__(self, store, stats):
+        self.store = store
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        store_path = crawler.settings.get('CONDITIONAL_STORE_PATH')
+        if not store_path:
+            raise NotConfigured('CONDITIONAL_STORE_PATH is not set')
+        store = ValidatorStore(
+            data_path(store_path),
+            batch_size=crawler.settings.getint('CONDITIONAL_BATCH_SIZE', 200),
+        )
+        s = cls(store, crawler.stats)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_request(self, request, spider):
+        if request.method != 'GET' or request.meta.get('dont_revalidate'):
+            return None
+        # Already conditional (set by the spider or a retried request)
+        if b'If-None-Match' in request.headers or b'If-Modified-Since' in request.headers:
+            return None
+
+        validators = self.store.get(request.url)
+        if validators is None:
+            return None
+
+        etag, last_modified, length = validators
+        if etag:
+            request.headers['If-None-Match'] = etag
+        if last_modified:
+            request.headers['If-Modified-Since'] = last_modified
+        request.meta['conditional_length'] = length
+        self.stats.inc_value('conditional/requests_revalidated')
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status == 304 and 'conditional_length' in request.meta:
+            self.stats.inc_value('conditional/requests_saved')
+            self.stats.inc_value('conditional/bytes_saved', request.meta['conditional_length'])
+            raise IgnoreRequest(f"Not modified: {request.url}")
+
+        if response.status == 200 and request.method == 'GET':
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.store.put(
+                    request.url,
+                    etag.decode('latin-1') if etag else None,
+                    last_modified.decode('latin-1') if last_modified else None,
+                    len(response.body),
+                )
+        return response
+
+    def spider_opened(self, spider):
+        self.store.open()
+        spider.logger.info(f"Conditional requests: {len(self.store)} known validators")
+
+    def spider_closed(self, spider):
+        self.store.close()
+
+
+class AdaptiveConcurrencyMiddleware(NewsScraperDownloaderMiddleware):
+    """Tune each domain's download slot (concurrency and delay) from its
+    latency, error rate and 429/503 Retry-After answers"""
+
+    def __init__(self, crawler, limits):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.limits = limits
+        self.start_concurrency = crawler.settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN')
+        self.start_delay = crawler.settings.getfloat('DOWNLOAD_DELAY')
+        # download slot key -> DomainThrottle
+        self.domains = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('ADAPTIVE_CONCURRENCY_ENABLED'):
+            raise NotConfigured
+        s = cls(crawler, ThrottleLimits.from_settings(crawler.settings))
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def _domain(self, key):
+        domain = self.domains.get(key)
+        if domain is None:
+            domain = self.domains[key] = DomainThrottle(
+                self.start_concurrency, self.start_delay, self.limits)
+        return domain
+
+    def _apply(self, key, domain):
+        downloader = self.crawler.engine.downloader
+        # Slots are garbage collected when idle, so the values are also kept
+        # where the downloader looks them up when it creates the slot again
+        downloader.per_slot_settings.setdefault(key, {}).update(
+            concurrency=domain.slot_concurrency, delay=domain.delay)
+        slot = downloader.slots.get(key)
+        if slot is not None:
+            slot.concurrency = domain.slot_concurrency
+            slot.delay = domain.delay
+
+    def process_response(self, request, response, spider):
+        key = request.meta.get('download_slot')
+        if key is None:
+            return response
+        domain = self._domain(key)
+        domain.on_response(
+            response.status,
+            request.meta.get('download_latency'),
+            len(response.body),
+            retry_after_seconds(response.headers.get('Retry-After')),
+        )
+        if response.status in THROTTLE_STATUSES:
+            self.stats.inc_value(f'adaptive/{key}/throttled')
+            spider.logger.info(
+                f"{key} answered {response.status}, backing off to "
+                f"{domain.slot_concurrency} request(s) every {domain.delay:.2f}s")
+        self._apply(key, domain)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        key = request.meta.get('download_slot')
+        if key is None:
+            return None
+        domain = self._domain(key)
+        domain.on_exception()
+        self._apply(key, domain)
+        return None
+
+    def spider_closed(self, spider):
+        for key, domain in self.domains.items():
+            prefix = f'adaptive/{key}'
+            self.stats.set_value(f'{prefix}/responses', domain.responses)
+            self.stats.set_value(f'{prefix}/bytes', domain.bytes)
+            self.stats.set_value(f'{prefix}/errors', domain.errors)
+            self.stats.set_value(f'{prefix}/pages_per_minute', round(domain.throughput(), 1))
+            self.stats.set_value(f'{prefix}/max_concurrency', domain.max_concurrency)
+            self.stats.set_value(f'{prefix}/final_delay', round(domain.delay, 3))
+
+
+class FrontierMiddleware(NewsScraperDownloaderMiddleware):
+    """Tell the crawl frontier about requests that another middleware drops
+    before the download (robots.txt, offsite, a missing cache entry), so they
+    are not resumed on the next run"""
+
+    def __init__(self, signals):
+        self.signals = signals
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.signals)
+
+    def process_exception(self, request, exception, spider):
+        # Requests that reached the downloader were already reported
+        if 'frontier_id' in request.meta:
+            self.signals.send_catch_log(request_not_downloaded, request=request, spider=spider)
+        return None
+
+
+class ResponsePruningMiddleware(NewsScraperDownloaderMiddleware):
+    """Cut scripts, styles, <noscript>, <svg>, comments and ad containers out
+    of HTML bodies (JSON-LD is kept) before the spiders parse them"""
+
+    def __init__(self, stats, ad_containers=True):
+        self.stats = stats
+        self.ad_containers = ad_containers
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('PRUNE_RESPONSES_ENABLED'):
+            raise NotConfigured
+        return cls(crawler.stats, settings.getbool('PRUNE_AD_CONTAINERS', True))
+
+    def process_response(self, request, response, spider):
+        if not isinstance(response, HtmlResponse) or request.meta.get('dont_prune'):
+            return response
+        start = time.perf_counter()
+        body = prune_html(response.body, self.ad_containers)
+        elapsed = time.perf_counter() - start
+
+        prefix = f'pruning/{spider.name}'
+        self.stats.inc_value(f'{prefix}/responses')
+        self.stats.inc_value(f'{prefix}/bytes_received', len(response.body))
+        self.stats.inc_value(f'{prefix}/bytes_removed', len(response.body) - len(body))
+        self.stats.inc_value(f'{prefix}/microseconds', int(elapsed * 1e6))
+        if body is response.body:
+            return response
+        return response.replace(body=body)
@@ -0,0 +1,195 @@
+# Near-duplicate detection with MinHash signatures and an LSH banding index.
+#
+# Every article is reduced to the set of hashed word shingles of its
+# headline and content, then to a fixed-size MinHash signature. Signatures
+# are split into bands; two articles become candidates when any band hashes
+# to the same bucket, and candidates are confirmed by the estimated Jaccard
+# similarity of their signatures. Only signatures and bucket keys are stored
+# (never the text), in the same SQLite file as the DedupStore.
+
+import hashlib
+import random
+import re
+from array import array
+
+
+WORD_RE = re.compile(r'\w+')
+
+MAX_HASH = (1 << 64) - 1
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def _signed64(value):
+    """SQLite integers are signed 64 bit"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def shingle_hashes(text, size=5):
+    """Hashes of the overlapping ``size``-word shingles of ``text``"""
+    words = WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {_hash64(' '.join(words).encode('utf-8'))} if words else set()
+    return {
+        _hash64(' '.join(words[i:i + size]).encode('utf-8'))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def _integrate(f, a, b, steps=100):
+    width = (b - a) / steps
+    return sum(f(a + (i + 0.5) * width) for i in range(steps)) * width
+
+
+def lsh_params(threshold, num_perm, false_positive_weight=0.5):
+    """Pick (bands, rows) minimising the weighted false positive and false
+    negative probabilities around ``threshold``"""
+    best, best_error = (1, num_perm), float('inf')
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = _integrate(
+                lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+            false_negative = _integrate(
+                lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+            error = (false_positive_weight * false_positive
+                     + (1 - false_positive_weight) * false_negative)
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    """Fixed-size MinHash signatures of article text
+
+    Permutations are random 64-bit XOR masks over blake2b shingle hashes,
+    which keeps the inner loop in C (``min(map(mask.__xor__, hashes))``).
+    The seed must stay the same for signatures to be comparable across runs.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self.masks = [rng.getrandbits(64) for _ in range(num_perm)]
+
+    def signature(self, text):
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not hashes:
+            return array('Q', [MAX_HASH] * self.num_perm)
+        return array('Q', [min(map(mask.__xor__, hashes)) for mask in self.masks])
+
+    @staticmethod
+    def similarity(first, second):
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class NearDuplicateIndex:
+    """LSH index over MinHash signatures, persisted in a DedupStore database"""
+
+    def __init__(self, store, threshold=0.8, num_perm=128, shingle_size=5, seed=1):
+        self.store = store
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        # Inserts not yet written, visible to queries through the dicts
+        self.pending_docs = {}
+        self.pending_buckets = {}
+
+    def open(self):
+        conn = self.store.conn
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS minhash ('
+            ' doc INTEGER PRIMARY KEY,'
+            ' url TEXT,'
+            ' sig BLOB NOT NULL'
+            ')'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS lsh_bucket ('
+            ' band INTEGER NOT NULL,'
+            ' bucket INTEGER NOT NULL,'
+            ' doc INTEGER NOT NULL,'
+            ' PRIMARY KEY (band, bucket, doc)'
+            ') WITHOUT ROWID'
+        )
+
+    def doc_id(self, url):
+        return _signed64(_hash64(url.encode('utf-8')))
+
+    def bucket_keys(self, signature):
+        rows = self.rows
+        return [
+            (band, _signed64(_hash64(signature[band * rows:(band + 1) * rows].tobytes())))
+            for band in range(self.bands)
+        ]
+
+    def _candidates(self, buckets):
+        candidates = set()
+        for key in buckets:
+            candidates.update(self.pending_buckets.get(key, ()))
+
+        conn = self.store.conn
+        for band, bucket in buckets:
+            rows = conn.execute(
+                'SELECT doc FROM lsh_bucket WHERE band = ? AND bucket = ?', (band, bucket))
+            candidates.update(row[0] for row in rows)
+        return candidates
+
+    def _signature_of(self, doc):
+        if doc in self.pending_docs:
+            return self.pending_docs[doc]
+        row = self.store.conn.execute('SELECT url, sig FROM minhash WHERE doc = ?', (doc,)).fetchone()
+        if row is None:
+            return None
+        sig = array('Q')
+        sig.frombytes(row[1])
+        return row[0], sig
+
+    def query(self, signature, buckets=None):
+        """Return ``(url, similarity)`` of the closest stored article at or
+        above the threshold, or None"""
+        if buckets is None:
+            buckets = self.bucket_keys(signature)
+
+        best = None
+        for doc in self._candidates(buckets):
+            stored = self._signature_of(doc)
+            if stored is None:
+                continue
+            url, other = stored
+            similarity = self.hasher.similarity(signature, other)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (url, similarity)
+        return best
+
+    def add(self, url, signature, buckets=None):
+        if buckets is None:
+            buckets = self.bucket_keys(signature)
+        doc = self.doc_id(url)
+        self.pending_docs[doc] = (url, signature)
+        for key in buckets:
+            self.pending_buckets.setdefault(key, []).append(doc)
+        if len(self.pending_docs) >= self.store.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending_docs:
+            return
+        conn = self.store.conn
+        with conn:
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT OR REPLACE INTO minhash (doc, url, sig) VALUES (?, ?, ?)',
+                [(doc, url, sig.tobytes()) for doc, (url, sig) in self.pending_docs.items()],
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO lsh_bucket (band, bucket, doc) VALUES (?, ?, ?)',
+                [(band, bucket, doc)
+                 for (band, bucket), docs in self.pending_buckets.items()
+                 for doc in docs],
+            )
+        self.pending_docs.clear()
+        self.pending_buckets.clear()
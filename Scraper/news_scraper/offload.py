@@ -0,0 +1,74 @@
+# Helpers for running CPU-bound item work off the Twisted reactor thread.
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from twisted.internet.defer import Deferred, DeferredSemaphore, succeed
+
+from scrapy.utils.defer import maybe_deferred_to_future
+
+
+def make_executor(kind, workers, initializer=None, initargs=()):
+    """Bounded 'thread' or 'process' pool, ``initializer(*initargs)`` run in every worker"""
+    if kind == 'process':
+        return ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    if kind == 'thread':
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='news-offload',
+                                  initializer=initializer, initargs=initargs)
+    raise ValueError(f"Unknown offload executor: {kind!r}")
+
+
+def deferred_from_future(future):
+    """Deferred fired on the reactor thread when a concurrent.futures.Future completes"""
+    from twisted.internet import reactor
+
+    d = Deferred()
+
+    def done(future):
+        if future.cancelled():
+            reactor.callFromThread(d.cancel)
+            return
+        error = future.exception()
+        if error is not None:
+            reactor.callFromThread(d.errback, error)
+        else:
+            reactor.callFromThread(d.callback, future.result())
+
+    future.add_done_callback(done)
+    return d
+
+
+class OrderedOffloader:
+    """Run a function in an executor, at most ``max_pending`` calls at a time,
+    and hand results back in submission order
+
+    While all slots are taken ``run()`` simply does not return, which keeps
+    the item counted as active in the scraper and lets Scrapy's own
+    backpressure slow the downloads down.
+    """
+
+    def __init__(self, executor, max_pending):
+        self.executor = executor
+        self.semaphore = DeferredSemaphore(max_pending)
+        self._tail = succeed(None)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def run(self, func, *args):
+        # Result of the call submitted just before this one
+        previous, released = self._tail, Deferred()
+        self._tail = released
+
+        try:
+            await maybe_deferred_to_future(self.semaphore.acquire())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                future = self.executor.submit(func, *args)
+                return await maybe_deferred_to_future(deferred_from_future(future))
+            finally:
+                self.in_flight -= 1
+                self.semaphore.release()
+        finally:
+            # Don't let this result overtake the earlier ones
+            await maybe_deferred_to_future(previous)
+            released.callback(None)
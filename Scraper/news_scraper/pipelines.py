@@ -3,17 +3,224 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import os
 import re
 import logging
 import hashlib
+import threading
 from datetime import datetime
-from scrapy.exceptions import DropItem
+from twisted.internet import task
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.project import data_path
 from w3lib.html import remove_tags
 from urllib.parse import urljoin, urlparse
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from news_scraper import columnar
+from news_scraper.cleaning import TextCleaner
+from news_scraper.columnar import ColumnarBatchWriter
+from news_scraper.dates import DateNormalizer
+from news_scraper.dedup import DedupStore, KIND_CONTENT, KIND_URL, canonical_url, url_key
+from news_scraper.metrics import ArticleDropped
+from news_scraper.minhash import NearDuplicateIndex
+from news_scraper.export import RotatingJsonLinesWriter
+from news_scraper.offload import OrderedOffloader, make_executor
+from news_scraper.storage import ArticleStore
+
+
+# Fields the enrichment stage always turns into stripped strings
+STRING_FIELDS = ('headline', 'content', 'summary', 'author', 'date_published',
+                 'date_machine', 'keywords', 'image_url', 'category', 'subcategory', 'source')
+
+# Headline fragments that mark an error page
+ERROR_INDICATORS = ('404', 'not found', 'page not found', 'error', 'access denied')
+
+
+# Default of every field the export stage fills in: (field, factory)
+EXPORT_DEFAULTS = (
+    ('url', str),
+    ('headline', str),
+    ('content', str),
+    ('summary', str),
+    ('author', str),
+    ('date_published', str),
+    ('date_machine', str),
+    ('image_url', str),
+    ('keywords', str),
+    ('tags', tuple),
+    ('category', str),
+    ('subcategory', str),
+    ('source', str),
+    ('scraped_at', lambda: datetime.now().isoformat()),
+    ('word_count', int),
+    ('read_time', int),
+)
+
+
+def split_tags(text, limit=None):
+    """Tuple of the non-empty comma-separated tags in ``text``, at most ``limit``"""
+    tags = [tag for tag in map(str.strip, text.split(',')) if tag]
+    return tuple(tags[:limit])
+
+
+# The rules of the validation, cleaning, enrichment, quality and export
+# stages, run by their pipelines and by NewsArticleFusedPipeline alike
+
+def validate_article(item, logger):
+    """Drop items without a headline, text or valid URL"""
+    headline = item.get('headline')
+    if not headline:
+        raise ArticleDropped('validation.missing_headline', f"Missing headline in {item.get('url', 'unknown URL')}")
+    
+    content = item.get('content')
+    if not content and not item.get('summary'):
+        raise ArticleDropped('validation.missing_content', f"Missing both content and summary in {item.get('url', 'unknown URL')}")
+    
+    # Ensure URL exists and is valid
+    url = item.get('url')
+    if not url:
+        raise ArticleDropped('validation.missing_url', "Missing URL in item")
+    
+    try:
+        parsed_url = urlparse(url)
+        if not parsed_url.scheme or not parsed_url.netloc:
+            raise ArticleDropped('validation.invalid_url', f"Invalid URL format: {url}")
+    except Exception as e:
+        raise ArticleDropped('validation.invalid_url', f"URL validation error: {e}")
+    
+    # Reasonable limits, only logged
+    if len(headline) > 500:
+        logger.warning(f"Very long headline ({len(headline)} chars) in {url}")
+    
+    if content and len(content) < 30:
+        logger.warning(f"Very short content ({len(content)} chars) in {url}")
+
+
+# Text fields cleaned in place after the headline and content:
+# (field, TextCleaner method name)
+CLEAN_PLAN = (
+    ('summary', 'clean_summary'),
+    ('author', 'clean_author'),
+    ('keywords', 'clean_keywords'),
+    ('image_url', 'clean_image_url'),
+)
+
+
+def clean_article(item, cleaner):
+    """Clean the text fields of an item with a TextCleaner"""
+    headline = item.get('headline')
+    if headline:
+        item['headline'] = cleaner.clean_headline(headline, item.get('source', ''))
+    
+    content = item.get('content')
+    if content:
+        # Handle Times of India content which is stored as list
+        if isinstance(content, list):
+            content = ' '.join([text for text in map(str.strip, map(str, content)) if text])
+        item['content'] = cleaner.clean_content(content)
+    
+    for field, method in CLEAN_PLAN:
+        value = item.get(field)
+        if value:
+            item[field] = getattr(cleaner, method)(value)
+
+
+def enrich_article(item, standardize_date):
+    """Add the derived fields and normalize the rest, returns the word count"""
+    # Add timestamp when scraped if not present
+    if not item.get('scraped_at'):
+        item['scraped_at'] = datetime.now().isoformat()
+    
+    # Calculate word count and estimated reading time (avg 200 words per minute)
+    content = item.get('content', '')
+    if content:
+        word_count = len(str(content).split())
+        item['word_count'] = word_count
+        item['read_time'] = max(1, round(word_count / 200))
+    else:
+        word_count = 0
+        item['word_count'] = 0
+        item['read_time'] = 0
+    
+    # Process date fields
+    date_published = item.get('date_published')
+    if date_published and not item.get('date_machine'):
+        item['date_machine'] = standardize_date(date_published, item.get('source', ''))
+    
+    # Ensure tags is a tuple
+    tags = item.get('tags')
+    if 'tags' not in item:
+        tags = item['tags'] = ()
+    elif tags and not isinstance(tags, tuple):
+        if isinstance(tags, str):
+            # Convert comma-separated string to tuple
+            tags = item['tags'] = split_tags(tags)
+        elif isinstance(tags, list):
+            tags = item['tags'] = tuple(tags)
+        else:
+            # Convert to tuple if it's some other type
+            tags = item['tags'] = (str(tags),)
+    
+    # Extract keywords as tags if no tags present
+    if not tags:
+        keywords = item.get('keywords')
+        if keywords and isinstance(keywords, str):
+            item['tags'] = split_tags(keywords, 10)  # Limit to 10 tags
+    
+    # Ensure all string fields are properly set, without copying the
+    # strings that are already stripped
+    for field in STRING_FIELDS:
+        value = item.get(field)
+        if value is None:
+            item[field] = ""
+        elif type(value) is not str or value[:1].isspace() or value[-1:].isspace():
+            item[field] = str(value).strip()
+    
+    return word_count
+
+
+def check_quality(item, word_count=None):
+    """Drop thin articles and error pages; word_count saves splitting the
+    content again when the caller already has it"""
+    headline = item.get('headline', '')
+    content = item.get('content', '')
+    
+    # Skip articles with very short headlines
+    if len(headline) < 10:
+        raise ArticleDropped('quality.headline_too_short', f"Headline too short ({len(headline)} chars): {item.get('url')}")
+    
+    # Skip articles with very short content (unless they have a good summary)
+    if len(content) < 100 and len(item.get('summary', '')) < 50:
+        raise ArticleDropped('quality.content_too_short', f"Content too short ({len(content)} chars): {item.get('url')}")
+    
+    # Skip articles that look like error pages
+    headline_lower = headline.lower()
+    if any(indicator in headline_lower for indicator in ERROR_INDICATORS):
+        raise ArticleDropped('quality.error_page', f"Looks like error page: {headline}")
+    
+    # Skip articles with suspicious content
+    if 'javascript:void(0)' in content or (
+            word_count if word_count is not None else len(content.split())) < 20:
+        raise ArticleDropped('quality.suspicious_content', f"Suspicious or too short content: {item.get('url')}")
+
+
+def export_article(item, logger, defaults=EXPORT_DEFAULTS):
+    """Fill in the missing ``defaults`` and drop items left without a URL or headline"""
+    for field, default in defaults:
+        if item.get(field) is None:
+            item[field] = default()
+    
+    # Final validation - ensure essential fields are not empty
+    if not item['url'] or not item['headline']:
+        raise ArticleDropped('export.missing_fields', f"Missing essential fields after processing: {item}")
+    
+    # Log successful processing
+    logger.info(f"Successfully processed article: {item['headline'][:50]}...")
+    
+    return item
+
 
 class NewsScraperPipeline:
     def process_item(self, item, spider):
@@ -30,11 +237,42 @@ class NewsScraperPipeline:
 class NewsArticleBasePipeline:
     """Base pipeline with common logging and utility functions"""
     
+    # Stages run by NewsArticleFusedPipeline when FUSED_PIPELINE_ENABLED is set
+    fused = False
+    # Stages run by NewsArticleOffloadPipeline when PIPELINE_OFFLOAD_ENABLED is set
+    offloaded = False
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.stats = None
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        if cls.fused and crawler.settings.getbool('FUSED_PIPELINE_ENABLED'):
+            # NewsArticleFusedPipeline runs this stage itself
+            raise NotConfigured(f"{cls.__name__} is replaced by NewsArticleFusedPipeline")
+        if cls.offloaded and crawler.settings.getbool('PIPELINE_OFFLOAD_ENABLED'):
+            # NewsArticleOffloadPipeline runs this stage in its worker pool
+            raise NotConfigured(f"{cls.__name__} is replaced by NewsArticleOffloadPipeline")
+        return cls.create(crawler)
+    
+    @classmethod
+    def create(cls, crawler):
+        """Build the pipeline from crawler settings, regardless of pipeline mode"""
+        pipeline = cls()
+        pipeline.stats = crawler.stats
+        return pipeline
     
     def process_item(self, item, spider):
         return item
+    
+    def _inc_stat(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+    
+    def _set_stat(self, key, value):
+        if self.stats is not None:
+            self.stats.set_value(key, value)
 
 
 
@@ -48,34 +286,10 @@ class NewsArticleBasePipeline:
 class NewsArticleValidationPipeline(NewsArticleBasePipeline):
     """Validate incoming items and drop invalid ones"""
     
+    fused = True
+    
     def process_item(self, item, spider):
-        # Validate required fields
-        if not item.get('headline'):
-            raise DropItem(f"Missing headline in {item.get('url', 'unknown URL')}")
-        
-        if not item.get('content') and not item.get('summary'):
-            raise DropItem(f"Missing both content and summary in {item.get('url', 'unknown URL')}")
-        
-        # Ensure URL exists and is valid
-        if not item.get('url'):
-            raise DropItem("Missing URL in item")
-        
-        # Validate URL format
-        try:
-            parsed_url = urlparse(item['url'])
-            if not parsed_url.scheme or not parsed_url.netloc:
-                raise DropItem(f"Invalid URL format: {item['url']}")
-        except Exception as e:
-            raise DropItem(f"URL validation error: {e}")
-        
-        # Validate headline length (reasonable limits)
-        if len(item['headline']) > 500:
-            self.logger.warning(f"Very long headline ({len(item['headline'])} chars) in {item['url']}")
-        
-        # Validate content length
-        if item.get('content') and len(item['content']) < 30:
-            self.logger.warning(f"Very short content ({len(item['content'])} chars) in {item['url']}")
-        
+        validate_article(item, self.logger)
         return item
 
 
@@ -92,209 +306,41 @@ class NewsArticleValidationPipeline(NewsArticleBasePipeline):
 class NewsArticleCleaningPipeline(NewsArticleBasePipeline):
     """Clean and normalize article content"""
     
+    fused = True
+    offloaded = True
+    
+    def __init__(self):
+        super().__init__()
+        # All cleaning patterns are compiled once per pipeline
+        self.cleaner = TextCleaner()
+    
     def process_item(self, item, spider):
-        # Clean headline
-        if item.get('headline'):
-            item['headline'] = self._clean_headline(item['headline'], item.get('source', ''))
-        
-        # Clean content
-        if item.get('content'):
-            # Handle Times of India content which is stored as list
-            if isinstance(item['content'], list):
-                item['content'] = ' '.join([str(p).strip() for p in item['content'] if str(p).strip()])
-            item['content'] = self._clean_content(item['content'])
-        
-        # Clean summary
-        if item.get('summary'):
-            item['summary'] = self._clean_summary(item['summary'])
-            
-        # Clean author field
-        if item.get('author'):
-            item['author'] = self._clean_author(item['author'])
-        
-        # Clean keywords
-        if item.get('keywords'):
-            item['keywords'] = self._clean_keywords(item['keywords'])
-        
-        # Clean image URL
-        if item.get('image_url'):
-            item['image_url'] = self._clean_image_url(item['image_url'])
-        
+        clean_article(item, self.cleaner)
         return item
     
     def _clean_headline(self, headline, source):
         """Clean headlines by removing source names and standardizing format"""
-        if not headline:
-            return ""
-            
-        # Convert to string if not already
-        headline = str(headline).strip()
-        
-        # Remove HTML tags if any
-        headline = remove_tags(headline)
-        
-        # Remove source name from headline
-        source_patterns = {
-            'NDTV': [r'\s*[-|]\s*NDTV\s*$', r'\s*[-|]\s*NDTV\.com\s*$'],
-            'Telegraph India': [r'\s*[-|]\s*Telegraph India\s*$', r'\s*[-|]\s*The Telegraph\s*$'],
-            'Indian Express': [r'\s*[-|]\s*The Indian Express\s*$', r'\s*\|\s*Express\s*$', r'\s*[-|]\s*Indian Express\s*$'],
-            'Times of India': [r'\s*[-|]\s*Times of India\s*$', r'\s*[-|]\s*TOI\s*$', r'\s*[-|]\s*The Times of India\s*$']
-        }
-        
-        if source in source_patterns:
-            for pattern in source_patterns[source]:
-                headline = re.sub(pattern, '', headline, flags=re.IGNORECASE)
-        
-        # Remove extra whitespace and normalize
-        headline = re.sub(r'\s+', ' ', headline).strip()
-        
-        # Fix capitalization if headline is ALL CAPS
-        if headline.isupper() and len(headline) > 10:
-            headline = headline.title()
-        
-        # Remove quotes if they wrap the entire headline
-        if headline.startswith('"') and headline.endswith('"'):
-            headline = headline[1:-1]
-        if headline.startswith("'") and headline.endswith("'"):
-            headline = headline[1:-1]
-        
-        return headline.strip()
+        return self.cleaner.clean_headline(headline, source)
     
     def _clean_content(self, content):
         """Clean article content"""
-        if not content:
-            return ""
-            
-        # Convert to string if not already
-        content = str(content)
-        
-        # Remove any HTML tags that might be present
-        content = remove_tags(content)
-        
-        # Normalize whitespace
-        content = re.sub(r'\s+', ' ', content).strip()
-        
-        # Remove common footer phrases (case insensitive)
-        footer_patterns = [
-            r'(?i)follow us on.*$',
-            r'(?i)for all the latest.*news.*$',
-            r'(?i)download the.*app.*$',
-            r'(?i)click here to.*$',
-            r'(?i)subscribe to our newsletter.*$',
-            r'(?i)follow our.*channel.*$',
-            r'(?i)for more news.*visit.*$',
-            r'(?i)copyright ©.*$',
-            r'(?i)share this article.*$',
-            r'(?i)tags:.*$',
-            r'(?i)also read:.*$',
-            r'(?i)read more:.*$',
-            r'(?i)get the latest.*updates.*$',
-            r'(?i)stay updated.*$'
-        ]
-        
-        for pattern in footer_patterns:
-            content = re.sub(pattern, '', content)
-        
-        # Remove URLs
-        content = re.sub(r'https?://\S+', '', content)
-        
-        # Remove email addresses
-        content = re.sub(r'\S+@\S+\.\S+', '', content)
-        
-        # Remove excessive punctuation
-        content = re.sub(r'[.]{3,}', '...', content)
-        content = re.sub(r'[!]{2,}', '!', content)
-        content = re.sub(r'[?]{2,}', '?', content)
-        
-        # Final whitespace cleanup
-        content = re.sub(r'\s+', ' ', content).strip()
-        
-        return content
+        return self.cleaner.clean_content(content)
     
     def _clean_summary(self, summary):
         """Clean article summary"""
-        if not summary:
-            return ""
-            
-        # Convert to string
-        summary = str(summary).strip()
-        
-        # Remove any HTML tags
-        summary = remove_tags(summary)
-        
-        # Normalize whitespace
-        summary = re.sub(r'\s+', ' ', summary).strip()
-        
-        # Remove phrases like "Read full article here" or "Click to read more"
-        summary = re.sub(r'(?i)read (full|more|article).*$', '', summary)
-        summary = re.sub(r'(?i)click (here|to).*$', '', summary)
-        summary = re.sub(r'(?i)continue reading.*$', '', summary)
-        
-        return summary.strip()
+        return self.cleaner.clean_summary(summary)
     
     def _clean_author(self, author):
         """Clean author field"""
-        if not author:
-            return ""
-        
-        # Convert to string
-        author = str(author).strip()
-        
-        # Remove HTML tags
-        author = remove_tags(author)
-        
-        # Remove prefixes like "By" or "Written by" - fix regex patterns
-        author = re.sub(r'(?i)^by\s+', '', author)
-        author = re.sub(r'(?i)^written by\s+', '', author)
-        author = re.sub(r'(?i)^reported by\s+', '', author)
-        author = re.sub(r'(?i)^with inputs from\s+', '', author)
-        
-        # Remove suffixes like "| Staff Reporter" or similar
-        author = re.sub(r'(?i)\|\s*staff.*$', '', author)
-        author = re.sub(r'(?i)\|\s*correspondent.*$', '', author)
-        
-        # Clean up multiple authors separated by commas or 'and'
-        author = re.sub(r'\s+and\s+', ', ', author)
-        
-        return author.strip()
+        return self.cleaner.clean_author(author)
     
     def _clean_keywords(self, keywords):
         """Clean keywords field"""
-        if not keywords:
-            return ""
-        
-        # Convert to string
-        keywords = str(keywords).strip()
-        
-        # Remove HTML tags
-        keywords = remove_tags(keywords)
-        
-        # Normalize whitespace
-        keywords = re.sub(r'\s+', ' ', keywords).strip()
-        
-        return keywords
+        return self.cleaner.clean_keywords(keywords)
     
     def _clean_image_url(self, image_url):
         """Clean and validate image URL"""
-        if not image_url:
-            return ""
-        
-        # Convert to string and strip
-        image_url = str(image_url).strip()
-        
-        # Remove any surrounding quotes
-        image_url = image_url.strip('\'"')
-        
-        # Validate URL format
-        try:
-            parsed = urlparse(image_url)
-            if not parsed.scheme:
-                # If no scheme, assume https
-                image_url = 'https:' + image_url if image_url.startswith('//') else 'https://' + image_url
-        except:
-            return ""
-        
-        return image_url
+        return self.cleaner.clean_image_url(image_url)
 
 
 
@@ -312,118 +358,31 @@ class NewsArticleCleaningPipeline(NewsArticleBasePipeline):
 class NewsArticleEnrichmentPipeline(NewsArticleBasePipeline):
     """Enrich articles with additional data"""
     
+    fused = True
+    offloaded = True
+    
+    def __init__(self, date_cache_size=4096):
+        super().__init__()
+        self.dates = DateNormalizer(cache_size=date_cache_size)
+    
+    @classmethod
+    def create(cls, crawler):
+        pipeline = cls(date_cache_size=crawler.settings.getint('DATE_CACHE_SIZE', 4096))
+        pipeline.stats = crawler.stats
+        return pipeline
+    
     def process_item(self, item, spider):
-        # Add timestamp when scraped if not present
-        if 'scraped_at' not in item or not item['scraped_at']:
-            item['scraped_at'] = datetime.now().isoformat()
-        
-        # Calculate word count
-        content = item.get('content', '')
-        if content:
-            item['word_count'] = len(str(content).split())
-            
-            # Calculate estimated reading time (avg 200 words per minute)
-            item['read_time'] = max(1, round(item['word_count'] / 200))
-        else:
-            item['word_count'] = 0
-            item['read_time'] = 0
-        
-        # Process date fields
-        if item.get('date_published') and ('date_machine' not in item or not item['date_machine']):
-            item['date_machine'] = self._standardize_date(item['date_published'])
-        
-        # Ensure tags is a list
-        if 'tags' not in item:
-            item['tags'] = []
-        elif item['tags'] and not isinstance(item['tags'], list):
-            if isinstance(item['tags'], str):
-                # Convert comma-separated string to list
-                item['tags'] = [tag.strip() for tag in item['tags'].split(',') if tag.strip()]
-            else:
-                # Convert to list if it's some other type
-                item['tags'] = [str(item['tags'])]
-        
-        # Extract keywords as tags if no tags present
-        if (not item['tags']) and item.get('keywords'):
-            if isinstance(item['keywords'], str):
-                keywords = [kw.strip() for kw in item['keywords'].split(',') if kw.strip()]
-                item['tags'] = keywords[:10]  # Limit to 10 tags
-        
-        # Ensure all string fields are properly set
-        string_fields = ['headline', 'content', 'summary', 'author', 'date_published', 
-                        'date_machine', 'keywords', 'image_url', 'category', 'subcategory', 'source']
-        
-        for field in string_fields:
-            if field not in item or item[field] is None:
-                item[field] = ""
-            else:
-                item[field] = str(item[field]).strip()
-        
+        enrich_article(item, self._standardize_date)
         return item
     
-    def _standardize_date(self, date_str):
+    def _standardize_date(self, date_str, source=''):
         """Convert various date formats to ISO format when possible"""
-        if not date_str:
-            return ""
-            
-        date_str = str(date_str).strip()
-        
-        # Already in ISO format
-        if re.match(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}', date_str):
-            return date_str
-        
-        # Common date formats
-        date_formats = [
-            '%Y-%m-%d %H:%M:%S',
-            '%Y-%m-%dT%H:%M:%S',
-            '%Y-%m-%dT%H:%M:%SZ',
-            '%d %b %Y, %H:%M',
-            '%B %d, %Y %H:%M',
-            '%d %B %Y, %H:%M:%S',
-            '%d %b %Y %H:%M:%S',
-            '%A %B %d %Y',
-            '%a, %b %d, %Y',
-            '%Y/%m/%d',
-            '%d/%m/%Y',
-            '%m/%d/%Y',
-            '%Y-%m-%d',
-            '%d-%m-%Y',
-            '%d %b %Y',
-            '%B %d, %Y'
-        ]
-        
-        # Try each format
-        for fmt in date_formats:
-            try:
-                dt = datetime.strptime(date_str, fmt)
-                return dt.isoformat()
-            except ValueError:
-                continue
-        
-        # Try to extract date with regex if standard formats fail
-        date_patterns = [
-            r'(\d{4}-\d{2}-\d{2})',  # YYYY-MM-DD
-            r'(\d{2}/\d{2}/\d{4})',  # MM/DD/YYYY or DD/MM/YYYY
-            r'(\d{1,2}\s+\w+\s+\d{4})',  # D Month YYYY
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, date_str)
-            if match:
-                try:
-                    date_part = match.group(1)
-                    # Try to parse the extracted date
-                    for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d %B %Y', '%d %b %Y']:
-                        try:
-                            dt = datetime.strptime(date_part, fmt)
-                            return dt.isoformat()
-                        except ValueError:
-                            continue
-                except:
-                    continue
-        
-        # Return original if no format matches
-        return date_str
+        return self.dates.normalize(date_str, source)
+    
+    def close_spider(self, spider):
+        # Expose how often the date fast paths and cache were used
+        for key, value in self.dates.stats().items():
+            self._set_stat(f'dates/{key}', value)
 
 
 
@@ -446,29 +405,89 @@ class NewsArticleEnrichmentPipeline(NewsArticleBasePipeline):
 
 
 class NewsArticleDeduplicationPipeline(NewsArticleBasePipeline):
-    """Deduplicate articles based on URL and content similarity"""
+    """Deduplicate articles based on URL and content similarity
     
-    def __init__(self):
+    Seen keys live in a DedupStore so they survive across crawl runs and are
+    shared by every spider using the same DEDUP_STORE_PATH. With
+    DEDUP_NEAR_DUPLICATE_THRESHOLD set, content is compared with MinHash/LSH
+    so lightly edited copies of the same wire story are caught too;
+    otherwise an exact md5 of the headline and start of the content is used.
+    """
+    
+    fused = True
+    
+    def __init__(self, store_path=':memory:', batch_size=500, stats=None,
+                 near_threshold=None, num_perm=128, shingle_size=5):
         super().__init__()
-        self.urls_seen = set()
-        self.content_hashes = set()
+        self.store = DedupStore(store_path, batch_size=batch_size)
+        self.stats = stats
+        self.near_duplicates = None
+        if near_threshold:
+            self.near_duplicates = NearDuplicateIndex(
+                self.store, threshold=near_threshold, num_perm=num_perm, shingle_size=shingle_size)
+    
+    @classmethod
+    def create(cls, crawler):
+        settings = crawler.settings
+        store_path = settings.get('DEDUP_STORE_PATH')
+        if store_path:
+            store_path = data_path(store_path)
+        return cls(
+            store_path=store_path or ':memory:',
+            batch_size=settings.getint('DEDUP_BATCH_SIZE', 500),
+            stats=crawler.stats,
+            near_threshold=settings.getfloat('DEDUP_NEAR_DUPLICATE_THRESHOLD', 0.0),
+            num_perm=settings.getint('DEDUP_MINHASH_PERMUTATIONS', 128),
+            shingle_size=settings.getint('DEDUP_SHINGLE_SIZE', 5),
+        )
+    
+    def open_spider(self, spider):
+        self.store.open()
+        if self.near_duplicates:
+            self.near_duplicates.open()
+        self.logger.info(f"Dedup store {self.store.path} holds {len(self.store)} known keys")
+    
+    def close_spider(self, spider):
+        if self.near_duplicates:
+            self.near_duplicates.flush()
+        self.store.close()
     
     def process_item(self, item, spider):
+        # Re-crawls of known URLs (KNOWN_URL_REVISITS) are not duplicates of
+        # their earlier copy: they pass, and their content is still recorded
+        revisit = item.get('revisit', False)
+        if revisit:
+            self._inc_stat('dedup/revisit')
+        
         # Check URL duplication
         url = item.get('url', '')
-        if url in self.urls_seen:
-            raise DropItem(f"Duplicate URL: {url}")
-        
-        # Create content hash for similarity detection
-        content_for_hash = f"{item.get('headline', '')}{item.get('content', '')[:500]}"
-        content_hash = hashlib.md5(content_for_hash.encode('utf-8')).hexdigest()
-        
-        if content_hash in self.content_hashes:
-            raise DropItem(f"Duplicate content detected for: {url}")
+        url_hash = url_key(canonical_url(url))
+        if not revisit and self.store.contains(KIND_URL, url_hash):
+            self._inc_stat('dedup/duplicate_url')
+            raise ArticleDropped('deduplication.duplicate_url', f"Duplicate URL: {url}")
+        
+        if self.near_duplicates:
+            # Near-duplicate detection over the full text
+            index = self.near_duplicates
+            signature = index.hasher.signature(f"{item.get('headline', '')} {item.get('content', '')}")
+            buckets = index.bucket_keys(signature)
+            match = not revisit and index.query(signature, buckets)
+            if match:
+                self._inc_stat('dedup/duplicate_content')
+                raise ArticleDropped('deduplication.near_duplicate', f"Near-duplicate content ({match[1]:.2f} similar to {match[0]}) for: {url}")
+            index.add(url, signature, buckets)
+        else:
+            # Create content hash for similarity detection
+            content_for_hash = f"{item.get('headline', '')}{item.get('content', '')[:500]}"
+            content_hash = hashlib.md5(content_for_hash.encode('utf-8')).digest()
+            
+            if not revisit and self.store.contains(KIND_CONTENT, content_hash):
+                self._inc_stat('dedup/duplicate_content')
+                raise ArticleDropped('deduplication.duplicate_content', f"Duplicate content detected for: {url}")
+            self.store.add(KIND_CONTENT, content_hash, spider.name)
         
         # Add to seen items
-        self.urls_seen.add(url)
-        self.content_hashes.add(content_hash)
+        self.store.add(KIND_URL, url_hash, spider.name)
         
         return item
 
@@ -491,29 +510,10 @@ class NewsArticleDeduplicationPipeline(NewsArticleBasePipeline):
 class NewsArticleQualityPipeline(NewsArticleBasePipeline):
     """Filter articles based on quality metrics"""
     
+    fused = True
+    
     def process_item(self, item, spider):
-        # Quality checks
-        headline = item.get('headline', '')
-        content = item.get('content', '')
-        
-        # Skip articles with very short headlines
-        if len(headline) < 10:
-            raise DropItem(f"Headline too short ({len(headline)} chars): {item.get('url')}")
-        
-        # Skip articles with very short content (unless they have a good summary)
-        if len(content) < 100 and len(item.get('summary', '')) < 50:
-            raise DropItem(f"Content too short ({len(content)} chars): {item.get('url')}")
-        
-        # Skip articles that look like error pages
-        error_indicators = ['404', 'not found', 'page not found', 'error', 'access denied']
-        headline_lower = headline.lower()
-        if any(indicator in headline_lower for indicator in error_indicators):
-            raise DropItem(f"Looks like error page: {headline}")
-        
-        # Skip articles with suspicious content
-        if 'javascript:void(0)' in content or len(content.split()) < 20:
-            raise DropItem(f"Suspicious or too short content: {item.get('url')}")
-        
+        check_quality(item)
         return item
 
 
@@ -535,37 +535,396 @@ class NewsArticleQualityPipeline(NewsArticleBasePipeline):
 class NewsArticleExportPipeline(NewsArticleBasePipeline):
     """Final processing before export - ensures all fields exist with proper defaults"""
     
+    fused = True
+    
     def process_item(self, item, spider):
-        # Define default values for all fields
-        field_defaults = {
-            'url': '',
-            'headline': '',
-            'content': '',
-            'summary': '',
-            'author': '',
-            'date_published': '',
-            'date_machine': '',
-            'image_url': '',
-            'keywords': '',
-            'tags': [],
-            'category': '',
-            'subcategory': '',
-            'source': '',
-            'scraped_at': datetime.now().isoformat(),
-            'word_count': 0,
-            'read_time': 0
-        }
-        
-        # Ensure all fields are present with proper defaults
-        for field, default_value in field_defaults.items():
-            if field not in item or item[field] is None:
-                item[field] = default_value
-        
-        # Final validation - ensure essential fields are not empty
-        if not item['url'] or not item['headline']:
-            raise DropItem(f"Missing essential fields after processing: {item}")
-        
-        # Log successful processing
-        self.logger.info(f"Successfully processed article: {item['headline'][:50]}...")
-        
-        return item
\ No newline at end of file
+        return export_article(item, self.logger)
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+class NewsArticleFusedPipeline(NewsArticleBasePipeline):
+    """Validation, cleaning, enrichment, quality, deduplication and export in one pass
+    
+    Enabled with FUSED_PIPELINE_ENABLED, which also disables the six stage
+    pipelines. The stages' rules are the same functions (validate_article,
+    clean_article, enrich_article, check_quality, export_article and the
+    deduplication pipeline), so items are dropped for the same reasons and
+    leave with the same fields, but every field is read once and derived
+    values (cleaned strings, word count) are reused instead of recomputed by
+    each stage. Drops are still counted per stage in pipeline/<stage>/dropped.
+    """
+    
+    # Fields the export stage may still have to default after enrichment,
+    # every string field is already set by then
+    EXPORT_PLAN = tuple(
+        (field, default) for field, default in EXPORT_DEFAULTS if field not in STRING_FIELDS)
+    
+    def __init__(self, enrichment, dedup, stats=None):
+        super().__init__()
+        self.stats = stats
+        self.cleaner = TextCleaner()
+        self.enrichment = enrichment
+        self.dedup = dedup
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('FUSED_PIPELINE_ENABLED'):
+            raise NotConfigured
+        return cls(
+            enrichment=NewsArticleEnrichmentPipeline.create(crawler),
+            dedup=NewsArticleDeduplicationPipeline.create(crawler),
+            stats=crawler.stats,
+        )
+    
+    def open_spider(self, spider):
+        self.dedup.open_spider(spider)
+    
+    def close_spider(self, spider):
+        self.enrichment.close_spider(spider)
+        self.dedup.close_spider(spider)
+    
+    def process_item(self, item, spider):
+        stage = 'validation'
+        try:
+            validate_article(item, self.logger)
+            stage = 'cleaning'
+            clean_article(item, self.cleaner)
+            stage = 'enrichment'
+            word_count = enrich_article(item, self.enrichment._standardize_date)
+            stage = 'quality'
+            # word_count was taken from the same content by the enrichment stage
+            check_quality(item, word_count)
+            stage = 'deduplication'
+            self.dedup.process_item(item, spider)
+            stage = 'export'
+            return export_article(item, self.logger, self.EXPORT_PLAN)
+        except DropItem:
+            self._inc_stat(f'pipeline/{stage}/dropped')
+            raise
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+# Cleaning and enrichment stage instances of the current offload worker
+# (one per thread, or one per process with the process pool)
+_offload_worker = threading.local()
+
+
+def init_offload_worker(date_cache_size=4096):
+    """Executor initializer: build the worker's own cleaning and enrichment stages"""
+    _offload_worker.stages = (
+        NewsArticleCleaningPipeline(), NewsArticleEnrichmentPipeline(date_cache_size=date_cache_size))
+    _offload_worker.id = (os.getpid(), threading.get_ident())
+
+
+def clean_and_enrich(fields):
+    """Run the cleaning and enrichment stages on a plain dict of item fields
+    
+    Returns the fields, the worker's id and its DateNormalizer stats so far.
+    """
+    if getattr(_offload_worker, 'stages', None) is None:
+        init_offload_worker()
+    stages = _offload_worker.stages
+    for stage in stages:
+        fields = stage.process_item(fields, None)
+    return fields, _offload_worker.id, stages[-1].dates.stats()
+
+
+class NewsArticleOffloadPipeline(NewsArticleBasePipeline):
+    """Run the cleaning and enrichment stages off the reactor thread
+    
+    Enabled with PIPELINE_OFFLOAD_ENABLED, which disables the in-thread
+    cleaning and enrichment pipelines. Items are handed to a bounded thread
+    or process pool (PIPELINE_OFFLOAD_EXECUTOR, PIPELINE_OFFLOAD_WORKERS);
+    at most CONCURRENT_ITEMS items are in the pool at once and they leave
+    this stage in the order they entered it, so later stages (deduplication
+    in particular) see the same sequence as without offloading.
+    """
+    
+    def __init__(self, executor='thread', workers=2, max_pending=100, date_cache_size=4096, stats=None):
+        super().__init__()
+        self.executor_kind = executor
+        self.workers = workers
+        self.max_pending = max_pending
+        self.date_cache_size = date_cache_size
+        self.stats = stats
+        self.executor = None
+        self.offloader = None
+        # worker id -> DateNormalizer stats of that worker
+        self.date_stats = {}
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('PIPELINE_OFFLOAD_ENABLED'):
+            raise NotConfigured
+        if settings.getbool('FUSED_PIPELINE_ENABLED'):
+            raise NotConfigured("Offloading is not used together with FUSED_PIPELINE_ENABLED")
+        return cls(
+            executor=settings.get('PIPELINE_OFFLOAD_EXECUTOR', 'thread'),
+            workers=settings.getint('PIPELINE_OFFLOAD_WORKERS', 2),
+            max_pending=settings.getint('CONCURRENT_ITEMS', 100),
+            date_cache_size=settings.getint('DATE_CACHE_SIZE', 4096),
+            stats=crawler.stats,
+        )
+    
+    def open_spider(self, spider):
+        self.executor = make_executor(
+            self.executor_kind, self.workers,
+            initializer=init_offload_worker, initargs=(self.date_cache_size,))
+        self.offloader = OrderedOffloader(self.executor, self.max_pending)
+    
+    def close_spider(self, spider):
+        self._set_stat('offload/max_in_flight', self.offloader.max_in_flight)
+        self.executor.shutdown(wait=True)
+        # The dates/ stats of the enrichment stage, summed over the workers;
+        # each worker learns the sources' formats on its own
+        totals = {}
+        for worker_stats in self.date_stats.values():
+            for key, value in worker_stats.items():
+                if key == 'learned_sources':
+                    totals[key] = max(totals.get(key, 0), value)
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        for key, value in totals.items():
+            self._set_stat(f'dates/{key}', value)
+    
+    async def process_item(self, item, spider):
+        fields, worker, date_stats = await self.offloader.run(
+            clean_and_enrich, ItemAdapter(item).asdict())
+        # A worker's results can come back out of order, but none of its
+        # stats ever goes down
+        previous = self.date_stats.get(worker)
+        if previous is not None:
+            date_stats = {key: max(value, previous[key]) for key, value in date_stats.items()}
+        self.date_stats[worker] = date_stats
+        
+        # Existing fields keep their position, new ones are appended in the
+        # order the enrichment stage added them
+        for field, value in fields.items():
+            item[field] = value
+        
+        self._inc_stat('offload/items')
+        return item
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+class NewsArticleJsonLinesExportPipeline(NewsArticleBasePipeline):
+    """Stream exported articles into rotated, compressed JSON lines files
+    
+    Enabled by JSONL_EXPORT_DIR. Files rotate after JSONL_EXPORT_MAX_BYTES
+    (uncompressed) or JSONL_EXPORT_MAX_SECONDS and are listed in the
+    directory's manifest.jsonl once complete, see news_scraper.export.
+    """
+    
+    def __init__(self, directory, max_bytes, max_seconds, compression, compression_level=None, stats=None):
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compression = compression
+        self.compression_level = compression_level
+        self.stats = stats
+        self.writer = None
+        self.rotation_check = None
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        directory = settings.get('JSONL_EXPORT_DIR')
+        if not directory:
+            raise NotConfigured
+        return cls(
+            directory=data_path(directory),
+            max_bytes=settings.getint('JSONL_EXPORT_MAX_BYTES', 64 * 1024 * 1024),
+            max_seconds=settings.getint('JSONL_EXPORT_MAX_SECONDS', 3600),
+            compression=settings.get('JSONL_EXPORT_COMPRESSION') or None,
+            compression_level=settings.getint('JSONL_EXPORT_COMPRESSION_LEVEL') or None,
+            stats=crawler.stats,
+        )
+    
+    def open_spider(self, spider):
+        self.writer = RotatingJsonLinesWriter(
+            self.directory, spider.name,
+            max_bytes=self.max_bytes,
+            max_seconds=self.max_seconds,
+            compression=self.compression,
+            compression_level=self.compression_level,
+        )
+        if self.max_seconds:
+            # Publish idle files on time too, not only when the next item arrives
+            self.rotation_check = task.LoopingCall(self.writer.rotate_if_due)
+            self.rotation_check.start(min(60, self.max_seconds), now=False)
+    
+    def close_spider(self, spider):
+        if self.rotation_check is not None and self.rotation_check.running:
+            self.rotation_check.stop()
+        self.writer.close()
+    
+    def process_item(self, item, spider):
+        self.writer.write(item)
+        self._inc_stat('jsonl_export/records')
+        return item
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+class NewsArticleColumnarExportPipeline(NewsArticleBasePipeline):
+    """Write exported articles to a partitioned Parquet/Arrow dataset for the ML stages
+    
+    Enabled by COLUMNAR_EXPORT_DIR (needs pyarrow). Rows are written every
+    COLUMNAR_EXPORT_BATCH_SIZE items, partitioned by source and publication
+    date, see news_scraper.columnar.
+    """
+    
+    def __init__(self, directory, file_format='parquet', batch_size=1000, compression='zstd', stats=None):
+        super().__init__()
+        self.writer = ColumnarBatchWriter(directory, file_format, batch_size, compression)
+        self.stats = stats
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        directory = settings.get('COLUMNAR_EXPORT_DIR')
+        if not directory:
+            raise NotConfigured
+        if columnar.pa is None:
+            raise NotConfigured("COLUMNAR_EXPORT_DIR is set but pyarrow is not installed")
+        return cls(
+            directory=directory,
+            file_format=settings.get('COLUMNAR_EXPORT_FORMAT', 'parquet'),
+            batch_size=settings.getint('COLUMNAR_EXPORT_BATCH_SIZE', 1000),
+            compression=settings.get('COLUMNAR_EXPORT_COMPRESSION', 'zstd'),
+            stats=crawler.stats,
+        )
+    
+    def close_spider(self, spider):
+        self.writer.close()
+        self._set_stat('columnar_export/files', self.writer.files_written)
+        self._set_stat('columnar_export/rows', self.writer.rows_written)
+    
+    def process_item(self, item, spider):
+        self.writer.add(ItemAdapter(item).asdict())
+        return item
+
+    
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+class NewsArticleStoragePipeline(NewsArticleBasePipeline):
+    """Store exported articles in a normalized SQLite database
+    
+    Enabled by ARTICLE_STORE_PATH. Articles are upserted on their canonical
+    URL in batches of ARTICLE_STORE_BATCH_SIZE, or every
+    ARTICLE_STORE_FLUSH_SECONDS, from a writer thread, and indexed for
+    full-text search unless ARTICLE_SEARCH_ENABLED is off, see
+    news_scraper.storage and news_scraper.search.
+    """
+    
+    def __init__(self, store_path=':memory:', batch_size=200, flush_seconds=5, search=True, stats=None):
+        super().__init__()
+        self.store = ArticleStore(store_path, batch_size=batch_size, search=search)
+        self.flush_seconds = flush_seconds
+        self.stats = stats
+        self.flush_check = None
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        store_path = settings.get('ARTICLE_STORE_PATH')
+        if not store_path:
+            raise NotConfigured
+        if store_path != ':memory:':
+            store_path = data_path(store_path)
+        return cls(
+            store_path=store_path,
+            batch_size=settings.getint('ARTICLE_STORE_BATCH_SIZE', 200),
+            flush_seconds=settings.getfloat('ARTICLE_STORE_FLUSH_SECONDS', 5),
+            search=settings.getbool('ARTICLE_SEARCH_ENABLED', True),
+            stats=crawler.stats,
+        )
+    
+    def open_spider(self, spider):
+        self.store.open()
+        if self.flush_seconds:
+            # Partial batches reach the database too while items trickle in
+            self.flush_check = task.LoopingCall(self.store.flush)
+            self.flush_check.start(self.flush_seconds, now=False)
+    
+    def close_spider(self, spider):
+        if self.flush_check is not None and self.flush_check.running:
+            self.flush_check.stop()
+        self.store.close()
+        self._set_stat('storage/articles', self.store.written)
+        self._set_stat('storage/transactions', self.store.transactions)
+        if self.store.failed:
+            self._set_stat('storage/failed', self.store.failed)
+    
+    def process_item(self, item, spider):
+        self.store.add(item)
+        return item
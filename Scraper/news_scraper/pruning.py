@@ -0,0 +1,112 @@
+# Remove markup the spiders never read from HTML bodies before parsing.
+#
+# Inline scripts, styles, <noscript>, <svg> icons, comments and ad containers
+# are most of a news page. Cutting them out of the raw bytes in one forward
+# scan, before lxml builds a tree, makes the tree smaller for every selector
+# that runs on it afterwards. JSON-LD scripts are kept: the structured data
+# extractor reads them.
+#
+# The scan only removes an element when its end tag is found (for <svg> and
+# ad containers, the matching one at the same nesting depth); anything it
+# cannot delimit is left in the page.
+
+import re
+
+
+# Elements removed with their content; <script type="application/ld+json"> is kept
+RAW_TEXT_TAGS = (b'script', b'style', b'noscript', b'svg')
+# Of those, the ones that can contain themselves
+NESTED_TAGS = (b'svg',)
+
+# Elements removed when a class or id names an ad slot or a recommendation widget
+CONTAINER_TAGS = (b'div', b'aside', b'section', b'ins', b'iframe')
+
+AD_TOKEN_RE = re.compile(
+    rb'^(?:ads?|adbox|adslot|adunit|adsbygoogle|advert\w*|advertisement\w*|stickyad|'
+    rb'ad[-_]\w+|ad\d\w*|\w*[a-z]Ad(?:\d|[-_]|$)\w*|div-gpt-ad\w*|google_ads\w*|dfp\w*|'
+    rb'taboola\w*|outbrain\w*|OUTBRAIN|colombia\w*|sponsored\w*)$'
+)
+
+# Start of a comment, a raw text element, or a container whose attributes
+# mention an ad at all (is_ad_container() decides). Tag names are matched in
+# lower case only, which is what the sources serve: one case-sensitive
+# search per candidate keeps the scan cheaper than the parsing it saves.
+START_RE = re.compile(
+    rb'<(?:!--|(' + b'|'.join(RAW_TEXT_TAGS) + rb')\b([^>]*)>|('
+    + b'|'.join(CONTAINER_TAGS) + rb')\b([^>]*?(?:[aA]d|taboola|outbrain|colombia|sponsor)[^>]*)>)'
+)
+END_RE = {tag: re.compile(rb'</' + tag + rb'\s*>', re.IGNORECASE) for tag in RAW_TEXT_TAGS}
+NESTING_RE = {tag: re.compile(rb'<(/?)' + tag + rb'\b[^>]*>', re.IGNORECASE)
+              for tag in CONTAINER_TAGS + NESTED_TAGS}
+ATTRIBUTE_RE = re.compile(rb'''\b(class|id)\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+JSON_LD_RE = re.compile(rb'''type\s*=\s*["']?application/ld\+json''', re.IGNORECASE)
+
+
+def is_ad_container(attributes, ad_token=AD_TOKEN_RE):
+    for match in ATTRIBUTE_RE.finditer(attributes):
+        value = match.group(2) if match.group(2) is not None else match.group(3)
+        tokens = value.split() if match.group(1).lower() == b'class' else (value.strip(),)
+        if any(ad_token.match(token) for token in tokens):
+            return True
+    return False
+
+
+def _container_end(body, tag, start):
+    """End offset of the element whose start tag ends at ``start``, or None
+    when its end tag is missing"""
+    depth = 1
+    for match in NESTING_RE[tag].finditer(body, start):
+        if match.group(1):
+            depth -= 1
+            if not depth:
+                return match.end()
+        elif not match.group(0).endswith(b'/>'):
+            depth += 1
+    return None
+
+
+def prune_html(body, ad_containers=True):
+    """``body`` without the removable elements and comments"""
+    parts = []
+    pos = 0
+    scan = 0
+    while True:
+        match = START_RE.search(body, scan)
+        if match is None:
+            break
+        start = match.start()
+        if match.group(1) is None and match.group(3) is None:
+            end = body.find(b'-->', match.end())
+            if end < 0:
+                break
+            end += 3
+        elif match.group(1) in NESTED_TAGS:
+            if match.group(2).endswith(b'/'):
+                end = match.end()
+            else:
+                end = _container_end(body, match.group(1), match.end())
+        elif match.group(1) is not None:
+            tag = match.group(1).lower()
+            close = END_RE[tag].search(body, match.end())
+            if close is None:
+                # An unterminated script or style runs to the end of the page
+                break
+            end = close.end()
+            if tag == b'script' and JSON_LD_RE.search(match.group(2)):
+                scan = end
+                continue
+        elif ad_containers and is_ad_container(match.group(4)):
+            end = _container_end(body, match.group(3).lower(), match.end())
+        else:
+            end = None
+
+        if end is None:
+            scan = match.end()
+            continue
+        parts.append(body[pos:start])
+        pos = scan = end
+
+    if not parts:
+        return body
+    parts.append(body[pos:])
+    return b''.join(parts)
@@ -0,0 +1,168 @@
+# Full-text search over the article store (see news_scraper.storage).
+#
+#     search = ArticleSearch('.scrapy/articles.sqlite3')
+#     search.open()
+#     results = search.search('monsoon rainfall', page=2, source='Times of India')
+#     results['total'], results['hits'][0]['snippet']
+#
+# Queries are plain text: every word has to match (stemmed, case and accent
+# insensitive), "quoted phrases" match as phrases and a trailing * matches a
+# prefix (elect* finds election and electoral). FTS5 operators and other
+# punctuation are not interpreted, so no query is a syntax error. Hits are
+# ranked by BM25, headline matches weighing most, and come with a snippet of
+# the best matching column: HTML-escaped text, matched terms in <mark>.
+#
+# Ranking costs time in proportion to the number of matches, so a query
+# matching more than ``max_ranked`` articles (a word in most of them) ranks
+# only the most recently stored ``max_ranked`` of them, and pages through
+# those. 'total' is still the number of all matches.
+
+import html
+import re
+
+from news_scraper import sqlite
+from news_scraper.storage import SEARCH_WEIGHTS
+
+
+MAX_PER_PAGE = 100
+
+# "a phrase", or a word with an optional prefix *
+QUERY_TERM = re.compile(r'"([^"]*)"?|(\w+)(\*)?')
+WORD = re.compile(r'\w+')
+
+# Placed around matched terms by snippet(), replaced after escaping the text
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+BM25 = f'bm25(articles_fts, {", ".join(map(str, SEARCH_WEIGHTS))})'
+
+HIT_COLUMNS = (
+    'id', 'url', 'headline', 'summary', 'source', 'category', 'subcategory',
+    'date_published', 'date_machine', 'published_at', 'image_url', 'department', 'sentiment',
+)
+
+
+def fts_query(text):
+    """FTS5 query matching every word and phrase of ``text``, '' when there are none"""
+    terms = []
+    for phrase, word, prefix in QUERY_TERM.findall(text):
+        if word:
+            terms.append(f'"{word}"{prefix}')
+            continue
+        words = WORD.findall(phrase)
+        if words:
+            terms.append(f'"{" ".join(words)}"')
+    return ' '.join(terms)
+
+
+def render_snippet(snippet, highlight=('<mark>', '</mark>')):
+    """HTML-escaped snippet with the matched terms wrapped in ``highlight``"""
+    start, end = highlight
+    return html.escape(snippet, quote=False).replace(MARK_START, start).replace(MARK_END, end)
+
+
+class ArticleSearch:
+    """Ranked, paginated full-text queries on an article store"""
+
+    def __init__(self, path, snippet_tokens=24, highlight=('<mark>', '</mark>'), max_ranked=5000):
+        self.path = path
+        self.snippet_tokens = snippet_tokens
+        self.highlight = highlight
+        self.max_ranked = max_ranked
+        self.conn = None
+
+    def open(self):
+        if self.conn is not None:
+            return
+        self.conn = sqlite.connect_readonly(self.path)
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.conn.close()
+        self.conn = None
+
+    def search(self, text, page=1, per_page=20, source=None, category=None, labeled=False):
+        """{'query', 'total', 'page', 'per_page', 'hits'} for the ``page``th
+        page of the articles matching ``text``, best first; only those with a
+        department when ``labeled``"""
+        page = max(1, int(page))
+        per_page = min(max(1, int(per_page)), MAX_PER_PAGE)
+        results = {'query': text, 'total': 0, 'page': page, 'per_page': per_page, 'hits': []}
+        query = fts_query(text)
+        if not query:
+            return results
+
+        where = ['articles_fts MATCH ?']
+        params = [query]
+        if source is not None:
+            where.append('a.source_id = (SELECT id FROM sources WHERE name = ?)')
+            params.append(source)
+        if category is not None:
+            where.append('a.category = ?')
+            params.append(category)
+        # CROSS JOIN keeps the full-text match as the outer loop, instead of
+        # one match per article of the category
+        joins = 'CROSS JOIN articles a ON a.id = articles_fts.rowid' if len(params) > 1 else ''
+        if labeled and joins:
+            where.append('a.department IS NOT NULL')
+        elif labeled:
+            # The unlabeled ids are read once from the department index
+            # instead of looking up every match in articles
+            where.append('articles_fts.rowid NOT IN (SELECT id FROM articles WHERE department IS NULL)')
+        matches = f'FROM articles_fts {joins} WHERE {" AND ".join(where)}'
+
+        # One read transaction, so the count, the ranking and the snippets
+        # see the same articles while the spiders store new ones
+        self.conn.execute('BEGIN')
+        try:
+            results['total'], results['hits'] = self._hits(query, matches, params, page, per_page)
+        finally:
+            self.conn.execute('COMMIT')
+        return results
+
+    def _hits(self, query, matches, params, page, per_page):
+        """(number of matches, hits of the page)"""
+        total = self.conn.execute(f'SELECT count(*) {matches}', params).fetchone()[0]
+        offset = (page - 1) * per_page
+        if offset >= min(total, self.max_ranked):
+            return total, []
+        if total > self.max_ranked:
+            # Rowids grow as articles are stored, the newest matches are the highest
+            oldest = self.conn.execute(
+                f'SELECT articles_fts.rowid {matches} ORDER BY articles_fts.rowid DESC LIMIT 1 OFFSET ?',
+                [*params, self.max_ranked - 1],
+            ).fetchone()[0]
+            matches += ' AND articles_fts.rowid >= ?'
+            params = [*params, oldest]
+
+        # Ranked first, then the columns and snippets of the page's hits
+        # only: SQLite computes them for every row it sorts
+        ranked = self.conn.execute(
+            f'SELECT articles_fts.rowid, {BM25} AS score {matches} ORDER BY score LIMIT ? OFFSET ?',
+            [*params, per_page, offset],
+        ).fetchall()
+        placeholders = ','.join('?' * len(ranked))
+        rows = self.conn.execute(
+            'SELECT a.id, a.url, a.headline, a.summary, s.name, a.category, a.subcategory,'
+            ' a.date_published, a.date_machine, a.published_at, a.image_url, a.department, a.sentiment,'
+            f" snippet(articles_fts, -1, '{MARK_START}', '{MARK_END}', '…', ?)"
+            ' FROM articles_fts'
+            ' JOIN articles a ON a.id = articles_fts.rowid'
+            ' LEFT JOIN sources s ON s.id = a.source_id'
+            f' WHERE articles_fts MATCH ? AND articles_fts.rowid IN ({placeholders})',
+            [self.snippet_tokens, query, *(rowid for rowid, score in ranked)],
+        )
+        rows = {row[0]: row for row in rows}
+        hits = []
+        for rowid, score in ranked:
+            row = rows.get(rowid)
+            if row is None:
+                continue
+            *values, snippet = row
+            hit = dict(zip(HIT_COLUMNS, values))
+            hit['snippet'] = render_snippet(snippet or '', self.highlight)
+            # BM25 scores are negative, the best match lowest
+            hit['score'] = round(-score, 3)
+            hits.append(hit)
+        return total, hits
@@ -28,6 +28,16 @@ ROBOTSTXT_OBEY = True
 CONCURRENT_REQUESTS_PER_DOMAIN = 1
 DOWNLOAD_DELAY = 1
 
+# Starting from the two values above, adapt each domain's concurrency and
+# delay to its latency, error rate and 429/503 Retry-After, within these limits
+ADAPTIVE_CONCURRENCY_ENABLED = True
+ADAPTIVE_CONCURRENCY_MIN = 1
+ADAPTIVE_CONCURRENCY_MAX = 4
+ADAPTIVE_DELAY_MIN = 0.25
+ADAPTIVE_DELAY_MAX = 30
+ADAPTIVE_TARGET_LATENCY = 2.0
+#ADAPTIVE_MAX_ERROR_RATE = 0.1
+
 # Disable cookies (enabled by default)
 #COOKIES_ENABLED = False
 
@@ -42,15 +52,44 @@ DOWNLOAD_DELAY = 1
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
-#    "news_scraper.middlewares.NewsScraperSpiderMiddleware": 543,
-#}
+SPIDER_MIDDLEWARES = {
+    "news_scraper.middlewares.NewsScraperSpiderMiddleware": 543,
+}
+
+# Article requests (to these spider callbacks) for URLs already in the dedup
+# store are not downloaded again, except for up to N per run for each spider.
+# Those re-crawls carry meta/item 'revisit', pass deduplication and update
+# the stored article
+KNOWN_URL_CALLBACKS = ["parse_article_page"]
+#KNOWN_URL_REVISITS = {"ndtv-spider": 5}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "news_scraper.middlewares.NewsScraperDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    # Below HttpCompressionMiddleware (590), whose process_response runs first,
+    # so stored sizes and conditional/bytes_saved count decompressed bytes
+    "news_scraper.middlewares.ConditionalRequestMiddleware": 580,
+    # Above RetryMiddleware (550), so it sees the 429/503s and errors it
+    # retries, and above 580 so it also sees the 304s
+    "news_scraper.middlewares.AdaptiveConcurrencyMiddleware": 585,
+    # Below HttpCompressionMiddleware (590) and the two above, so it prunes
+    # the decoded body and they still see the full size
+    "news_scraper.middlewares.ResponsePruningMiddleware": 560,
+    # Above every other middleware: its process_exception runs first, so it
+    # sees what their process_request raises (RobotsTxt, Offsite, HttpCache)
+    "news_scraper.middlewares.FrontierMiddleware": 990,
+}
+
+# ETag/Last-Modified of every page downloaded so far (relative paths go under
+# .scrapy/), revalidated on the next run. Set to None to always re-download.
+CONDITIONAL_STORE_PATH = "validators.sqlite3"
+#CONDITIONAL_BATCH_SIZE = 200
+
+# Drop scripts (except JSON-LD), styles, <noscript>, <svg>, comments and ad
+# containers from HTML before parsing; bytes removed per spider are in the
+# pruning/ stats. benchmarks/bench_parse.py --prune measures the parse savings.
+PRUNE_RESPONSES_ENABLED = True
+#PRUNE_AD_CONTAINERS = True
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -67,8 +106,68 @@ ITEM_PIPELINES = {
     'news_scraper.pipelines.NewsArticleQualityPipeline': 400,
     'news_scraper.pipelines.NewsArticleDeduplicationPipeline': 500,
     'news_scraper.pipelines.NewsArticleExportPipeline': 600,
+    'news_scraper.pipelines.NewsArticleFusedPipeline': 100,
+    'news_scraper.pipelines.NewsArticleOffloadPipeline': 250,
+    'news_scraper.pipelines.NewsArticleJsonLinesExportPipeline': 700,
+    'news_scraper.pipelines.NewsArticleColumnarExportPipeline': 710,
+    'news_scraper.pipelines.NewsArticleStoragePipeline': 720,
 }
 
+# Time every pipeline stage and count dropped items by reason
+# (quality.headline_too_short, ...): pipeline/ stats, and a Prometheus text
+# file rewritten every PIPELINE_METRICS_INTERVAL seconds
+ITEM_PROCESSOR = "news_scraper.metrics.InstrumentedItemPipelineManager"
+PIPELINE_METRICS_FILE = "metrics/pipeline.prom"
+PIPELINE_METRICS_INTERVAL = 30
+
+# Streaming export: newline-delimited JSON, rotated by size/age, compressed
+# ("gzip", "zstd" or None) and listed in <dir>/manifest.jsonl when complete;
+# a relative JSONL_EXPORT_DIR is under .scrapy/
+JSONL_EXPORT_DIR = "exports"
+JSONL_EXPORT_MAX_BYTES = 64 * 1024 * 1024
+JSONL_EXPORT_MAX_SECONDS = 3600
+JSONL_EXPORT_COMPRESSION = "gzip"
+
+# Columnar export for the ML notebooks (requires pyarrow): Parquet or Arrow
+# IPC files partitioned by source and publication date
+#COLUMNAR_EXPORT_DIR = "columnar"
+#COLUMNAR_EXPORT_FORMAT = "parquet"
+#COLUMNAR_EXPORT_BATCH_SIZE = 1000
+#COLUMNAR_EXPORT_COMPRESSION = "zstd"
+
+# Articles, tags and sources in a normalized SQLite database (relative paths
+# go under .scrapy/), one row per canonical URL, written in batches by a
+# writer thread. Set to None to disable.
+ARTICLE_STORE_PATH = "articles.sqlite3"
+#ARTICLE_STORE_BATCH_SIZE = 200
+#ARTICLE_STORE_FLUSH_SECONDS = 5
+# Full-text index (SQLite FTS5) of the stored headlines, summaries and
+# contents, updated with every batch; queried with news_scraper.search
+ARTICLE_SEARCH_ENABLED = True
+
+# Run cleaning and enrichment in a worker pool instead of on the reactor
+# thread ("thread" or "process"), at most CONCURRENT_ITEMS items at a time
+PIPELINE_OFFLOAD_ENABLED = False
+PIPELINE_OFFLOAD_EXECUTOR = "thread"
+PIPELINE_OFFLOAD_WORKERS = 2
+
+# Number of distinct raw date strings whose normalized form is cached (by
+# every offload worker with PIPELINE_OFFLOAD_ENABLED)
+DATE_CACHE_SIZE = 4096
+
+# Run the six stages above as a single fused pipeline (same drops and output)
+FUSED_PIPELINE_ENABLED = False
+
+# Persistent dedup store shared by all spiders (relative paths go under .scrapy/).
+# Set to None to only deduplicate within a single run.
+DEDUP_STORE_PATH = "dedup.sqlite3"
+DEDUP_BATCH_SIZE = 500
+# Estimated Jaccard similarity (word 5-shingles, MinHash/LSH) above which an
+# article counts as a duplicate of one already seen. 0 uses an exact hash.
+DEDUP_NEAR_DUPLICATE_THRESHOLD = 0.8
+#DEDUP_MINHASH_PERMUTATIONS = 128
+#DEDUP_SHINGLE_SIZE = 5
+
 #Configure logging level for pipelines
 LOG_LEVEL = 'INFO'
 
@@ -88,11 +187,38 @@ LOG_LEVEL = 'INFO'
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-#HTTPCACHE_ENABLED = True
-#HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = "httpcache"
-#HTTPCACHE_IGNORE_HTTP_CODES = []
-#HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_ENABLED = True
+# Crawls fetch pages again after an hour; to reprocess everything from the
+# cache instead, run with -s HTTPCACHE_EXPIRATION_SECS=0 -s HTTPCACHE_IGNORE_MISSING=True
+# -s DEDUP_STORE_PATH= -s FRONTIER_DIR= -s DISCOVERY_STATE_PATH= (see news_scraper/httpcache.py)
+HTTPCACHE_EXPIRATION_SECS = 3600
+HTTPCACHE_DIR = "httpcache"
+# 304s are answers to conditional requests, not pages to replay
+HTTPCACHE_IGNORE_HTTP_CODES = [304, 429, 500, 502, 503, 504]
+# Bodies stored once per content hash with zstd (gzip without a zstd module),
+# least recently used responses evicted beyond HTTPCACHE_MAX_SIZE bytes
+HTTPCACHE_STORAGE = "news_scraper.httpcache.ContentAddressedCacheStorage"
+HTTPCACHE_COMPRESSION = "zstd"
+#HTTPCACHE_COMPRESSION_LEVEL = 3
+HTTPCACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+#HTTPCACHE_BATCH_SIZE = 100
+
+# Resumable crawl frontier: the queue and the seen request fingerprints are
+# checkpointed to <FRONTIER_DIR>/<spider>.sqlite3 (under .scrapy/), so a crawl
+# that stops early continues from there on the next run. Set FRONTIER_DIR to
+# None to keep the frontier in memory only.
+SCHEDULER = "news_scraper.frontier.FrontierScheduler"
+FRONTIER_DIR = "frontier"
+#FRONTIER_CHECKPOINT_INTERVAL = 10.0
+#FRONTIER_CHECKPOINT_BATCH = 500
+
+# Discover articles from the news sitemaps and RSS feeds in a source's
+# extraction config ("feeds"), skipping entries older than the spider's last
+# finished crawl, or from its listing pages ("listing"). Spiders without
+# feeds, or whose feeds cannot be read, use the listing pages. Per run:
+# scrapy crawl <spider> -a discovery=listing
+DISCOVERY_MODE = "feeds"
+DISCOVERY_STATE_PATH = "discovery.sqlite3"
 
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
@@ -0,0 +1,182 @@
+import time
+
+import scrapy
+from scrapy import signals
+from scrapy.utils.project import data_path
+
+from news_scraper.items import NewsArticle
+from news_scraper.cascade import CascadeEngine
+from news_scraper.discovery import CrawlLog
+from news_scraper.extraction import SourceExtractor
+from news_scraper.structured import StructuredDataExtractor
+
+
+class SourceSpider(scrapy.Spider):
+    """Crawl a news source described by an extraction config
+
+    Subclasses set ``name``, ``allowed_domains``, ``start_urls`` and
+    ``extraction``, the source config (see news_scraper.extraction).
+
+    Articles are discovered from the listing pages in ``start_urls``, or,
+    when the config has a 'discovery' entry and the mode is 'feeds', from its
+    sitemaps and feeds, with the listing pages as the fallback when none of
+    them can be read.
+    """
+
+    extraction = None
+    # 'feeds' or 'listing' (-a discovery=...), DISCOVERY_MODE when not given
+    discovery = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Selectors are compiled here, once per crawl
+        self.extractor = SourceExtractor(self.extraction)
+        # Reads structured data and learns which fallback selector works for the source
+        self.structured = StructuredDataExtractor()
+        self.selectors = CascadeEngine(self.extractor.source)
+        self.crawl_log = None
+        self.since = None
+        self.started_at = None
+        # Sitemaps and feeds scheduled by this run but not answered, and read so far
+        self.discovery_pending = 0
+        self.discovery_read = 0
+        # Marks the discovery requests counted in discovery_pending: a resumed
+        # frontier also hands back requests scheduled by an earlier run
+        self.discovery_run = None
+        self.discovery_fallback = False
+
+    async def start(self):
+        mode = self.discovery or self.settings.get('DISCOVERY_MODE', 'listing')
+        if mode != 'feeds' or self.extractor.discovery is None:
+            async for request in super().start():
+                yield request
+            return
+
+        path = self.settings.get('DISCOVERY_STATE_PATH')
+        self.crawl_log = CrawlLog(data_path(path) if path else ':memory:')
+        self.crawl_log.open()
+        # Articles dated before the start of the last finished crawl are not requested
+        self.since = self.crawl_log.last_started(self.name)
+        self.started_at = self.crawl_log.started(self.name, time.time())
+        # Counted once they are in the scheduler: a resumed frontier drops the
+        # start requests, it already has them or what they led to
+        self.discovery_run = time.time_ns()
+        self.crawler.signals.connect(self._discovery_scheduled, signal=signals.request_scheduled)
+        self.crawler.signals.connect(self._discovery_dropped, signal=signals.request_dropped)
+        for url in self.extractor.discovery.urls:
+            yield self._discovery_request(url)
+
+    def _discovery_request(self, url):
+        # Ahead of every article, so child sitemaps are read early
+        priority = self.extractor.listing_priority(0) + 10
+        return scrapy.Request(url, callback=self.parse_discovery, errback=self.discovery_failed,
+                              dont_filter=True, priority=priority)
+
+    def parse_discovery(self, response):
+        discovery = self.extractor.discovery
+        stats = self.crawler.stats
+        if response.url.endswith('/robots.txt'):
+            sitemaps, articles, stale = discovery.sitemaps_from_robots(response), [], 0
+            kind = 'robots' if sitemaps else None
+        else:
+            kind, sitemaps, articles, stale = discovery.read(response, self.since)
+        if kind is not None:
+            self.discovery_read += 1
+            stats.inc_value(f'discovery/{kind}')
+        else:
+            self.logger.warning(f"No sitemap or feed entries in {response.url}")
+        stats.inc_value('discovery/articles', len(articles))
+        stats.inc_value('discovery/stale', stale)
+
+        for url in sitemaps:
+            yield self._discovery_request(url)
+        for url in articles:
+            yield scrapy.Request(url, callback=self.parse_article_page,
+                                 priority=self.extractor.priority(url, 1))
+        yield from self._discovery_done(response.request)
+
+    def discovery_failed(self, failure):
+        self.logger.warning(f"Discovery request failed: {failure.request.url} ({failure.value!r})")
+        return self._discovery_done(failure.request)
+
+    def _discovery_scheduled(self, request, spider):
+        # Retries and redirects keep the meta, and are not counted twice
+        if request.callback == self.parse_discovery and request.meta.get('discovery_run') != self.discovery_run:
+            request.meta['discovery_run'] = self.discovery_run
+            self.discovery_pending += 1
+
+    def _discovery_dropped(self, request, spider):
+        if request.meta.get('discovery_run') == self.discovery_run:
+            self.discovery_pending -= 1
+
+    def _discovery_done(self, request):
+        """The listing page requests, once no sitemap or feed is left and none could be read"""
+        if request.meta.get('discovery_run') == self.discovery_run:
+            self.discovery_pending -= 1
+        if self.discovery_pending or self.discovery_read or self.discovery_fallback:
+            return []
+        self.discovery_fallback = True
+        self.logger.warning("No sitemap or feed could be read, discovering from the listing pages")
+        self.crawler.stats.inc_value('discovery/fallback')
+        return [scrapy.Request(url, dont_filter=True) for url in self.start_urls]
+
+    def parse(self, response):
+        # Listing pages are numbered from 1 (start_urls) by how they were
+        # reached, so the frontier can crawl fresher pages' articles first
+        page = response.meta.get('listing_page', 1)
+
+        # Extract articles from the listing page
+        article_requests = self.extractor.article_links.follow(
+            response, self.parse_article_page, stats=self.crawler.stats)
+        for request in article_requests:
+            request.priority = self.extractor.priority(request.url, page)
+        yield from article_requests
+
+        # Handle pagination
+        for url in self.extractor.pagination.next_urls(response, bool(article_requests)):
+            yield response.follow(
+                url, callback=self.parse, meta={'listing_page': page + 1},
+                priority=self.extractor.listing_priority(page + 1))
+
+    def parse_article_page(self, response):
+        # Structured data (JSON-LD / OpenGraph) first, the selector cascades
+        # only for the fields it does not have
+        structured = self.structured.extract(response)
+
+        newsArticle = NewsArticle()
+        newsArticle['url'] = response.url
+        for rule in self.extractor.fields:
+            value = rule.structured and structured.get(rule.field)
+            if not value:
+                value = self.selectors.resolve(response, rule.cascade)
+            if not value and rule.fallback is not None:
+                value = self.selectors.resolve(response, rule.fallback.cascade)
+            newsArticle[rule.field] = rule.clean(value)
+
+        newsArticle['category'], newsArticle['subcategory'] = self.extractor.category(response.url)
+        newsArticle['source'] = self.extractor.source
+        if response.meta.get('revisit'):
+            newsArticle['revisit'] = True
+
+        # Yield the populated item to be processed by the pipelines
+        yield newsArticle
+
+    def closed(self, reason):
+        if self.crawl_log is not None:
+            if reason == 'finished':
+                self.crawl_log.finished(self.name, self.started_at)
+            self.crawl_log.close()
+
+        cascades = self.extractor.cascades
+        self.structured.update_stats(self.crawler.stats, self.selectors.source)
+        self.selectors.update_stats(self.crawler.stats, cascades)
+        for field, candidate in self.selectors.dead_candidates(cascades):
+            self.logger.info(f"Selector never matched for {field}: {candidate}")
+
+    def parse_error(self, failure):
+        # Handle request failures
+        self.logger.error(f"Request failed: {failure.request.url}")
+
+        # Log additional failure information
+        if hasattr(failure.value, 'response'):
+            self.logger.error(f"HTTP Status: {failure.value.response.status}")
@@ -0,0 +1,26 @@
+# Shared SQLite connection setup for the scraper's local stores.
+
+import os
+import sqlite3
+from urllib.request import pathname2url
+
+
+def connect(path):
+    """Autocommit connection in WAL mode, so several spider processes can
+    share one database file without blocking readers"""
+    if path != ':memory:':
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def connect_readonly(path):
+    """Read-only connection to an existing database, for the query side of
+    a store written by the spiders"""
+    uri = f'file:{pathname2url(os.path.abspath(path))}?mode=ro'
+    return sqlite3.connect(uri, uri=True, timeout=30, isolation_level=None, check_same_thread=False)
@@ -0,0 +1,321 @@
+# Article storage in a local SQLite database.
+#
+# Exported articles are kept in a normalized schema the frontend and the ML
+# jobs can query through its indexes instead of re-reading the JSON lines
+# export:
+#
+#     sources (id, name)
+#     articles (id, canonical_url UNIQUE, url, source_id, headline, ...)
+#     tags (id, name)
+#     article_tags (article_id, tag_id)
+#
+# An article is stored once per canonical URL (see news_scraper.dedup): a
+# later crawl of the same article updates its row and replaces its tags.
+#
+# Every article also has a department and a sentiment, the labels the
+# frontend filters on. The department is first taken from the scraped
+# category (DEPARTMENTS), NULL for categories that name no department (city
+# pages, opinion), and the sentiment is 'neutral'; the classification and
+# sentiment jobs overwrite them (UPDATE articles SET department = ...,
+# sentiment = ...), and re-crawls keep their labels. The read API only
+# serves articles with a department.
+#
+# published_at is the article's date as a UTC timestamp ('2025-09-27T16:50:00Z',
+# see news_scraper.dates.published_at), or when it was scraped if its date
+# cannot be read: the scraped dates are free text, so lists are sorted on it.
+#
+# With search enabled, headline, summary and content are also indexed in an
+# FTS5 table over the articles table, kept up to date by triggers in the same
+# transaction as each batch: only the articles inserted, or re-crawled with
+# different text, are (re)indexed, and the index never has to be rebuilt.
+# news_scraper.search queries it.
+#
+# Items are buffered on the reactor thread and handed over in batches to a
+# writer thread, which owns the connection for the whole crawl and writes
+# each batch with executemany() in a single transaction. The database is in
+# WAL mode, so readers are never blocked by the writer.
+
+import logging
+import queue
+import threading
+import time
+
+from news_scraper import sqlite
+from news_scraper.dates import published_at
+from news_scraper.dedup import MAX_QUERY_PARAMS, canonical_url
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS sources ('
+    ' id INTEGER PRIMARY KEY,'
+    ' name TEXT NOT NULL UNIQUE'
+    ')',
+    'CREATE TABLE IF NOT EXISTS articles ('
+    ' id INTEGER PRIMARY KEY,'
+    ' canonical_url TEXT NOT NULL UNIQUE,'
+    ' url TEXT NOT NULL,'
+    # Short columns first: reading a column means reading the row up to it,
+    # and the long text would otherwise have to be skipped to filter a row
+    ' source_id INTEGER REFERENCES sources (id),'
+    ' category TEXT,'
+    ' subcategory TEXT,'
+    ' date_published TEXT,'
+    ' date_machine TEXT,'
+    ' scraped_at TEXT,'
+    ' published_at TEXT NOT NULL,'
+    ' word_count INTEGER,'
+    ' read_time INTEGER,'
+    ' stored_at REAL NOT NULL,'
+    ' updated_at REAL NOT NULL,'
+    ' department TEXT,'
+    " sentiment TEXT NOT NULL DEFAULT 'neutral',"
+    ' author TEXT,'
+    ' image_url TEXT,'
+    ' keywords TEXT,'
+    ' headline TEXT NOT NULL,'
+    ' summary TEXT,'
+    ' content TEXT'
+    ')',
+    'CREATE TABLE IF NOT EXISTS tags ('
+    ' id INTEGER PRIMARY KEY,'
+    ' name TEXT NOT NULL UNIQUE'
+    ')',
+    'CREATE TABLE IF NOT EXISTS article_tags ('
+    ' article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,'
+    ' tag_id INTEGER NOT NULL REFERENCES tags (id),'
+    ' PRIMARY KEY (article_id, tag_id)'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS article_tags_tag ON article_tags (tag_id, article_id)',
+    # In the order pages of the read API are listed (news_scraper.api)
+    'CREATE INDEX IF NOT EXISTS articles_published ON articles (published_at, id)',
+    'CREATE INDEX IF NOT EXISTS articles_source_published ON articles (source_id, published_at, id)',
+    'CREATE INDEX IF NOT EXISTS articles_category_published ON articles (category, published_at)',
+    'CREATE INDEX IF NOT EXISTS articles_department_published ON articles (department, published_at, id)',
+    'CREATE INDEX IF NOT EXISTS articles_sentiment_published ON articles (sentiment, published_at, id)',
+)
+
+# Scraped category (or subcategory) -> department, until an article is classified
+DEPARTMENTS = {
+    'business': 'economy',
+    'economy': 'economy',
+    'markets': 'economy',
+    'politics': 'politics',
+    'political-pulse': 'politics',
+    'elections': 'politics',
+    'sports': 'sports',
+    'cricket': 'sports',
+    'health': 'health',
+    'science': 'science',
+    'technology': 'science',
+    'entertainment': 'entertainment',
+    'bollywood': 'entertainment',
+    'crime': 'crime',
+    'defence': 'defence',
+    'world': 'foreign-affairs',
+    'foreign-affairs': 'foreign-affairs',
+    'courts': 'judiciary',
+    'judiciary': 'judiciary',
+}
+
+# Full-text index of the articles, external content (the text is only stored
+# in articles), and the BM25 weights of its columns: headline matches weigh most
+SEARCH_COLUMNS = ('headline', 'summary', 'content')
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+
+_new = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+_old = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+_columns = ', '.join(SEARCH_COLUMNS)
+
+SEARCH_SCHEMA = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 ('
+    f'{_columns},'
+    f" content='articles', content_rowid='id',"
+    f" tokenize='porter unicode61 remove_diacritics 2'"
+    f')',
+    f'CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN'
+    f' INSERT INTO articles_fts (rowid, {_columns}) VALUES (new.id, {_new});'
+    f' END',
+    f'CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN'
+    f" INSERT INTO articles_fts (articles_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old});"
+    f' END',
+    # Re-crawls with unchanged text leave the index alone
+    f'CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF {_columns} ON articles'
+    f' WHEN ' + ' OR '.join(f'old.{column} IS NOT new.{column}' for column in SEARCH_COLUMNS) + ' BEGIN'
+    f" INSERT INTO articles_fts (articles_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old});"
+    f' INSERT INTO articles_fts (rowid, {_columns}) VALUES (new.id, {_new});'
+    f' END',
+)
+
+# Article columns taken from the item, in row order after the source
+ARTICLE_COLUMNS = (
+    'url', 'headline', 'summary', 'content', 'author', 'date_published', 'date_machine',
+    'image_url', 'keywords', 'category', 'subcategory', 'scraped_at', 'word_count', 'read_time',
+)
+
+# The department is only set for new articles, and a re-crawl whose date
+# cannot be read keeps the publication time
+UPSERT_ARTICLE = (
+    f'INSERT INTO articles (source_id, {", ".join(ARTICLE_COLUMNS)}, canonical_url, department,'
+    f' published_at, stored_at, updated_at)'
+    f' VALUES ((SELECT id FROM sources WHERE name = ?), {", ".join("?" * len(ARTICLE_COLUMNS))},'
+    f' ?, ?, ifnull(?, ?), ?, ?)'
+    ' ON CONFLICT (canonical_url) DO UPDATE SET source_id = excluded.source_id, '
+    + ', '.join(f'{column} = excluded.{column}' for column in ARTICLE_COLUMNS)
+    + ', published_at = ifnull(?, published_at), updated_at = excluded.updated_at'
+)
+
+
+# Positions in an article_row(); the subcategory follows the category
+CATEGORY = 1 + ARTICLE_COLUMNS.index('category')
+DATE_MACHINE = 1 + ARTICLE_COLUMNS.index('date_machine')
+SCRAPED_AT = 1 + ARTICLE_COLUMNS.index('scraped_at')
+
+
+def article_row(item):
+    """(source, ARTICLE_COLUMNS..., tags) of an exported item"""
+    get = item.get
+    return (
+        get('source') or None,
+        *[get(column) for column in ARTICLE_COLUMNS],
+        tuple(get('tags') or ()),
+    )
+
+
+def department(category, subcategory=None):
+    """Department of a scraped category or subcategory, None when unknown"""
+    return DEPARTMENTS.get(category or '') or DEPARTMENTS.get(subcategory or '')
+
+
+def _utc(seconds):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(seconds))
+
+
+class ArticleStore:
+    """Articles, their tags and sources, written in batches from a writer thread"""
+
+    def __init__(self, path=':memory:', batch_size=200, max_pending_batches=8, search=True):
+        self.path = path
+        self.batch_size = batch_size
+        self.search = search
+        self.conn = None
+        self.thread = None
+        # Items added since the last flush, as article_row() tuples; URLs are
+        # canonicalized by the writer thread, off the item's path
+        self.buffer = []
+        # Batches waiting for the writer; add() blocks while it is full
+        self.batches = queue.Queue(max_pending_batches)
+        self.written = 0
+        self.failed = 0
+        self.transactions = 0
+
+    def open(self):
+        if self.conn is not None:
+            return
+        self.conn = sqlite.connect(self.path)
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        with self.conn:
+            self.conn.execute('BEGIN')
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+            if self.search:
+                self._create_search_index()
+            self.conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+        self.thread = threading.Thread(target=self._run, name='news-storage', daemon=True)
+        self.thread.start()
+        logger.debug(f"Opened article store {self.path}")
+
+    def _create_search_index(self):
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone()
+        if exists:
+            return
+        for statement in SEARCH_SCHEMA:
+            self.conn.execute(statement)
+        # Articles stored before search was enabled, indexed once
+        self.conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.batches.put(None)
+        self.thread.join()
+        self.thread = None
+        self.conn.close()
+        self.conn = None
+
+    def add(self, item):
+        """Store an item, written to disk with the next batch"""
+        self.buffer.append(article_row(item))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered items to the writer thread"""
+        if not self.buffer:
+            return
+        self.batches.put(self.buffer)
+        self.buffer = []
+
+    def _run(self):
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            try:
+                self.write(batch)
+            except Exception:
+                # Anything else would end the thread, and add() and close()
+                # would then wait forever on the full queue
+                self.failed += len(batch)
+                logger.exception(f"Could not store {len(batch)} articles in {self.path}")
+            else:
+                self.written += len(batch)
+
+    def write(self, rows):
+        """Upsert article_row() tuples and their sources and tags in one transaction"""
+        now = time.time()
+        conn = self.conn
+        urls = [canonical_url(row[1]) for row in rows]
+        dates = [published_at(row[DATE_MACHINE]) for row in rows]
+        stored = _utc(now)
+        with conn:
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT OR IGNORE INTO sources (name) VALUES (?)',
+                {(row[0],) for row in rows if row[0]},
+            )
+            conn.executemany(UPSERT_ARTICLE, [
+                (*row[:-1], url, department(row[CATEGORY], row[CATEGORY + 1]),
+                 dated, published_at(None, row[SCRAPED_AT]) or stored, now, now, dated)
+                for row, url, dated in zip(rows, urls, dates)
+            ])
+
+            # The tags of a stored article are those of its latest crawl
+            ids = self._article_ids(set(urls))
+            conn.executemany('DELETE FROM article_tags WHERE article_id = ?', [(i,) for i in ids.values()])
+            tags = {(tag,) for row in rows for tag in row[-1]}
+            if tags:
+                conn.executemany('INSERT OR IGNORE INTO tags (name) VALUES (?)', tags)
+                conn.executemany(
+                    'INSERT OR IGNORE INTO article_tags (article_id, tag_id)'
+                    ' SELECT ?, id FROM tags WHERE name = ?',
+                    [(ids[url], tag) for row, url in zip(rows, urls) for tag in row[-1]],
+                )
+        self.transactions += 1
+
+    def _article_ids(self, urls):
+        """{canonical URL: article id}"""
+        urls = list(urls)
+        ids = {}
+        for start in range(0, len(urls), MAX_QUERY_PARAMS):
+            chunk = urls[start:start + MAX_QUERY_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f'SELECT canonical_url, id FROM articles WHERE canonical_url IN ({placeholders})', chunk)
+            ids.update(rows)
+        return ids
@@ -0,0 +1,143 @@
+# Article metadata from the structured data pages embed for search engines
+# and social previews.
+#
+# A single walk of the document collects the application/ld+json scripts and
+# the meta tags. JSON-LD NewsArticle values are preferred,
+# OpenGraph / plain meta tags fill the gaps, and the spiders run their CSS
+# cascades only for the fields still missing.
+
+import json
+from collections import defaultdict
+
+
+FIELDS = ('headline', 'author', 'date_published', 'summary', 'keywords', 'image_url')
+
+ARTICLE_TYPES = frozenset((
+    'NewsArticle', 'Article', 'ReportageNewsArticle', 'AnalysisNewsArticle',
+    'OpinionNewsArticle', 'BackgroundNewsArticle', 'BlogPosting', 'LiveBlogPosting',
+    'VideoObject',
+))
+
+# Field -> meta tag names (property or name attribute), in order of preference
+META_TAGS = {
+    'headline': ('og:title', 'twitter:title'),
+    'author': ('author', 'article:author'),
+    'date_published': ('article:published_time', 'publish-date', 'pubdate'),
+    'summary': ('og:description', 'description', 'twitter:description'),
+    'keywords': ('news_keywords', 'keywords'),
+    'image_url': ('og:image', 'twitter:image'),
+}
+
+
+def _text(value):
+    """Flatten a JSON-LD value (string, object with a name/url, or list) to text"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return _text(value.get('name') or value.get('url') or '')
+    if isinstance(value, list):
+        return ', '.join(text for text in (_text(v) for v in value) if text)
+    if value is None:
+        return ''
+    return str(value)
+
+
+def _first(value):
+    """First entry of a JSON-LD value that may be a list"""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _types(node):
+    types = node.get('@type', ())
+    return (types,) if isinstance(types, str) else types
+
+
+def _article_nodes(data):
+    """Article objects in a parsed JSON-LD document, including @graph"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            if ARTICLE_TYPES.intersection(_types(node)):
+                yield node
+            graph = node.get('@graph')
+            if graph:
+                stack.append(graph)
+
+
+def from_json_ld(node):
+    image = _first(node.get('image') or node.get('thumbnailUrl'))
+    return {
+        'headline': _text(node.get('headline') or node.get('name')),
+        'author': _text(node.get('author')),
+        'date_published': _text(node.get('datePublished') or node.get('uploadDate')),
+        'summary': _text(node.get('description')),
+        'keywords': _text(node.get('keywords')),
+        'image_url': _text(image),
+    }
+
+
+class StructuredDataExtractor:
+    """Read the FIELDS from JSON-LD and meta tags and count how often they
+    were enough on their own"""
+
+    def __init__(self, fields=FIELDS):
+        self.fields = tuple(fields)
+        self.pages = 0
+        self.complete = 0
+        self.hits = defaultdict(int)
+
+    def extract(self, response):
+        # One walk of the lxml tree for both tag kinds: an XPath query, or a
+        # Selector around every tag, costs more than the lookups themselves
+        scripts = []
+        meta = {}
+        for tag in response.selector.root.iter('script', 'meta'):
+            attrib = tag.attrib
+            if tag.tag == 'script':
+                if attrib.get('type') == 'application/ld+json' and tag.text:
+                    scripts.append(tag.text)
+                continue
+            key = (attrib.get('property') or attrib.get('name') or '').lower()
+            if key and key not in meta and 'content' in attrib:
+                meta[key] = attrib['content'].strip()
+
+        values = {}
+        for script in scripts:
+            try:
+                data = json.loads(script, strict=False)
+            except ValueError:
+                continue
+            for node in _article_nodes(data):
+                for field, value in from_json_ld(node).items():
+                    if value and not values.get(field):
+                        values[field] = value
+
+        for field in self.fields:
+            if values.get(field):
+                continue
+            for name in META_TAGS.get(field, ()):
+                value = meta.get(name)
+                # article:author is often a profile URL rather than a name
+                if value and not (field == 'author' and value.startswith('http')):
+                    values[field] = value
+                    break
+
+        self.pages += 1
+        for field in self.fields:
+            if values.get(field):
+                self.hits[field] += 1
+        if all(values.get(field) for field in self.fields):
+            self.complete += 1
+        return values
+
+    def update_stats(self, stats, source):
+        prefix = f'structured_data/{source}'
+        stats.set_value(f'{prefix}/pages', self.pages)
+        stats.set_value(f'{prefix}/complete', self.complete)
+        for field in self.fields:
+            stats.set_value(f'{prefix}/{field}', self.hits[field])
@@ -0,0 +1,145 @@
+# Per-domain concurrency and delay control.
+#
+# Each domain starts at CONCURRENT_REQUESTS_PER_DOMAIN / DOWNLOAD_DELAY and is
+# then steered by what it answers:
+#   - fast, error-free responses raise concurrency by about one request per
+#     round trip and shorten the delay (additive increase);
+#   - latency above the target or a rising error rate back off
+#     multiplicatively;
+#   - 429 and 503 drop to the floor, honour Retry-After and hold the domain
+#     there until it has passed.
+# Everything stays within the configured floor and ceiling.
+
+import time
+from email.utils import parsedate_to_datetime
+
+
+THROTTLE_STATUSES = (429, 503)
+
+# Weight of the newest sample in the latency / error moving averages
+LATENCY_WEIGHT = 0.3
+ERROR_WEIGHT = 0.1
+
+
+def retry_after_seconds(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+class DomainThrottle:
+    """Concurrency, delay and throughput counters of one download slot"""
+
+    def __init__(self, concurrency, delay, limits):
+        self.limits = limits
+        self.concurrency = float(concurrency)
+        self.delay = float(delay)
+        self.latency = None
+        self.error_rate = 0.0
+        self.hold_until = 0.0
+
+        self.started_at = time.monotonic()
+        self.responses = 0
+        self.errors = 0
+        self.throttled = 0
+        self.bytes = 0
+        self.max_concurrency = self.slot_concurrency
+
+    @property
+    def slot_concurrency(self):
+        return max(1, int(self.concurrency))
+
+    def on_response(self, status, latency, size, retry_after=None):
+        now = time.monotonic()
+        self.responses += 1
+        self.bytes += size
+
+        if status in THROTTLE_STATUSES:
+            self.throttled += 1
+            self._record_error()
+            self._throttle(now, retry_after)
+            return
+
+        if status >= 500:
+            self._record_error()
+            self._back_off_on_errors()
+            return
+
+        self.error_rate *= 1 - ERROR_WEIGHT
+        if latency is not None:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += LATENCY_WEIGHT * (latency - self.latency)
+
+        if now < self.hold_until:
+            return
+
+        limits = self.limits
+        if self.latency is not None and self.latency > limits.target_latency:
+            self.concurrency = max(limits.min_concurrency, self.concurrency * 0.75)
+            self.delay = min(limits.max_delay, max(self.delay, limits.min_delay) * 1.25)
+        elif self.error_rate <= limits.max_error_rate:
+            self.concurrency = min(limits.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self.delay = max(limits.min_delay, self.delay * 0.8)
+        self.max_concurrency = max(self.max_concurrency, self.slot_concurrency)
+
+    def on_exception(self):
+        self.errors += 1
+        self._record_error()
+        self._back_off_on_errors()
+
+    def _record_error(self):
+        self.error_rate += ERROR_WEIGHT * (1 - self.error_rate)
+
+    def _back_off_on_errors(self):
+        if self.error_rate > self.limits.max_error_rate:
+            limits = self.limits
+            self.concurrency = max(limits.min_concurrency, self.concurrency / 2)
+            self.delay = min(limits.max_delay, max(self.delay * 2, limits.min_delay, 0.5))
+
+    def _throttle(self, now, retry_after):
+        limits = self.limits
+        self.concurrency = float(limits.min_concurrency)
+        self.delay = min(limits.max_delay, max(self.delay * 2, retry_after or 0.0, 1.0))
+        self.hold_until = now + max(retry_after or 0.0, self.delay)
+
+    def throughput(self):
+        """Responses per minute since the domain was first seen"""
+        elapsed = time.monotonic() - self.started_at
+        return self.responses * 60 / elapsed if elapsed > 0 else 0.0
+
+
+class ThrottleLimits:
+    """Floor and ceiling settings shared by all domains"""
+
+    def __init__(self, min_concurrency=1, max_concurrency=8, min_delay=0.25, max_delay=30.0,
+                 target_latency=2.0, max_error_rate=0.1):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            min_concurrency=settings.getint('ADAPTIVE_CONCURRENCY_MIN', 1),
+            max_concurrency=settings.getint('ADAPTIVE_CONCURRENCY_MAX', 8),
+            min_delay=settings.getfloat('ADAPTIVE_DELAY_MIN', 0.25),
+            max_delay=settings.getfloat('ADAPTIVE_DELAY_MAX', 30.0),
+            target_latency=settings.getfloat('ADAPTIVE_TARGET_LATENCY', 2.0),
+            max_error_rate=settings.getfloat('ADAPTIVE_MAX_ERROR_RATE', 0.1),
+        )